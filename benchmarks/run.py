@@ -0,0 +1,197 @@
+from __future__ import print_function
+
+import argparse # Used for the command line
+import json # Used to save and compare results
+import os
+import platform
+import sys
+import time
+from itertools import cycle # Used to feed single-fix benchmarks
+
+try:
+    import tracemalloc # Used to measure peak memory (Python 3.4+)
+except ImportError:
+    tracemalloc = None
+
+# Benchmark the working tree, not an installed copy of the package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+from rssi import RSSI_Scan, RSSI_Localizer
+from benchmarks.synthetic import makeIwlistOutput, makeAccessPoints, makeSignals, makeMac
+
+clock = getattr(time, 'perf_counter', time.time)
+
+# Benchmark harness
+    # Use:
+        # python benchmarks/run.py                        # full run, saves bench_results.json
+        # python benchmarks/run.py --quick -o new.json    # smaller sizes, fewer calls
+        # python benchmarks/run.py --compare old.json     # also prints the change against a saved run
+        # python benchmarks/run.py --only localize        # benchmarks whose name or parameters contain 'localize'
+    # -------------------------------------------------------
+    # Description:
+        # Times the hot paths of the package on synthetic inputs (see
+        # 'synthetic.py'): 'iwlist' parsing, access point filtering,
+        # single-fix, batch and sparse (large AP table) localization.
+        # For every benchmark it reports latency percentiles per call,
+        # throughput (cells or fixes per second) and the peak memory
+        # allocated by one call.
+        # Results are saved as JSON so runs can be compared. Runs fully
+        # offline; no wireless interface is needed.
+
+# measure
+    # Description:
+        # Calls 'func' until both 'calls' calls and 'min_time' seconds
+        # were spent (or, for slow functions, 'max_time' seconds and at
+        # least 5 calls), after a few warm-up calls, and returns the duration
+        # of every call in seconds. Peak memory is measured on a separate
+        # call, since tracing allocations slows everything down.
+    # -----------------------------------------------
+    # Returns: (latencies numpy array, peak bytes or None)
+def measure(func, calls, min_time, max_time):
+    for _ in range(3):
+        func()
+    latencies = []
+    started = clock()
+    while len(latencies) < calls or clock()-started < min_time:
+        if len(latencies) >= 5 and clock()-started > max_time:
+            break
+        start = clock()
+        func()
+        latencies.append(clock()-start)
+    peak = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return numpy.array(latencies), peak
+
+def summarize(name, params, items, latencies, peak):
+    mean = float(latencies.mean())
+    p50, p90, p99 = numpy.percentile(latencies, [50, 90, 99])
+    return {
+        'name': name,
+        'params': params,
+        'items': items,
+        'calls': len(latencies),
+        'latency': {
+            'mean': mean, 'min': float(latencies.min()),
+            'p50': float(p50), 'p90': float(p90), 'p99': float(p99)
+        },
+        'throughput': items/mean,
+        'peakMemory': peak
+    }
+
+# Benchmarks
+    # Description:
+        # Each one yields (name, params, items per call, function to time).
+def parseBenchmarks(sizes):
+    scanner = RSSI_Scan('wlan0')
+    for cells in sizes['cells']:
+        raw = makeIwlistOutput(cells)
+        yield 'parse.formatCells', {'cells': cells}, cells, lambda raw=raw: scanner.formatCells(raw)
+
+def filterBenchmarks(sizes):
+    scanner = RSSI_Scan('wlan0')
+    for cells in sizes['cells']:
+        parsed = scanner.formatCells(makeIwlistOutput(cells))
+        networks = ['ucrwpa', 'eduroam']
+        macs = [makeMac(i) for i in range(0, cells, 2)]
+        yield 'filter.selectAccessPoints', {'cells': cells}, cells, \
+            lambda parsed=parsed, macs=macs: scanner.selectAccessPoints(parsed, networks, macs)
+
+def localizeBenchmarks(sizes):
+    for count in sizes['aps']:
+        localizer = RSSI_Localizer(makeAccessPoints(count))
+        signals = makeSignals(localizer.accessPoints, sizes['batch'])[1]
+        rows = cycle(signals)
+        yield 'localize.getNodePosition', {'aps': count}, 1, \
+            lambda localizer=localizer, rows=rows: localizer.getNodePosition(next(rows))
+        for solver in sizes['solvers']:
+            yield 'localize.getNodePositions', {'aps': count, 'batch': sizes['batch'], 'solver': solver}, sizes['batch'], \
+                lambda localizer=localizer, signals=signals, solver=solver: localizer.getNodePositions(signals, solver)
+
+def sparseBenchmarks(sizes):
+    random = numpy.random.RandomState(0)
+    for count in sizes['table']:
+        localizer = RSSI_Localizer(makeAccessPoints(count, area=count**0.5*10))
+        heard = [random.choice(count, sizes['heard'], replace=False) for _ in range(64)]
+        fixes = cycle([(indices, makeSignals([localizer.accessPoints[i] for i in indices], 1)[1][0]) for indices in heard])
+        yield 'localize.getNodePositionSparse', {'table': count, 'heard': sizes['heard']}, 1, \
+            lambda localizer=localizer, fixes=fixes: localizer.getNodePositionSparse(*next(fixes))
+
+BENCHMARKS = (parseBenchmarks, filterBenchmarks, localizeBenchmarks, sparseBenchmarks)
+
+SIZES = {
+    'full': {'cells': [10, 100, 1000], 'aps': [4, 16, 64, 256], 'batch': 1000,
+             'solvers': ['pinv', 'weighted', 'huber'], 'table': [1000, 10000], 'heard': 12, 'calls': 200, 'minTime': 0.5, 'maxTime': 5.0},
+    'quick': {'cells': [10, 100], 'aps': [4, 16], 'batch': 100,
+              'solvers': ['pinv'], 'table': [1000], 'heard': 12, 'calls': 20, 'minTime': 0.05, 'maxTime': 0.5}
+}
+
+def getMetadata():
+    return {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'tracemalloc': tracemalloc is not None
+    }
+
+def getKey(result):
+    return result['name'] + ' ' + ' '.join('%s=%s' % item for item in sorted(result['params'].items()))
+
+def run(sizes, only=None):
+    results = []
+    for benchmarks in BENCHMARKS:
+        for name, params, items, func in benchmarks(sizes):
+            if only and only not in getKey({'name': name, 'params': params}):
+                continue
+            latencies, peak = measure(func, sizes['calls'], sizes['minTime'], sizes['maxTime'])
+            result = summarize(name, params, items, latencies, peak)
+            results.append(result)
+            print('%-60s p50 %10.1fus  p99 %10.1fus  %12.0f/s  peak %8s' % (
+                getKey(result), result['latency']['p50']*1e6, result['latency']['p99']*1e6,
+                result['throughput'], '-' if peak is None else '%dKiB' % (peak // 1024)
+            ))
+    return results
+
+# loadResults / compare
+    # Description:
+        # 'loadResults' reads a saved run, keyed like 'getKey'. 'compare'
+        # prints the p50 latency of every benchmark of 'results' next to
+        # the same benchmark of that run (ratio > 1 means slower).
+def loadResults(path):
+    with open(path) as results_file:
+        return dict((getKey(result), result) for result in json.load(results_file)['results'])
+
+def compare(results, baseline):
+    print('\n%-60s %12s %12s %8s' % ('benchmark', 'old p50 us', 'new p50 us', 'ratio'))
+    for result in results:
+        old = baseline.get(getKey(result))
+        if old is None:
+            continue
+        old_p50, new_p50 = old['latency']['p50'], result['latency']['p50']
+        print('%-60s %12.1f %12.1f %8.2f' % (getKey(result), old_p50*1e6, new_p50*1e6, new_p50/old_p50))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark RSSI scan parsing and localization.')
+    parser.add_argument('-o', '--output', default='bench_results.json', help='JSON file to write')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer calls')
+    parser.add_argument('--only', help='run benchmarks whose name or parameters contain this string')
+    parser.add_argument('--compare', help='saved JSON results to compare against')
+    args = parser.parse_args(argv)
+    # Read the baseline first, in case it is also the output file.
+    baseline = loadResults(args.compare) if args.compare else None
+    results = run(SIZES['quick' if args.quick else 'full'], args.only)
+    with open(args.output, 'w') as output_file:
+        json.dump({'meta': getMetadata(), 'results': results}, output_file, indent=2, sort_keys=True)
+    print('\nSaved %d results to %s' % (len(results), args.output))
+    if baseline is not None:
+        compare(results, baseline)
+
+if __name__ == '__main__':
+    main()
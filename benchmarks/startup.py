@@ -0,0 +1,131 @@
+from __future__ import print_function
+
+import argparse # Used for the command line
+import json # Used to save and compare results
+import os
+import platform
+import subprocess # Used to start a fresh interpreter per run
+import sys
+import time
+
+clock = getattr(time, 'perf_counter', time.time)
+
+# Startup benchmark
+    # Use:
+        # python benchmarks/startup.py                          # saves startup_results.json
+        # python benchmarks/startup.py --root /tmp/old -o old.json
+        # python benchmarks/startup.py --compare old.json       # also prints the change against a saved run
+    # -------------------------------------------------------
+    # Description:
+        # Import cost of the package. Every scenario runs 'runs' times in
+        # a fresh interpreter, with the package taken from 'root' (the
+        # working tree by default, so an older checkout can be measured
+        # the same way). For every scenario it reports the median wall
+        # time of the whole process (interpreter startup included), its
+        # peak resident set size (ru_maxrss) and whether numpy was
+        # loaded. 'python' is the bare interpreter, as a reference.
+
+SCENARIOS = (
+    ('python', 'pass'),
+    ('import rssi', 'import rssi'),
+    ('from rssi import RSSI_Scan', 'from rssi import RSSI_Scan'),
+    ('from rssi.client import RSSI_LocalizationClient', 'from rssi.client import RSSI_LocalizationClient'),
+    ('from rssi import RSSI_Localizer', 'from rssi import RSSI_Localizer'),
+    ('RSSI_ScanBuffer(4096)', 'from rssi import RSSI_ScanBuffer; RSSI_ScanBuffer(4096)'),
+)
+
+# Printed by the child after the scenario: peak RSS in KiB (bytes on
+# macOS), numpy loaded, number of modules.
+REPORT = '''
+import json, resource, sys
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+print(json.dumps({'maxRSS': rss, 'numpy': 'numpy' in sys.modules, 'modules': len(sys.modules)}))
+'''
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle-1]+values[middle])/2.0
+
+# runScenario
+    # Description:
+        # Runs 'code' 'runs' times (after one warm-up run, to fill the OS
+        # file cache) and summarizes the runs.
+def runScenario(name, code, root, runs):
+    environment = dict(os.environ, PYTHONPATH=root)
+    command = [sys.executable, '-c', code + '\n' + REPORT]
+    subprocess.check_output(command, env=environment)
+    times, reports = [], []
+    for _ in range(runs):
+        start = clock()
+        output = subprocess.check_output(command, env=environment)
+        times.append(clock()-start)
+        reports.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return {
+        'name': name,
+        'runs': runs,
+        'time': {'median': median(times), 'min': min(times)},
+        'maxRSS': median([report['maxRSS'] for report in reports]),
+        'numpy': reports[-1]['numpy'],
+        'modules': reports[-1]['modules']
+    }
+
+def run(root, runs):
+    results = []
+    for name, code in SCENARIOS:
+        result = runScenario(name, code, root, runs)
+        results.append(result)
+        print('%-50s %8.1fms  min %8.1fms  rss %8dKiB  modules %5d  numpy %s' % (
+            name, result['time']['median']*1e3, result['time']['min']*1e3,
+            result['maxRSS'], result['modules'], result['numpy']
+        ))
+    return results
+
+def getMetadata(root):
+    return {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'root': root
+    }
+
+# loadResults / compare
+    # Description:
+        # Same as in 'run.py', keyed by scenario name: median time and
+        # peak RSS of every scenario next to those of a saved run.
+def loadResults(path):
+    with open(path) as results_file:
+        return dict((result['name'], result) for result in json.load(results_file)['results'])
+
+def compare(results, baseline):
+    print('\n%-50s %10s %10s %12s %12s' % ('scenario', 'old ms', 'new ms', 'old RSS KiB', 'new RSS KiB'))
+    for result in results:
+        old = baseline.get(result['name'])
+        if old is None:
+            continue
+        print('%-50s %10.1f %10.1f %12d %12d' % (
+            result['name'], old['time']['median']*1e3, result['time']['median']*1e3, old['maxRSS'], result['maxRSS']
+        ))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the import time and memory of the RSSI package.')
+    parser.add_argument('-o', '--output', default='startup_results.json', help='JSON file to write')
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='directory holding the rssi package (the working tree)')
+    parser.add_argument('--runs', type=int, default=20, help='runs per scenario')
+    parser.add_argument('--compare', help='saved JSON results to compare against')
+    args = parser.parse_args(argv)
+    baseline = loadResults(args.compare) if args.compare else None
+    root = os.path.abspath(args.root)
+    results = run(root, args.runs)
+    with open(args.output, 'w') as output_file:
+        json.dump({'meta': getMetadata(root), 'results': results}, output_file, indent=2, sort_keys=True)
+    print('\nSaved %d results to %s' % (len(results), args.output))
+    if baseline is not None:
+        compare(results, baseline)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import numpy # Used to draw the synthetic layouts and signals
+
+# Synthetic inputs for the benchmarks
+    # Description:
+        # Deterministic (seeded) generators for 'iwlist' output, access
+        # point layouts and RSSI sets, so every benchmark runs offline and
+        # two runs see exactly the same inputs.
+
+SSIDS = ['ucrwpa', 'eduroam', 'dd-wrt', 'NETGEAR-5G', 'Guest Wifi', 'My Cell "net"', '']
+RATES = 'Bit Rates:1 Mb/s; 2 Mb/s; 5.5 Mb/s; 11 Mb/s; 6 Mb/s; 9 Mb/s; 12 Mb/s; 18 Mb/s'
+
+# makeMac
+    # Description:
+        # BSSID string of an integer id.
+    # -----------------------------------------------
+    # 1 -> 'A0:3D:6F:00:00:01'
+def makeMac(i):
+    return 'A0:3D:6F:%02X:%02X:%02X' % ((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+
+# makeIwlistOutput
+    # Description:
+        # 'iwlist <interface> scan' output with 'cells' cells, including
+        # the fields real drivers print around the ones the parser reads
+        # (channel, frequency, encryption, bit rates, IE lines, ...).
+    # -----------------------------------------------
+    # Input:
+        # cells = number of cells (10)
+        # seed = random seed (0)
+        # interface = interface name printed in the header ('wlan0')
+    # -----------------------------------------------
+    # Returns: (str) raw scan output
+def makeIwlistOutput(cells=10, seed=0, interface='wlan0'):
+    random = numpy.random.RandomState(seed)
+    lines = ['%-10sScan completed :' % interface]
+    for i in range(cells):
+        signal = int(random.randint(-95, -30))
+        channel = int(random.randint(1, 12))
+        lines.extend([
+            '          Cell %02d - Address: %s' % (i+1, makeMac(i)),
+            '                    Channel:%d' % channel,
+            '                    Frequency:%.3f GHz (Channel %d)' % (2.407+0.005*channel, channel),
+            '                    Quality=%d/70  Signal level=%d dBm  ' % (min(signal+110, 70), signal),
+            '                    Encryption key:on',
+            '                    ESSID:"%s"' % SSIDS[i % len(SSIDS)],
+            '                    ' + RATES,
+            '                    Mode:Master',
+            '                    Extra:tsf=000000%010x' % random.randint(0, 2**31),
+            '                    Extra: Last beacon: %dms ago' % random.randint(0, 5000),
+            '                    IE: IEEE 802.11i/WPA2 Version 1',
+            '                        Group Cipher : CCMP',
+            '                        Pairwise Ciphers (1) : CCMP',
+            '                        Authentication Suites (1) : PSK',
+        ])
+    return '\n'.join(lines) + '\n'
+
+# makeAccessPoints
+    # Description:
+        # 'count' access points (see 'RSSI_Localizer') spread uniformly
+        # over an 'area' x 'area' square, each with a 'mac'.
+    # -----------------------------------------------
+    # Returns: (Array of dictionaries)
+def makeAccessPoints(count, seed=0, area=100.0):
+    random = numpy.random.RandomState(seed)
+    locations = random.uniform(0, area, (count, 2))
+    return [{
+        'mac': makeMac(i),
+        'signalAttenuation': float(random.uniform(2.0, 4.0)),
+        'location': {'x': float(locations[i, 0]), 'y': float(locations[i, 1])},
+        'reference': {'distance': 1.0, 'signal': float(random.uniform(-45, -35))}
+    } for i in range(count)]
+
+# makeSignals
+    # Description:
+        # 'n' RSSI sets for random positions inside the layout, drawn from
+        # the log-distance model of each access point with gaussian noise.
+    # -----------------------------------------------
+    # Input:
+        # accessPoints = see 'makeAccessPoints'
+        # n = number of RSSI sets
+        # noise = standard deviation of the signal noise in dB (2.0)
+    # -----------------------------------------------
+    # Returns: positions (n, 2), signals (n, count) numpy arrays
+def makeSignals(accessPoints, n, seed=0, noise=2.0, area=100.0):
+    random = numpy.random.RandomState(seed)
+    apX = numpy.array([ap['location']['x'] for ap in accessPoints])
+    apY = numpy.array([ap['location']['y'] for ap in accessPoints])
+    refSignal = numpy.array([ap['reference']['signal'] for ap in accessPoints])
+    refDistance = numpy.array([ap['reference']['distance'] for ap in accessPoints])
+    attenuation = numpy.array([ap['signalAttenuation'] for ap in accessPoints])
+    positions = random.uniform(0, area, (n, 2))
+    distances = numpy.hypot(positions[:, :1]-apX, positions[:, 1:]-apY)
+    distances = numpy.maximum(distances, 0.1)
+    signals = refSignal-10*attenuation*numpy.log10(distances/refDistance)
+    return positions, signals+random.normal(0, noise, signals.shape)
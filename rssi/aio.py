@@ -0,0 +1,156 @@
+import asyncio # Used to run the scan command without blocking the event loop
+from asyncio.subprocess import PIPE
+from threading import Event, get_ident # Used to share the scan cache with blocking callers
+from time import time # Used to timestamp cached scans
+
+from .scan import RSSI_Scan
+from .instrumentation import clock
+
+# RSSI_AsyncScan
+    # Use:
+        # from rssi.aio import RSSI_AsyncScan
+        # rssi_scan_instance = RSSI_AsyncScan('network_interface_name')
+        # ap_info = await rssi_scan_instance.getAPinfoAsync(networks=ssids)
+    # -------------------------------------------------------
+    # Description:
+        # asyncio counterpart of 'RSSI_Scan' (Python 3 only).
+        # The scan command runs as an asyncio subprocess, so one event
+        # loop can drive scans on several interfaces at once while it
+        # keeps serving other work. All of the blocking 'RSSI_Scan'
+        # methods are still available, and the parsing/filtering is the
+        # same one 'getAPinfo' uses (see 'parseNetworkScan').
+    # -------------------------------------------------------
+    # Input: interface name
+        # [ie. network interface names: wlp1s0m, docker0, wlan0]
+class RSSI_AsyncScan(RSSI_Scan):
+    def __init__(self, *args, **kwargs):
+        RSSI_Scan.__init__(self, *args, **kwargs)
+        # Asynchronous scan currently filling the cache, as
+        # (event loop, thread id, future). 'cacheInflight' is set too.
+        self.cacheFuture = None
+
+    # getRawNetworkScanAsync
+        # Description:
+            # Awaitable version of 'getRawNetworkScan'.
+        # ----------------------------------------------------------------
+        # Input: (optional)
+            #   sudo: bool; defaults to false. (see 'getRawNetworkScan')
+        # ----------------------------------------------------------------
+        # Returns: Raw terminal output
+            # {
+            #     'output':b'''wlp1s0    Scan completed : ...''',
+            #     'error':b''
+            # }
+    async def getRawNetworkScanAsync(self, sudo=False):
+        if self.instrumentation is not None:
+            start = clock()
+        scan_process = await asyncio.create_subprocess_exec(
+            *self.getScanCommand(sudo), stdout=PIPE, stderr=PIPE
+        )
+        # Yields to the event loop until the scanning completes.
+        (raw_output, raw_error) = await scan_process.communicate()
+        if self.instrumentation is not None:
+            self.instrumentation.addTime('scan.subprocess', clock()-start)
+        return {'output':raw_output,'error':raw_error}
+
+    # getAPinfoAsync
+        # Description:
+            # Awaitable version of 'getAPinfo'. Takes the same 'networks',
+            # 'sudo' and 'macs' parameters and returns the same result.
+        # -----------------------------------------------
+        # Input:
+            # networks = (array of network names)
+            # ['ucrwpa','dd-wrt']
+            # sudo = True || False
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries) or False (see 'getAPinfo')
+    async def getAPinfoAsync(self, networks=False, sudo=False, macs=False):
+        if self.cacheTTL is not None:
+            access_points = await self.getCachedAccessPointsAsync(sudo)
+            return self.selectAccessPoints(access_points, networks, macs)
+        if self.backend is not None:
+            access_points = await self.scanAccessPointsAsync(sudo)
+            return self.selectAccessPoints(access_points, networks, macs)
+        raw_scan_output = (await self.getRawNetworkScanAsync(sudo))['output']
+        return self.parseNetworkScan(raw_scan_output, networks, macs)
+
+    # scanAccessPointsAsync
+        # Description:
+            # Awaitable version of 'scanAccessPoints'. Scan backends are
+            # blocking, so they run in the event loop's default executor.
+        # -----------------------------------------------
+        # Input: sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    async def scanAccessPointsAsync(self, sudo=False):
+        if self.backend is not None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self.scanAccessPoints, sudo)
+        raw_scan_output = (await self.getRawNetworkScanAsync(sudo))['output']
+        return self.parseNetworkScan(raw_scan_output) or []
+
+    # getCachedAccessPointsAsync
+        # Description:
+            # Awaitable version of 'getCachedAccessPoints'. Shares the cache
+            # (see 'enableCache') and its in-flight scan with the blocking
+            # methods: coroutines and threads that arrive while a scan is
+            # running, from either side, wait for that same scan. A scan
+            # run by a thread is awaited in the loop's default executor.
+            # The scan outlives a cancelled caller and keeps serving the
+            # others.
+        # -----------------------------------------------
+        # Input: sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    async def getCachedAccessPointsAsync(self, sudo=False):
+        loop = asyncio.get_event_loop()
+        while True:
+            with self.cacheLock:
+                if self.isCacheFresh(sudo):
+                    return self.cache[2]
+                inflight = self.cacheInflight
+                owner = inflight is None
+                if owner:
+                    inflight = self.cacheInflight = Event()
+                    scan = asyncio.ensure_future(self.scanIntoCache(sudo))
+                    self.cacheFuture = (loop, get_ident(), scan)
+                    scan.add_done_callback(lambda _, inflight=inflight: self.finishCachedScan(inflight))
+                running = self.cacheFuture
+            if owner:
+                return await asyncio.shield(scan)
+            if running is not None and running[0] is loop:
+                # Errors are handled by the coroutine that owns the scan.
+                await asyncio.wait([running[2]])
+            else:
+                await loop.run_in_executor(None, inflight.wait)
+
+    # finishCachedScan
+        # Description:
+            # Done callback of an asynchronous cache scan, releases its
+            # waiters whether it succeeded, failed or was cancelled.
+    def finishCachedScan(self, inflight):
+        with self.cacheLock:
+            self.cacheInflight = None
+            self.cacheFuture = None
+        inflight.set()
+
+    # waitForCachedScan
+        # Description:
+            # See 'RSSI_Scan.waitForCachedScan'. A blocking call made from
+            # the thread running the asynchronous scan's event loop cannot
+            # wait for it (the loop would never get to finish the scan).
+    def waitForCachedScan(self, inflight):
+        running = self.cacheFuture
+        if running is not None and running[1] == get_ident():
+            return False
+        inflight.wait()
+        return True
+
+    # scanIntoCache
+        # Description:
+            # Runs one asynchronous scan and stores it in the cache.
+    async def scanIntoCache(self, sudo=False):
+        access_points = await self.scanAccessPointsAsync(sudo)
+        with self.cacheLock:
+            self.cache = (time(), sudo, access_points)
+        return access_points
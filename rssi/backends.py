@@ -0,0 +1,262 @@
+import socket # Used for the nl80211 netlink socket
+import struct # Used to pack/unpack netlink messages
+from subprocess import Popen, PIPE # Used to run 'iw'
+from sys import version_info # Used to check the Python-interpreter version at runtime
+
+# Scan backends
+    # Use:
+        # from rssi import RSSI_Scan
+        # from rssi.backends import RSSI_NetlinkBackend
+        # rssi_scan_instance = RSSI_Scan('wlan0', backend=RSSI_NetlinkBackend())
+    # -------------------------------------------------------
+    # Description:
+        # A scan backend replaces the 'iwlist' subprocess of
+        # 'RSSI_Scan.getAPinfo'. Backends return the same access point
+        # dictionaries as 'RSSI_Scan.parseCell', so filtering, caching and
+        # everything built on 'getAPinfo' work unchanged:
+        # {
+        #     'ssid':'ucrwpa',
+        #     'quality':'43/70',
+        #     'signal':-67,
+        #     'mac':'A0:3D:6F:26:77:8E'
+        # }
+        # 'iwlist' remains the default when no backend is given.
+
+# signalToQuality
+    # Description:
+        # Quality string for a signal level, computed the way 'iwlist'
+        # does for most drivers (signal+110, out of 70).
+    # -----------------------------------------------
+    # -67 -> '43/70'
+def signalToQuality(signal):
+    return '%d/70' % min(max(int(signal)+110, 0), 70)
+
+# RSSI_ScanBackend
+    # Description:
+        # Interface every scan backend implements.
+class RSSI_ScanBackend(object):
+
+    # getAccessPoints
+        # Description:
+            # Every access point seen on 'interface'.
+        # -----------------------------------------------
+        # Input:
+            # interface = 'wlan0'
+            # sudo = True || False (see 'RSSI_Scan.getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    def getAccessPoints(self, interface, sudo=False):
+        raise NotImplementedError
+
+# RSSI_IwBackend
+    # Description:
+        # Reads scan results with 'iw dev <interface> scan dump', which
+        # returns the kernel's cached results without triggering a new
+        # scan. With sudo=True, 'sudo iw dev <interface> scan' is run
+        # instead, which triggers a fresh scan.
+class RSSI_IwBackend(RSSI_ScanBackend):
+
+    @staticmethod
+    def getScanCommand(interface, sudo=False):
+        if sudo:
+            return ['sudo','iw','dev',interface,'scan']
+        return ['iw','dev',interface,'scan','dump']
+
+    def getAccessPoints(self, interface, sudo=False):
+        scan_process = Popen(self.getScanCommand(interface, sudo), stdout=PIPE, stderr=PIPE)
+        try:
+            return list(self.iterCells(scan_process.stdout))
+        finally:
+            scan_process.stdout.close()
+            scan_process.stderr.close()
+            scan_process.wait()
+
+    # iterCells
+        # Description:
+            # Single-pass parser for 'iw' scan output.
+        # -----------------------------------------------
+        # Input: (Iterable of raw lines, str or bytes)
+            # ['BSS a0:3d:6f:26:77:8e(on wlan0) -- associated',
+            #  '\tsignal: -67.00 dBm',
+            #  '\tSSID: ucrwpa']
+        # -----------------------------------------------
+        # Yields: (dictionary per access point)
+    @staticmethod
+    def iterCells(lines):
+        cell = None
+        for line in lines:
+            if version_info.major == 3 and isinstance(line, bytes):
+                line = line.decode('utf-8', 'replace')
+            if line.startswith('BSS '):
+                if cell is not None:
+                    yield cell
+                mac = line[4:].split('(', 1)[0].split()[0]
+                cell = {'ssid': '', 'quality': '', 'signal': None, 'mac': mac.upper()}
+                continue
+            if cell is None:
+                continue
+            line = line.strip()
+            if line.startswith('signal:'):
+                signal = float(line[7:].split()[0])
+                cell['signal'] = int(round(signal))
+                cell['quality'] = signalToQuality(signal)
+            elif line.startswith('SSID:'):
+                cell['ssid'] = line[6:]
+        if cell is not None:
+            yield cell
+
+# Netlink and nl80211 constants (linux/netlink.h, linux/genetlink.h,
+# linux/nl80211.h).
+NETLINK_GENERIC = 16
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 0x2
+NLMSG_DONE = 0x3
+NLA_TYPE_MASK = 0x3fff
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+NL80211_CMD_GET_SCAN = 32
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_BSS = 47
+NL80211_BSS_BSSID = 1
+NL80211_BSS_INFORMATION_ELEMENTS = 6
+NL80211_BSS_SIGNAL_MBM = 7
+NL80211_BSS_SIGNAL_UNSPEC = 8
+NL80211_BSS_BEACON_IES = 11
+
+# packAttribute / parseAttributes
+    # Description:
+        # Netlink attribute (TLV, 4-byte aligned) encoding and decoding.
+        # 'parseAttributes' returns a dictionary of type -> raw payload.
+def packAttribute(attribute_type, payload):
+    length = 4+len(payload)
+    return struct.pack('=HH', length, attribute_type)+payload+(b'\0'*((4-length % 4) % 4))
+
+def parseAttributes(data):
+    attributes = {}
+    offset = 0
+    while offset+4 <= len(data):
+        length, attribute_type = struct.unpack_from('=HH', data, offset)
+        if length < 4:
+            break
+        attributes[attribute_type & NLA_TYPE_MASK] = data[offset+4:offset+length]
+        offset += (length+3) & ~3
+    return attributes
+
+# getSSIDFromIEs
+    # Description:
+        # SSID element (id 0) of 802.11 information elements.
+def getSSIDFromIEs(ies):
+    offset = 0
+    while offset+2 <= len(ies):
+        element_id = bytearray(ies[offset:offset+1])[0]
+        length = bytearray(ies[offset+1:offset+2])[0]
+        if element_id == 0:
+            return ies[offset+2:offset+2+length].decode('utf-8', 'replace')
+        offset += 2+length
+    return ''
+
+# RSSI_NetlinkBackend
+    # Description:
+        # Reads the kernel's cached scan results straight from nl80211
+        # over a generic netlink socket (NL80211_CMD_GET_SCAN dump), with
+        # no subprocess and no text parsing. 'sudo' is ignored: results
+        # are refreshed by the kernel's own (or any other tool's) scans.
+        # 'socketFactory' builds the socket; it defaults to a bound
+        # AF_NETLINK/NETLINK_GENERIC socket and can be swapped for one
+        # end of a socketpair to test against a mock responder.
+    # -------------------------------------------------------
+    # Input: (optional) socketFactory, timeout in seconds (5.0)
+class RSSI_NetlinkBackend(RSSI_ScanBackend):
+    def __init__(self, socketFactory=None, timeout=5.0):
+        self.socketFactory = socketFactory or self.openNetlinkSocket
+        self.timeout = timeout
+        self.familyId = None
+        self.sequence = 0
+
+    @staticmethod
+    def openNetlinkSocket():
+        netlink_socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+        netlink_socket.bind((0, 0))
+        return netlink_socket
+
+    # request
+        # Description:
+            # Sends one generic netlink request and collects the payloads
+            # (after the genetlink header) of every reply, until the end
+            # of the dump (or the first reply when not dumping).
+            # Netlink errors are raised as OSError.
+        # -----------------------------------------------
+        # Returns: (Array of attribute dictionaries, see 'parseAttributes')
+    def request(self, netlink_socket, family, command, attributes, dump=False):
+        self.sequence += 1
+        flags = NLM_F_REQUEST | (NLM_F_DUMP if dump else 0)
+        payload = struct.pack('=BBH', command, 1, 0)+attributes
+        netlink_socket.send(struct.pack('=IHHII', 16+len(payload), family, flags, self.sequence, 0)+payload)
+        replies = []
+        while True:
+            data = netlink_socket.recv(65536)
+            offset = 0
+            while offset+16 <= len(data):
+                length, message_type, message_flags, sequence, pid = struct.unpack_from('=IHHII', data, offset)
+                if length < 16:
+                    return replies
+                body = data[offset+16:offset+length]
+                offset += (length+3) & ~3
+                if message_type == NLMSG_DONE:
+                    return replies
+                if message_type == NLMSG_ERROR:
+                    error = struct.unpack_from('=i', body)[0]
+                    if error:
+                        raise OSError(-error, "netlink request failed")
+                    return replies
+                replies.append(parseAttributes(body[4:]))
+                if not dump:
+                    return replies
+
+    # getFamilyId
+        # Description:
+            # Resolves (and remembers) the generic netlink id of 'nl80211'.
+    def getFamilyId(self, netlink_socket):
+        if self.familyId is None:
+            replies = self.request(
+                netlink_socket, GENL_ID_CTRL, CTRL_CMD_GETFAMILY,
+                packAttribute(CTRL_ATTR_FAMILY_NAME, b'nl80211\0')
+            )
+            self.familyId = struct.unpack('=H', replies[0][CTRL_ATTR_FAMILY_ID][:2])[0]
+        return self.familyId
+
+    # parseBSS
+        # Description:
+            # Access point dictionary of one NL80211_ATTR_BSS attribute.
+    @staticmethod
+    def parseBSS(bss):
+        mac = ':'.join('%02X' % byte for byte in bytearray(bss.get(NL80211_BSS_BSSID, b'')))
+        ies = bss.get(NL80211_BSS_INFORMATION_ELEMENTS) or bss.get(NL80211_BSS_BEACON_IES, b'')
+        cell = {'ssid': getSSIDFromIEs(ies), 'quality': '', 'signal': None, 'mac': mac}
+        if NL80211_BSS_SIGNAL_MBM in bss:
+            signal = struct.unpack('=i', bss[NL80211_BSS_SIGNAL_MBM][:4])[0]/100.0
+            cell['signal'] = int(round(signal))
+            cell['quality'] = signalToQuality(signal)
+        elif NL80211_BSS_SIGNAL_UNSPEC in bss:
+            cell['quality'] = '%d/100' % bytearray(bss[NL80211_BSS_SIGNAL_UNSPEC][:1])[0]
+        return cell
+
+    def getAccessPoints(self, interface, sudo=False):
+        netlink_socket = self.socketFactory()
+        try:
+            netlink_socket.settimeout(self.timeout)
+            family = self.getFamilyId(netlink_socket)
+            index = struct.pack('=I', socket.if_nametoindex(interface))
+            replies = self.request(
+                netlink_socket, family, NL80211_CMD_GET_SCAN,
+                packAttribute(NL80211_ATTR_IFINDEX, index), dump=True
+            )
+        finally:
+            netlink_socket.close()
+        return [
+            self.parseBSS(parseAttributes(reply[NL80211_ATTR_BSS]))
+            for reply in replies if NL80211_ATTR_BSS in reply
+        ]
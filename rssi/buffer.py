@@ -0,0 +1,134 @@
+import numpy # Used for the ring buffer's structured array
+from threading import Lock # Used to share the buffer between the scan thread and readers
+from time import time # Used to timestamp scan samples
+
+from .scan import RSSI_Scan
+
+# RSSI_ScanBuffer
+    # Use:
+        # from rssi import RSSI_ScanBuffer
+        # scan_buffer = RSSI_ScanBuffer(capacity=4096)
+    # -------------------------------------------------------
+    # Description:
+        # Fixed-size ring buffer of timestamped scan samples, backed by a
+        # single numpy structured array. Every sample is written twice
+        # (at 'i' and 'i+capacity'), so the most recent samples are always
+        # one contiguous slice and can be handed out as zero-copy views.
+        # Views share memory with the buffer: copy them if they must
+        # outlive the next 'capacity' appends.
+        # Each sample holds:
+        #   timestamp: float64, seconds since the epoch
+        #   mac:       uint64, MAC address as an integer (see 'macToInt')
+        #   signal:    float32, dBm
+        #   quality:   float32, quality ratio ('43/70' -> 0.614...)
+    # -------------------------------------------------------
+    # Input: capacity (max number of samples kept)
+class RSSI_ScanBuffer(object):
+    dtype = numpy.dtype([
+        ('timestamp', numpy.float64),
+        ('mac', numpy.uint64),
+        ('signal', numpy.float32),
+        ('quality', numpy.float32)
+    ])
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.samples = numpy.zeros(2*self.capacity, dtype=self.dtype)
+        # Total number of samples ever appended.
+        self.written = 0
+        self.lock = Lock()
+
+    # macToInt / intToMac
+        # Description:
+            # Converts a MAC address between its string and integer forms.
+        # -----------------------------------------------
+        # 'A0:3D:6F:26:77:8E' <-> 176168963422094
+    @staticmethod
+    def macToInt(mac):
+        return int(mac.replace(':', ''), 16)
+
+    @staticmethod
+    def intToMac(value):
+        digits = '%012X' % int(value)
+        return ':'.join(digits[i:i+2] for i in range(0, 12, 2))
+
+    # qualityToRatio
+        # Description:
+            # Same as 'RSSI_Scan.qualityToRatio'.
+        # -----------------------------------------------
+        # '43/70' -> 0.6142857
+    @staticmethod
+    def qualityToRatio(quality):
+        return RSSI_Scan.qualityToRatio(quality)
+
+    # toSamples
+        # Description:
+            # Converts one scan worth of parsed cells into samples, all
+            # stamped with the same timestamp. Cells without a MAC or a
+            # signal level are skipped.
+        # -----------------------------------------------
+        # Input:
+            # cells = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+            # timestamp = 1586563200.0 (defaults to now)
+        # -----------------------------------------------
+        # Returns: numpy structured array of 'RSSI_ScanBuffer.dtype'
+    @classmethod
+    def toSamples(cls, cells, timestamp=None):
+        if timestamp is None:
+            timestamp = time()
+        cells = [cell for cell in cells if cell['mac'] and cell['signal'] is not None]
+        rows = numpy.empty(len(cells), dtype=cls.dtype)
+        rows['timestamp'] = timestamp
+        rows['mac'] = [cls.macToInt(cell['mac']) for cell in cells]
+        rows['signal'] = [cell['signal'] for cell in cells]
+        rows['quality'] = [cls.qualityToRatio(cell['quality']) for cell in cells]
+        return rows
+
+    # append
+        # Description:
+            # Adds one scan worth of parsed cells (see 'RSSI_Scan.getAPinfo'),
+            # all stamped with the same timestamp.
+        # -----------------------------------------------
+        # Input:
+            # cells = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+            # timestamp = 1586563200.0 (defaults to now)
+        # -----------------------------------------------
+        # Returns: None
+    def append(self, cells, timestamp=None):
+        rows = self.toSamples(cells, timestamp)[-self.capacity:]
+        count = len(rows)
+        if count == 0:
+            return
+        with self.lock:
+            index = (self.written+numpy.arange(count)) % self.capacity
+            self.samples[index] = rows
+            self.samples[index+self.capacity] = rows
+            self.written += count
+
+    # view
+        # Description:
+            # Zero-copy view of every sample held, oldest first.
+        # -----------------------------------------------
+        # Returns: numpy structured array (len <= capacity)
+    def view(self):
+        with self.lock:
+            size = min(self.written, self.capacity)
+            end = (self.written % self.capacity)+self.capacity
+            return self.samples[end-size:end]
+
+    # getLast
+        # Description:
+            # Zero-copy view of the samples taken in the last 'seconds'
+            # seconds, oldest first.
+        # -----------------------------------------------
+        # Input:
+            # seconds = 10
+            # now = reference time (defaults to now)
+        # -----------------------------------------------
+        # Returns: numpy structured array
+    def getLast(self, seconds, now=None):
+        if now is None:
+            now = time()
+        samples = self.view()
+        start = numpy.searchsorted(samples['timestamp'], now-seconds, side='left')
+        return samples[start:]
@@ -0,0 +1,162 @@
+import numpy # Used for the grouped regression sums
+
+from .localize import RSSI_Localizer
+
+# RSSI_Calibrator
+    # Use:
+        # from rssi.calibration import RSSI_Calibrator
+        # calibrator = RSSI_Calibrator(accessPoints)
+        # for positions, signals in survey_chunks:
+        #     calibrator.addSamples(positions, signals)
+        # accessPoints, residuals = calibrator.fit()
+        # localizer = RSSI_Localizer(accessPoints)
+    # -------------------------------------------------------
+    # Description:
+        # Fits the log-distance path-loss model of every access point
+        # from surveyed (known position, observed signal) samples:
+        #   signal = s0 - 10*n*log10(d/d0)
+        # which is a straight line in log10(d/d0). For each access point,
+        # the intercept is the reference signal s0 at the reference
+        # distance d0 and the slope gives the attenuation n.
+        # Samples are reduced to per-AP regression sums as they arrive
+        # (one numpy.bincount per sum), so surveys of any size can be
+        # streamed in chunks and the fit itself is O(count).
+    # -------------------------------------------------------
+    # Input:
+        # accessPoints: see 'RSSI_Localizer'. Only 'location' is needed.
+        #               If any of them has a 'z', distances are measured
+        #               in 3D and positions have 3 columns (see
+        #               'RSSI_Localizer.getDimensions').
+        # referenceDistance: d0 of the fitted model (1.0)
+        # minDistance: distances below this are clipped (0.1), so samples
+        #              taken right at an access point stay finite
+class RSSI_Calibrator(object):
+    sums = ('n', 'l', 'll', 's', 'sl', 'ss')
+
+    def __init__(self, accessPoints, referenceDistance=1.0, minDistance=0.1):
+        self.accessPoints = accessPoints
+        self.count = len(accessPoints)
+        self.referenceDistance = referenceDistance
+        self.minDistance = minDistance
+        self.apX = numpy.array([ap['location']['x'] for ap in accessPoints], dtype=numpy.float64)
+        self.apY = numpy.array([ap['location']['y'] for ap in accessPoints], dtype=numpy.float64)
+        self.apZ = numpy.array([ap['location'].get('z', 0.0) for ap in accessPoints], dtype=numpy.float64)
+        self.dimensions = RSSI_Localizer.getDimensions(accessPoints)
+        self.apCoordinates = (self.apX, self.apY, self.apZ)[:self.dimensions]
+        self.totals = dict((name, numpy.zeros(self.count)) for name in self.sums)
+
+    # addObservations
+        # Description:
+            # Adds samples in long form: one row per (position, access
+            # point, signal). Rows with a NaN signal are ignored.
+        # -----------------------------------------------
+        # Input:
+            # positions: (M, dimensions) array-like of known positions
+            # apIndexes: (M,) access point index of each row
+            # signals: (M,) observed signal levels (dBm)
+    def addObservations(self, positions, apIndexes, signals):
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, self.dimensions)
+        apIndexes = numpy.asarray(apIndexes, dtype=numpy.int64)
+        signals = numpy.asarray(signals, dtype=numpy.float64)
+        keep = ~numpy.isnan(signals)
+        positions, apIndexes, signals = positions[keep], apIndexes[keep], signals[keep]
+        distances = numpy.sqrt(sum(
+            (positions[:, axis]-coordinates[apIndexes])**2
+            for axis, coordinates in enumerate(self.apCoordinates)
+        ))
+        logs = numpy.log10(numpy.maximum(distances, self.minDistance)/self.referenceDistance)
+        terms = {
+            'n': None,
+            'l': logs,
+            'll': logs*logs,
+            's': signals,
+            'sl': signals*logs,
+            'ss': signals*signals
+        }
+        for name in self.sums:
+            self.totals[name] += numpy.bincount(apIndexes, weights=terms[name], minlength=self.count)
+
+    # addSamples
+        # Description:
+            # Adds samples as signal vectors in access point order (NaN for
+            # access points not heard), as returned by
+            # 'RSSI_Localizer.getSignalVector'.
+        # -----------------------------------------------
+        # Input:
+            # positions: (M, dimensions) array-like of known positions
+            # signals: (M, count) array-like of observed signal levels
+    def addSamples(self, positions, signals):
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, self.dimensions)
+        signals = numpy.asarray(signals, dtype=numpy.float64).reshape(-1, self.count)
+        samples = positions.shape[0]
+        self.addObservations(
+            numpy.repeat(positions, self.count, axis=0),
+            numpy.tile(numpy.arange(self.count), samples),
+            signals.ravel()
+        )
+
+    # fit
+        # Description:
+            # Solves the per-AP regressions from the accumulated sums.
+            # Access points with fewer than 3 samples, or whose samples
+            # were all taken at the same distance, keep their current
+            # 'reference' and 'signalAttenuation' (if any) and get a NaN
+            # fit in the residuals.
+        # -----------------------------------------------
+        # Returns:
+            # accessPoints: copies of the input access points with the
+            #   fitted 'reference' and 'signalAttenuation', ready for
+            #   'RSSI_Localizer'.
+            # residuals: dictionary of (count,) numpy arrays
+            #   {
+            #       'count': samples used,
+            #       'referenceSignal': fitted s0,
+            #       'attenuation': fitted n,
+            #       'rmse': root mean square residual (dB)
+            #   }
+    def fit(self):
+        t = self.totals
+        n = t['n']
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            spread = (n*t['ll'])-(t['l']**2)
+            slope = ((n*t['sl'])-(t['l']*t['s']))/spread
+            intercept = (t['s']-(slope*t['l']))/n
+            sse = (t['ss']-(2*intercept*t['s'])-(2*slope*t['sl'])
+                   +(intercept**2)*n+(2*intercept*slope*t['l'])+(slope**2)*t['ll'])
+            rmse = numpy.sqrt(numpy.maximum(sse, 0.0)/n)
+        valid = (n >= 3) & (spread > 1e-12*numpy.maximum(n, 1)**2)
+        attenuation = numpy.where(valid, -slope/10, numpy.nan)
+        intercept = numpy.where(valid, intercept, numpy.nan)
+        rmse = numpy.where(valid, rmse, numpy.nan)
+        accessPoints = []
+        for i, accessPoint in enumerate(self.accessPoints):
+            accessPoint = dict(accessPoint)
+            if valid[i]:
+                accessPoint['signalAttenuation'] = float(attenuation[i])
+                accessPoint['reference'] = {
+                    'distance': self.referenceDistance,
+                    'signal': float(intercept[i])
+                }
+            accessPoints.append(accessPoint)
+        residuals = {
+            'count': n.astype(numpy.int64),
+            'referenceSignal': intercept,
+            'attenuation': attenuation,
+            'rmse': rmse
+        }
+        return accessPoints, residuals
+
+    # getLocalizer
+        # Description:
+            # Fits and builds an 'RSSI_Localizer' from the result. Raises
+            # ValueError if an access point could neither be fitted nor
+            # had a model to begin with.
+    def getLocalizer(self):
+        accessPoints = self.fit()[0]
+        missing = [
+            i for i, accessPoint in enumerate(accessPoints)
+            if 'reference' not in accessPoint or 'signalAttenuation' not in accessPoint
+        ]
+        if missing:
+            raise ValueError("No path-loss model for access points " + str(missing))
+        return RSSI_Localizer(accessPoints)
@@ -0,0 +1,160 @@
+import socket # Used to talk to the localization server
+import struct # Used for the binary protocol
+from collections import deque # Used to match responses with pending requests
+
+# Wire protocol of 'rssi.server'
+    # Description:
+        # Every message, in both directions, is a frame: a little-endian
+        # u32 payload length followed by the payload.
+        #   hello    (server -> client, once on connect):
+        #            'RSSI', u8 version, u8 dimensions, u32 count
+        #   request  (client -> server):
+        #            u32 request id, count x f32 signals (localizer order,
+        #            NaN for access points not heard)
+        #   response (server -> client):
+        #            u32 request id, u8 status, and on STATUS_OK
+        #            dimensions x f64 position
+        # Requests are answered in the order they were received on a
+        # connection (malformed ones included), so several can be sent
+        # before reading the replies. The server closes connections that
+        # send a frame longer than a request.
+        # This module only uses the standard library, so clients don't
+        # need numpy.
+PROTOCOL_VERSION = 1
+HELLO = struct.Struct('<4sBBI')
+FRAME = struct.Struct('<I')
+REQUEST = struct.Struct('<I')
+RESPONSE = struct.Struct('<IB')
+STATUS_OK = 0
+STATUS_BAD_REQUEST = 1
+STATUS_ERROR = 2
+
+# receiveExactly
+    # Description:
+        # Reads exactly 'size' bytes, or raises EOFError if the peer
+        # closed the connection first.
+def receiveExactly(connection, size):
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(size)
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def sendFrame(connection, payload):
+    connection.sendall(FRAME.pack(len(payload))+payload)
+
+# receiveFrame
+    # Description:
+        # Reads one frame. With 'maxSize', a longer frame raises
+        # ValueError before its payload is read (the stream can't be used
+        # after that).
+def receiveFrame(connection, maxSize=None):
+    size = FRAME.unpack(receiveExactly(connection, FRAME.size))[0]
+    if maxSize is not None and size > maxSize:
+        raise ValueError("Frame of %d bytes is longer than %d" % (size, maxSize))
+    return receiveExactly(connection, size)
+
+# RSSI_LocalizationClient
+    # Use:
+        # from rssi.client import RSSI_LocalizationClient
+        # with RSSI_LocalizationClient('/run/rssi.sock') as client:
+        #     x, y = client.getNodePosition([-67, -54, -80])
+    # -------------------------------------------------------
+    # Description:
+        # Client of 'rssi.server.RSSI_LocalizationServer'. 'count' and
+        # 'dimensions' of the server's localizer are read from its hello
+        # frame. A client is one connection; use one per thread.
+    # -------------------------------------------------------
+    # Input: path of the server's Unix domain socket, timeout (None)
+class RSSI_LocalizationClient(object):
+    def __init__(self, path, timeout=None):
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.settimeout(timeout)
+        self.connection.connect(path)
+        magic, version, self.dimensions, self.count = HELLO.unpack(receiveFrame(self.connection))
+        if magic != b'RSSI' or version != PROTOCOL_VERSION:
+            self.connection.close()
+            raise ValueError("Not an RSSI localization server: " + path)
+        self.requestId = 0
+        # Ids of the requests sent and not answered yet, oldest first.
+        self.pending = deque()
+        self.signalFormat = struct.Struct('<%df' % self.count)
+        self.positionFormat = struct.Struct('<%dd' % self.dimensions)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # sendRequest / receiveResponse
+        # Description:
+            # The two halves of a request, to pipeline several requests
+            # on one connection. 'receiveResponse' reads the response to
+            # the oldest pending request. It raises ValueError if the
+            # server rejected the request, RuntimeError if the solve
+            # failed, and IOError if the response is for another request.
+        # -----------------------------------------------
+        # Returns: request id / (request id, position tuple)
+    def sendRequest(self, signalStrengths):
+        self.requestId = (self.requestId+1) & 0xffffffff
+        signals = [float('nan') if signal is None else signal for signal in signalStrengths]
+        if len(signals) != self.count:
+            raise ValueError("Expected %d signals, got %d" % (self.count, len(signals)))
+        sendFrame(self.connection, REQUEST.pack(self.requestId)+self.signalFormat.pack(*signals))
+        self.pending.append(self.requestId)
+        return self.requestId
+
+    def receiveResponse(self):
+        payload = receiveFrame(self.connection)
+        request_id, status = RESPONSE.unpack_from(payload)
+        expected = self.pending.popleft() if self.pending else None
+        if request_id != expected:
+            # Out of step with the server, the connection can't be used anymore.
+            raise IOError("Response %d does not match request %r" % (request_id, expected))
+        if status == STATUS_BAD_REQUEST:
+            raise ValueError("Request %d rejected by the server" % request_id)
+        if status != STATUS_OK:
+            raise RuntimeError("Request %d failed on the server" % request_id)
+        return request_id, self.positionFormat.unpack_from(payload, RESPONSE.size)
+
+    # getNodePosition
+        # Description:
+            # Localizes one signal vector (see 'RSSI_Localizer.getNodePosition').
+        # -----------------------------------------------
+        # Input: (count,) signals in the server localizer's order
+        # -----------------------------------------------
+        # Returns: (x, y) or (x, y, z) tuple
+    def getNodePosition(self, signalStrengths):
+        self.sendRequest(signalStrengths)
+        return self.receiveResponse()[1]
+
+    # getNodePositions
+        # Description:
+            # Localizes several signal vectors. Up to 'window' requests
+            # are sent before their replies are read, so the server can
+            # solve them in one batch. If a request fails, the rest of
+            # its window is still read (so the connection stays usable)
+            # before the first error is raised.
+        # -----------------------------------------------
+        # Returns: list of position tuples, in input order
+    def getNodePositions(self, signalStrengths, window=256):
+        signalStrengths = list(signalStrengths)
+        positions = []
+        for start in range(0, len(signalStrengths), window):
+            sent = [self.sendRequest(signals) for signals in signalStrengths[start:start+window]]
+            error = None
+            for _ in sent:
+                try:
+                    positions.append(self.receiveResponse()[1])
+                except (ValueError, RuntimeError) as request_error:
+                    error = error or request_error
+            if error is not None:
+                raise error
+        return positions
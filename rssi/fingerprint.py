@@ -0,0 +1,172 @@
+import warnings # Used to flag the brute-force fallback
+import numpy # Used for the radio map and the weighted k-NN
+
+from .localize import RSSI_Localizer
+
+# scipy is optional ('pip install rssi[fingerprint]'): with it the radio
+# map is indexed by a KD-tree, without it queries fall back to a chunked
+# brute-force search, with a warning.
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# RSSI_Fingerprinter
+    # Use:
+        # from rssi.fingerprint import RSSI_Fingerprinter
+        # fingerprinter = RSSI_Fingerprinter(accessPoints)
+        # fingerprinter.addSamples(surveyed_locations, surveyed_signals)
+        # position = fingerprinter.getNodePosition([-44, -32, -63])
+    # -------------------------------------------------------
+    # Description:
+        # Fingerprint (radio map) localization, for places where the
+        # log-distance model of 'RSSI_Localizer' breaks down. Surveyed
+        # samples map a known location to the signal vector measured
+        # there, in the same access point order as 'RSSI_Localizer'.
+        # A query returns the weighted mean location of its 'k' nearest
+        # samples in signal space (weights 1/distance).
+        # The radio map is indexed with a KD-tree (scipy's cKDTree) when
+        # scipy is installed (the 'fingerprint' extra). Without scipy
+        # every query is a brute-force search over the whole radio map,
+        # which is far slower on large maps; a RuntimeWarning is issued
+        # the first time the index is built.
+        # Access points not heard (NaN) count as 'missingSignal' dBm.
+    # -------------------------------------------------------
+    # Input:
+        # accessPoints: see 'RSSI_Localizer'. Only their order and
+        #               optional 'mac' keys are used.
+        # k: neighbours per query, 3
+        # missingSignal: value used for access points not heard, -100
+class RSSI_Fingerprinter(object):
+    def __init__(self, accessPoints, k=3, missingSignal=-100.0):
+        self.accessPoints = accessPoints
+        self.count = len(accessPoints)
+        self.k = k
+        self.missingSignal = missingSignal
+        self.macs, self.macIndex = RSSI_Localizer.indexMacs(accessPoints)
+        self.locations = numpy.empty((0, 2))
+        self.fingerprints = numpy.empty((0, self.count))
+        # Samples added since the last 'buildIndex', merged into the
+        # arrays above in one go.
+        self.newLocations = []
+        self.newFingerprints = []
+        self.index = None
+
+    # addSamples
+        # Description:
+            # Adds surveyed samples to the radio map. The samples are
+            # only copied into the radio map, and the index rebuilt, on
+            # the next query (or by calling 'buildIndex'), so a survey can
+            # be added one sample at a time in linear time.
+        # ----------------------------------------
+        # Input:
+            # locations: (M, 2) array-like, [[2, 3], [4, 1]]
+            # signals: (M, count) array-like, [[-44, -32, -63], [-41, -35, -60]]
+        # ----------------------------------------
+        # Output: None
+    def addSamples(self, locations, signals):
+        locations = numpy.asarray(locations, dtype=numpy.float64).reshape(-1, 2)
+        signals = self.fillMissing(numpy.asarray(signals, dtype=numpy.float64).reshape(-1, self.count))
+        self.newLocations.append(locations)
+        self.newFingerprints.append(signals)
+        self.index = None
+
+    # fillMissing
+        # Description:
+            # Replaces NaN signals (access points not heard) with
+            # 'missingSignal'.
+    def fillMissing(self, signals):
+        return numpy.where(numpy.isnan(signals), self.missingSignal, signals)
+
+    # getSignalVector
+        # Description:
+            # Same as 'RSSI_Localizer.getSignalVector': lines scanned
+            # access points up with this radio map's access points.
+        # ----------------------------------------
+        # Input:
+            # access_points = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+        # ----------------------------------------
+        # Output: (count,) numpy array
+    def getSignalVector(self, access_points):
+        return RSSI_Localizer.alignSignals(access_points, self.macIndex, self.count)
+
+    # buildIndex
+        # Description:
+            # Merges the samples added since the last call into the radio
+            # map and builds the KD-tree over it. Without scipy, warns
+            # that queries fall back to brute force.
+    def buildIndex(self):
+        if self.newLocations:
+            self.locations = numpy.vstack([self.locations]+self.newLocations)
+            self.fingerprints = numpy.vstack([self.fingerprints]+self.newFingerprints)
+            self.newLocations, self.newFingerprints = [], []
+        if cKDTree is not None:
+            self.index = cKDTree(self.fingerprints)
+        else:
+            warnings.warn(
+                "scipy is not installed, fingerprint queries use a brute-force search "
+                "(install 'rssi[fingerprint]' for the KD-tree index)", RuntimeWarning, stacklevel=2
+            )
+            self.index = False
+
+    # getNeighbours
+        # Description:
+            # 'k' nearest surveyed samples of every query, in signal space.
+        # ----------------------------------------
+        # Input:
+            # signals: (N, count) numpy array, no NaN
+            # k: neighbours per query
+        # ----------------------------------------
+        # Output: (N, k) distances and (N, k) sample indexes
+    def getNeighbours(self, signals, k, chunk=1024):
+        if self.index is None:
+            self.buildIndex()
+        if self.index is not False:
+            distances, indexes = self.index.query(signals, k=k)
+            return distances.reshape(-1, k), indexes.reshape(-1, k)
+        # Brute force, 'chunk' queries at a time to bound memory.
+        squared_norms = numpy.sum(self.fingerprints**2, axis=1)
+        all_distances, all_indexes = [], []
+        for start in range(0, signals.shape[0], chunk):
+            block = signals[start:start+chunk]
+            squared = (numpy.sum(block**2, axis=1)[:, None]-2*numpy.dot(block, self.fingerprints.T))+squared_norms
+            indexes = numpy.argpartition(squared, k-1, axis=1)[:, :k]
+            distances = numpy.take_along_axis(squared, indexes, axis=1)
+            order = numpy.argsort(distances, axis=1)
+            all_indexes.append(numpy.take_along_axis(indexes, order, axis=1))
+            all_distances.append(numpy.sqrt(numpy.maximum(numpy.take_along_axis(distances, order, axis=1), 0.0)))
+        return numpy.vstack(all_distances), numpy.vstack(all_indexes)
+
+    # getNodePositions
+        # Description:
+            # Weighted k-NN location of a batch of signal vectors.
+        # ----------------------------------------
+        # Input:
+            # signalStrengths: (N, count) array-like
+            # k: (optional) neighbours per query, defaults to self.k
+        # ----------------------------------------
+        # Output: (N, 2) numpy array
+    def getNodePositions(self, signalStrengths, k=None):
+        if self.index is None:
+            self.buildIndex()
+        if self.locations.shape[0] == 0:
+            raise ValueError("Radio map is empty, add surveyed samples first.")
+        k = min(k or self.k, self.locations.shape[0])
+        signals = self.fillMissing(numpy.asarray(signalStrengths, dtype=numpy.float64).reshape(-1, self.count))
+        distances, indexes = self.getNeighbours(signals, k)
+        weights = 1.0/numpy.maximum(distances, 1e-9)
+        weights = weights/numpy.sum(weights, axis=1, keepdims=True)
+        return numpy.einsum('nk,nkj->nj', weights, self.locations[indexes])
+
+    # getNodePosition
+        # Description:
+            # Single query version of 'getNodePositions', returning the
+            # same (2, 1) shape as 'RSSI_Localizer.getNodePosition'.
+        # ----------------------------------------
+        # Input:
+            # signalStrengths: [-44, -32, -63]
+        # ----------------------------------------
+        # Output:
+            # [[2], [3]]
+    def getNodePosition(self, signalStrengths, k=None):
+        return self.getNodePositions(signalStrengths, k).reshape(2, 1)
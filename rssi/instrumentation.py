@@ -0,0 +1,136 @@
+from bisect import bisect_left # Used to find histogram buckets
+from contextlib import contextmanager # Used for 'timeStage'
+from threading import Lock # Used to update the statistics from several threads
+import time
+
+# High resolution clock for stage timers.
+clock = getattr(time, 'perf_counter', time.time)
+
+# Upper bounds (seconds) of the wall-time histogram buckets. A last
+# bucket counts everything slower than the largest bound.
+HISTOGRAM_BOUNDS = (
+    1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0
+)
+
+# RSSI_Instrumentation
+    # Use:
+        # from rssi import RSSI_Scan, RSSI_Localizer, RSSI_Instrumentation
+        # instrumentation = RSSI_Instrumentation()
+        # rssi_scan_instance.instrumentation = instrumentation   # one scanner
+        # RSSI_Localizer.instrumentation = instrumentation       # every localizer
+        # ...
+        # instrumentation.getSnapshot()
+    # -------------------------------------------------------
+    # Description:
+        # Opt-in timers, counters and wall-time histograms for the scan
+        # and localization hot paths. 'RSSI_Scan' and 'RSSI_Localizer'
+        # (and their subclasses) have an 'instrumentation' attribute that
+        # is None by default; when it is None, each instrumented call
+        # costs one attribute check. It can be set on a class, to
+        # instrument every instance, or on a single instance.
+        # Stages recorded by the package:
+        #   scan.subprocess    'iwlist' run (sync and asyncio)
+        #   scan.backend       scan through a backend (see 'rssi.backends')
+        #   scan.parse         'formatCells'
+        #   scan.filter        'selectAccessPoints'
+        #   localize.fix       'getNodePosition'
+        #   localize.batch     'getNodePositions'
+        # Counters: 'scan.cells' (cells parsed), 'localize.fixes' (fixes
+        # computed).
+        # Listeners ('addListener') receive every event as it happens,
+        # to forward them to any metrics system.
+class RSSI_Instrumentation(object):
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.lock = Lock()
+        self.listeners = []
+        self.reset()
+
+    # reset
+        # Description:
+            # Clears every timer and counter.
+    def reset(self):
+        with self.lock:
+            # stage -> [calls, total, min, max, histogram counts]
+            self.timers = {}
+            self.counters = {}
+
+    # addListener / removeListener
+        # Description:
+            # Registers a callable that is called with
+            # (kind, name, value) for every event, where kind is 'time'
+            # (value in seconds) or 'count' (value is the increment).
+            # Listeners run on the thread that recorded the event.
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    # addTime
+        # Description:
+            # Records one call of 'stage' that took 'seconds'.
+    def addTime(self, stage, seconds):
+        with self.lock:
+            timer = self.timers.get(stage)
+            if timer is None:
+                timer = self.timers[stage] = [0, 0.0, seconds, seconds, [0]*(len(self.bounds)+1)]
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds < timer[2]:
+                timer[2] = seconds
+            if seconds > timer[3]:
+                timer[3] = seconds
+            timer[4][bisect_left(self.bounds, seconds)] += 1
+        for listener in self.listeners:
+            listener('time', stage, seconds)
+
+    # addCount
+        # Description:
+            # Adds 'value' to 'counter'.
+    def addCount(self, counter, value=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0)+value
+        for listener in self.listeners:
+            listener('count', counter, value)
+
+    # timeStage
+        # Description:
+            # Context manager timing a block of user code as 'stage'.
+        # -----------------------------------------------
+        # with instrumentation.timeStage('app.publish'):
+        #     publish(position)
+    @contextmanager
+    def timeStage(self, stage):
+        start = clock()
+        try:
+            yield
+        finally:
+            self.addTime(stage, clock()-start)
+
+    # getSnapshot
+        # Description:
+            # Copy of every timer and counter, ready to be exported (JSON
+            # serializable).
+        # -----------------------------------------------
+        # Returns:
+            # {
+            #     'timers': {
+            #         'scan.subprocess': {
+            #             'calls': 2, 'total': 3.1, 'mean': 1.55, 'min': 1.5, 'max': 1.6,
+            #             'histogram': {'bounds': [1e-05, ...], 'counts': [0, ..., 2, 0, 0, 0]}
+            #         }
+            #     },
+            #     'counters': {'scan.cells': 24}
+            # }
+    def getSnapshot(self):
+        with self.lock:
+            timers = dict(
+                (stage, {
+                    'calls': timer[0], 'total': timer[1], 'mean': timer[1]/timer[0],
+                    'min': timer[2], 'max': timer[3],
+                    'histogram': {'bounds': list(self.bounds), 'counts': list(timer[4])}
+                })
+                for stage, timer in self.timers.items()
+            )
+            return {'timers': timers, 'counters': dict(self.counters)}
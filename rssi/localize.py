@@ -0,0 +1,1091 @@
+import numpy # Used for matrix operations in localization algorithm
+from itertools import combinations, islice # Used to enumerate access point subsets
+import warnings # Used to silence the NaN warnings of unsolvable scans
+from .instrumentation import clock # Used for the opt-in hot path timers
+from .buffer import RSSI_ScanBuffer # Used to format integer MACs
+
+# RSSI_Localizer
+    # Use:
+        # from rssi import RSSI_Localizer
+        # rssi_localizer_instance = RSSI_Localizer()
+    # -------------------------------------------------------
+    # Description:
+        # This class helps a user implement rssi-based localization.
+        # The algorithm assumes the logarithmic distance-path-loss model
+        # And assumes a minimum of 3 (or more) access points.
+    # -------------------------------------------------------
+    # Input:
+        # accessPoints: Array holding accessPoint dictionaries.
+        #               The order of the arrays supplied will retain
+        #               its order, throughout the entire execution.
+        #               An optional 'mac' key (BSSID) lets scan results
+        #               be matched to access points (see 'getSignalVector').
+        # [{
+        #     'signalAttenuation': 3, 
+        #     'location': {
+        #         'y': 1, 
+        #         'x': 1
+        #     }, 
+        #     'reference': {
+        #         'distance': 4, 
+        #         'signal': -50
+        #     }, 
+        #     'name': 'dd-wrt'
+        # },
+        # {
+        #     'signalAttenuation': 4, 
+        #     'location': {
+        #         'y': 1, 
+        #         'x': 7
+        #     }, 
+        #     'reference': {
+        #         'distance': 3, 
+        #         'signal': -41
+        #     }, 
+        #     'name': 'ucrwpa'
+        # }]
+class RSSI_Localizer(object):
+    # Solvers of 'solvePositions'.
+    SOLVERS = ('pinv', 'lstsq', 'weighted', 'huber', 'ransac')
+
+    # Opt-in timers and counters (see 'RSSI_Instrumentation'). Set it
+    # on the class or on one instance; None disables them.
+    instrumentation = None
+
+    # Allows us to fetch for networks/accessPoints externally.
+    # Array of access points must be formatted.
+    # 'self.count' parameter is computed internally to aid in 
+    # scaling of the algorithm.
+    # The access point dictionaries are copied once into flat arrays
+    # (see 'buildAccessPointArrays'), and the geometry of the problem
+    # ('A' and the location terms of 'B') is built and factored once
+    # (see 'buildGeometry'). The localization hot path only reads these
+    # arrays, so a single instance can be shared between threads.
+    def __init__(self,accessPoints):
+        self.accessPoints = accessPoints
+        self.count = len(accessPoints)
+        self.buildAccessPointArrays()
+        self.buildGeometry()
+
+    # buildAccessPointArrays
+        # Description:
+            # Builds a struct-of-arrays copy of self.accessPoints. Every
+            # array is a contiguous float64 array of length 'count',
+            # where index 'i' is self.accessPoints[i].
+            #   apX, apY, apZ: location ('z' is optional, 0 if missing)
+            #   refSignal:     reference signal
+            #   refDistance:   reference distance
+            #   attenuation:   signal attenuation
+            # Localization is 3D ('dimensions' = 3, positions are
+            # (x, y, z)) as soon as one access point has a 'z', and 2D
+            # otherwise. 'apCoordinates' holds the coordinate arrays that
+            # are solved for: (apX, apY) or (apX, apY, apZ).
+            # 'apTable' (built on first use) holds the same data
+            # row-wise, (count, 7):
+            #   x, y, z, refSignal, refDistance, attenuation, |location|^2
+            # so the rows of any subset of access points can be gathered
+            # with a single index array (see 'getSubset').
+            # It also indexes the optional 'mac' key of each access point
+            # ('macs' and 'macIndex').
+            # Must be called again (followed by 'buildGeometry') if
+            # self.accessPoints is changed after the localizer was created.
+        # ----------------------------------------
+        # Input: None (reads self.accessPoints)
+        # ----------------------------------------
+        # Output: None
+    def buildAccessPointArrays(self):
+        def column(getter):
+            return numpy.ascontiguousarray([getter(ap) for ap in self.accessPoints], dtype=numpy.float64)
+        self.apX = column(lambda ap: ap['location']['x'])
+        self.apY = column(lambda ap: ap['location']['y'])
+        self.apZ = column(lambda ap: ap['location'].get('z', 0.0))
+        self.dimensions = self.getDimensions(self.accessPoints)
+        self.apCoordinates = (self.apX, self.apY, self.apZ)[:self.dimensions]
+        self.refSignal = column(lambda ap: ap['reference']['signal'])
+        self.refDistance = column(lambda ap: ap['reference']['distance'])
+        self.attenuation = column(lambda ap: ap['signalAttenuation'])
+        self.apTable = None
+        # Optional BSSID of every access point, used to line scans up
+        # with this localizer (see 'getSignalVector').
+        self.macs, self.macIndex = self.indexMacs(self.accessPoints)
+
+    # indexMacs
+        # Description:
+            # Upper case 'mac' of every access point (None when it has
+            # none) and the position of every MAC in that list.
+        # ----------------------------------------
+        # Input: accessPoints (see 'RSSI_Localizer')
+        # ----------------------------------------
+        # Output:
+            # (['A0:3D:6F:26:77:8E', None], {'A0:3D:6F:26:77:8E': 0})
+    @staticmethod
+    def indexMacs(accessPoints):
+        macs = [ap['mac'].upper() if ap.get('mac') else None for ap in accessPoints]
+        return macs, dict((mac, i) for i, mac in enumerate(macs) if mac is not None)
+
+    # getDimensions
+        # Description:
+            # 3 if any of the access points has a 'z' coordinate, else 2.
+    @staticmethod
+    def getDimensions(accessPoints):
+        return 3 if any('z' in ap['location'] for ap in accessPoints) else 2
+
+    # fromArrays
+        # Description:
+            # Builds a localizer from struct-of-arrays access point data
+            # (see 'buildAccessPointArrays'), such as an AP table read with
+            # 'rssi.storage.RSSI_APTable'. The arrays are used as they
+            # are when they already hold contiguous float64 values, so
+            # memory-mapped columns are not copied, and no access point
+            # dictionary is built (see 'accessPoints').
+        # ----------------------------------------
+        # Input:
+            # x, y, refSignal, refDistance, attenuation: (count,) array-like
+            # macs: (optional) (count,) BSSID strings or MAC integers
+            #       (None or 0 for access points without one)
+            # z: (optional) (count,) array-like, for a 3D localizer
+        # ----------------------------------------
+        # Output: RSSI_Localizer
+    @classmethod
+    def fromArrays(cls, x, y, refSignal, refDistance, attenuation, macs=None, z=None):
+        localizer = cls.__new__(cls)
+        localizer.accessPoints = None
+        localizer.count = len(x)
+        def column(values):
+            return numpy.ascontiguousarray(values, dtype=numpy.float64)
+        localizer.apX = column(x)
+        localizer.apY = column(y)
+        localizer.apZ = column(z) if z is not None else numpy.zeros(localizer.count)
+        localizer.dimensions = 3 if z is not None else 2
+        localizer.apCoordinates = (localizer.apX, localizer.apY, localizer.apZ)[:localizer.dimensions]
+        localizer.refSignal = column(refSignal)
+        localizer.refDistance = column(refDistance)
+        localizer.attenuation = column(attenuation)
+        localizer.apTable = None
+        if macs is None:
+            macs = [None]*localizer.count
+        localizer.macs = [
+            (mac.upper() if isinstance(mac, str) else RSSI_ScanBuffer.intToMac(mac)) if mac else None
+            for mac in macs
+        ]
+        localizer.macIndex = dict((mac, i) for i, mac in enumerate(localizer.macs) if mac is not None)
+        localizer.buildGeometry()
+        return localizer
+
+    # accessPoints
+        # Description:
+            # The access point dictionaries. A localizer built with
+            # 'fromArrays' only creates them from its arrays the first
+            # time they are read.
+    @property
+    def accessPoints(self):
+        if self._accessPoints is None:
+            self._accessPoints = self.getAccessPointDicts()
+        return self._accessPoints
+
+    @accessPoints.setter
+    def accessPoints(self, accessPoints):
+        self._accessPoints = accessPoints
+
+    # apTable
+        # Description:
+            # Row-wise copy of the access point arrays (see
+            # 'buildAccessPointArrays'), only built the first time it is
+            # read, so localizers mapping a large table (see 'fromArrays')
+            # don't copy it unless they need it.
+    @property
+    def apTable(self):
+        if self._apTable is None:
+            self._apTable = numpy.column_stack((
+                self.apX, self.apY, self.apZ, self.refSignal, self.refDistance, self.attenuation,
+                sum(c**2 for c in self.apCoordinates)
+            ))
+        return self._apTable
+
+    @apTable.setter
+    def apTable(self, apTable):
+        self._apTable = apTable
+
+    # getAccessPointDicts
+        # Description:
+            # Inverse of 'buildAccessPointArrays': one access point
+            # dictionary per entry of the arrays.
+        # ----------------------------------------
+        # Output: (Array of access point dictionaries)
+    def getAccessPointDicts(self):
+        accessPoints = []
+        for i in range(self.count):
+            accessPoint = {
+                'signalAttenuation': float(self.attenuation[i]),
+                'location': {'x': float(self.apX[i]), 'y': float(self.apY[i])},
+                'reference': {'distance': float(self.refDistance[i]), 'signal': float(self.refSignal[i])}
+            }
+            if self.dimensions == 3:
+                accessPoint['location']['z'] = float(self.apZ[i])
+            if self.macs[i]:
+                accessPoint['mac'] = self.macs[i]
+            accessPoints.append(accessPoint)
+        return accessPoints
+
+    # getSignalVector
+        # Description:
+            # Turns scanned access points (see 'RSSI_Scan.getAPinfo') into
+            # a signal vector in this localizer's order, ready for
+            # 'getNodePosition'. Access points are matched on their 'mac'
+            # with a single dictionary lookup each. Access points of the
+            # localizer that were not heard get the 'missing' value.
+        # ----------------------------------------
+        # Input:
+            # access_points = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+            # missing = value for access points not heard (NaN)
+        # ----------------------------------------
+        # Output: (count,) numpy array
+            # [-67, nan, nan]
+    def getSignalVector(self, access_points, missing=float('nan')):
+        return self.alignSignals(access_points, self.macIndex, self.count, missing)
+
+    # alignSignals
+        # Description:
+            # 'getSignalVector' for any MAC index (see 'indexMacs'), so
+            # other access point tables can line scans up the same way.
+        # ----------------------------------------
+        # Input:
+            # access_points: scanned access points
+            # macIndex: {'A0:3D:6F:26:77:8E': 0}
+            # count: length of the signal vector
+            # missing: value for access points not heard (NaN)
+        # ----------------------------------------
+        # Output: (count,) numpy array
+    @staticmethod
+    def alignSignals(access_points, macIndex, count, missing=float('nan')):
+        signals = numpy.full(count, missing, dtype=numpy.float64)
+        for point in access_points:
+            i = macIndex.get(point['mac'].upper())
+            if i is not None:
+                signals[i] = point['signal']
+        return signals
+
+    # getHeardSignals
+        # Description:
+            # Sparse counterpart of 'getSignalVector', for large access
+            # point tables: the indices (into this localizer) and signals
+            # of only the access points heard in a scan, ready for
+            # 'getNodePositionSparse'. Access points that are not in the
+            # table, or have no signal level, are skipped.
+        # ----------------------------------------
+        # Input:
+            # access_points = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+        # ----------------------------------------
+        # Output: (k,) index array, (k,) numpy array of signals
+            # [1742], [-67]
+    def getHeardSignals(self, access_points):
+        indices = []
+        signals = []
+        for point in access_points:
+            i = self.macIndex.get(point['mac'].upper())
+            if i is not None and point['signal'] is not None:
+                indices.append(i)
+                signals.append(point['signal'])
+        return numpy.array(indices, dtype=numpy.intp), numpy.array(signals, dtype=numpy.float64)
+
+    # getSubset
+        # Description:
+            # Localizer over the access points at 'indices' only. The
+            # rows of 'apTable' are gathered with the index array (no
+            # access point dictionary is parsed again), and the 'A'
+            # matrix and its pseudo-inverse (see 'buildGeometry') are only
+            # built when 'geometry' is True, since just the 'pinv' and
+            # 'lstsq' solvers need them.
+        # ----------------------------------------
+        # Input:
+            # indices: (k,) array-like of indices into this localizer
+            # geometry = True || False
+        # ----------------------------------------
+        # Output: RSSI_Localizer
+    def getSubset(self, indices, geometry=True):
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+        subset = self.__class__.__new__(self.__class__)
+        subset.instrumentation = self.instrumentation
+        # Left for the subset to build when 'fromArrays' did not either.
+        subset.accessPoints = [self._accessPoints[i] for i in indices] if self._accessPoints is not None else None
+        subset.count = len(indices)
+        subset.apTable = self.apTable[indices]
+        columns = numpy.ascontiguousarray(numpy.transpose(subset.apTable))
+        for i, name in enumerate(('apX', 'apY', 'apZ', 'refSignal', 'refDistance', 'attenuation')):
+            setattr(subset, name, columns[i])
+        subset.dimensions = self.dimensions
+        subset.apCoordinates = (subset.apX, subset.apY, subset.apZ)[:self.dimensions]
+        subset.macs = [self.macs[i] for i in indices]
+        subset.macIndex = dict((mac, i) for i, mac in enumerate(subset.macs) if mac is not None)
+        if geometry:
+            subset.buildGeometry()
+        return subset
+
+    # buildGeometry
+        # Description:
+            # Precomputes everything in the least squares problem that does
+            # not depend on the measured distances:
+            #   matrixA:   'A' matrix (see 'createMatrices'), with one
+            #              column per coordinate (2 or 3)
+            #   pinvA:     pseudo-inverse of 'A', [(A_transposed*A)^-1]*A_transposed
+            #   constantB: x(i)^2 + y(i)^2 [+ z(i)^2] - x(n)^2 - y(n)^2 [- z(n)^2] part of 'B'
+            # The pseudo-inverse is computed from the small normal matrix,
+            # falling back to an SVD when 'A' is rank deficient.
+            # Must be called again if self.accessPoints is changed after
+            # the localizer was created.
+        # ----------------------------------------
+        # Input: None (reads 'apCoordinates')
+        # ----------------------------------------
+        # Output: None
+    def buildGeometry(self):
+        n_count = self.count-1
+        coordinates = self.apCoordinates
+        self.matrixA = numpy.column_stack([2*(c[:n_count]-c[n_count]) for c in coordinates])
+        transposedA = numpy.transpose(self.matrixA)
+        try:
+            self.pinvA = numpy.linalg.solve(numpy.dot(transposedA, self.matrixA), transposedA)
+        except numpy.linalg.LinAlgError:
+            self.pinvA = numpy.linalg.pinv(self.matrixA)
+        self.constantB = sum(c[:n_count]**2 for c in coordinates)-sum(c[n_count]**2 for c in coordinates)
+
+    # getDistanceFromAP
+        # Description:
+            # Uses the log model to compute an estimated dstance(di) from node(i)
+        # -------------------------------------------------------
+        # Input: 
+            # accessPoint: dicitonary holding accesspoint info.
+            # {
+            #     'signalAttenuation': 3, 
+            #     'location': {
+            #         'y': 1, 
+            #         'x': 1
+            #     }, 
+            #     'reference': {
+            #         'distance': 4, 
+            #         'signal': -50
+            #     }, 
+            #     'name': 'dd-wrt'
+            # }
+            # signalStrength: -69
+        # -------------------------------------------------------
+        # output: 
+            # accessPoint: dicitonary holding accesspoint info.
+            # {
+            #     'signalAttenuation': 3, 
+            #     'location': {
+            #         'y': 1, 
+            #         'x': 1
+            #     }, 
+            #     'reference': {
+            #         'distance': 4, 
+            #         'signal': -50
+            #     }, 
+            #     'name': 'dd-wrt',
+            #     'distance': 2
+            # }
+    @staticmethod
+    def getDistanceFromAP(accessPoint, signalStrength):
+        beta_numerator = float(accessPoint['reference']['signal']-signalStrength)
+        beta_denominator = float(10*accessPoint['signalAttenuation'])
+        beta = beta_numerator/beta_denominator
+        distanceFromAP = round(((10**beta)*accessPoint['reference']['distance']),4)
+        accessPoint.update({'distance':distanceFromAP})
+        return accessPoint
+    
+    # TODO fix this because theres two consecutive for loops. 
+    # One that runs to fefd signal strengths to this function, 
+    # a second consecutive loop inside the function.
+
+    # getDistancesForAllAPs
+        # Description:
+            # Makes use of 'getDistanceFromAP' to iterate through all 
+            # accesspoints being used in localization and obtains the 
+            # distance from each one of them.
+        # ------------------------------------------------
+        # Input:
+            # signalStrengths:
+            # [siganl1, siganl2, siganl3]
+            # [-42, -53, -77]
+        # ------------------------------------------------
+        # Output:
+            # [
+            #     {
+            #         'distance': 4,
+            #         'x': 2,
+            #         'y': 3
+            #     },
+            #     {
+            #         'distance': 7,
+            #         'x': 2,
+            #         'y': 5
+            #     },
+            #     {
+            #         'distance': 9,
+            #         'x': 7,
+            #         'y': 3
+            #     }
+            # ]
+    def getDistancesForAllAPs(self, signalStrengths):
+        apNodes = []
+        for i in range(len(self.accessPoints)):
+            ap = self.accessPoints[i] 
+            distanceFromAP = self.getDistanceFromAP(
+                ap,
+                signalStrengths[i]
+            )
+            apNodes.append({
+                'distance': distanceFromAP['distance'],
+                'x': ap['location']['x'],
+                'y': ap['location']['y']
+            })
+        return apNodes
+    
+    # createMatrices
+        # Description:
+            # Creates tehmatrices neccesary to use the least squares method
+            # in order to mnimize the error (error=|realDistance-estimatedDistance|). 
+            # Assuming 'n' number of nodes and d(m) is the distance(d) from node (m).
+            # AX = B, where X is our estimated location.
+            # A = [
+            #     2(x(i)-xn)    2(y(i)-yn)
+            #     2(x(i+1)-xn)  2(y(i+1)-yn)
+            #     ...           ...
+            #     2(x(n-1)-xn)  2(y(n-1)-yn)
+            # ]
+            # B = [
+            #     x(i)^2 + y(i)^2 - x(n)^2 + y(n)^2 - d(i)^2 + d(n)^2
+            #     x(i+1)^2 + y(i+1)^2 - x(n)^2 + y(n)^2 - d(i+1)^2 + d(n)^2
+            #     ...
+            #     x(n-1)^2 + y(n-1)^2 - x(n)^2 + y(n)^2 - d(n-1)^2 + d(n)^2
+            # ]
+        # ----------------------------------------
+        # Input:
+            # accessPoints
+            # [
+            #     {
+            #         'distance': 4,
+            #         'x': 2,
+            #         'y': 3
+            #     },
+            #     {
+            #         'distance': 7,
+            #         'x': 2,
+            #         'y': 5
+            #     },
+            #     {
+            #         'distance': 9,
+            #         'x': 7,
+            #         'y': 3
+            #     }
+            # ]
+        # ----------------------------------------
+        # Output:
+            # A = [
+            #     2(2-7)    2(3-3)
+            #     2(2-7)  2(5-3)
+            # ]
+            # B = [
+            #     2^2 + 3^2 - 7^2 + 3^2 - 4^2 + 9^2
+            #     2^2 + 5^2 - 7^2 + 3^2 - 7^2 + 9^2
+            # ]
+    def createMatrices(self, accessPoints):
+        # Sets up that te matrics only go as far as 'n-1' rows,
+        # with 'n being the # of access points being used.
+        n_count = self.count-1
+        # initialize 'A' matrix with 'n-1' ranodm rows.
+        a = numpy.empty((n_count,2))
+        # initialize 'B' matrix with 'n-1' ranodm rows.
+        b = numpy.empty((n_count,1))
+        # Define 'x(n)' (x of last accesspoint)
+        x_n = accessPoints[n_count]['x'] 
+        # Define 'y(n)' (y of last accesspoint)
+        y_n = accessPoints[n_count]['y']
+        # Define 'd(n)' (distance from of last accesspoint)
+        d_n = accessPoints[n_count]['distance']
+        # Iteration through accesspoints is done upto 'n-1' only
+        for i in range(n_count):
+            ap = accessPoints[i]
+            x, y, d = ap['x'], ap['y'], ap['distance']
+            a[i] = [2*(x-x_n), 2*(y-y_n)]
+            b[i] = [(x**2)+(y**2)-(x_n**2)-(y_n**2)-(d**2)+(d_n**2)]
+        return a, b
+    
+    # computePosition
+        # Description:
+            # Performs the 'least squares method' matrix operations 
+            # neccessary to get the 'x' and 'y' of the unknown 
+            # beacon's position.
+            # X = [(A_transposed*A)^-1]*[A_transposed*B]
+        # ----------------------------------------
+        # Input:
+            # A = [
+            #     0   0
+            #     0  -4
+            # ]
+            # B = [
+            #     4 + 9 - 49 + 9 - 16 + 81  => 38
+            #     4 + 25 - 49 + 9 - 49 + 81 => 21
+            # ]
+        # ----------------------------------------
+        # Output:
+            # x
+            # [
+            #     2,
+            #     3
+            # ]
+    @staticmethod
+    def computePosition(a, b):
+        # Get 'A_transposed' matrix
+        at = numpy.transpose(a)
+        # Get 'A_transposed*A' matrix
+        at_a = numpy.matmul(at,a)
+        # Get '[(A_transposed*A)^-1]' matrix
+        inv_at_a = numpy.linalg.inv(at_a)
+        # Get '[A_transposed*B]'
+        at_b = numpy.matmul(at,b)
+        # Get '[(A_transposed*A)^-1]*[A_transposed*B]'
+        # This holds our position (xn,yn)
+        x = numpy.matmul(inv_at_a,at_b) 
+        return x
+
+    # getNodePosition
+        # Description:
+            # Uses 'getDistancesBatch' and the geometry cached by
+            # 'buildGeometry' to get the 'X' vector that contains our
+            # unkown (x,y) position, or (x,y,z) for a 3D localizer. Only
+            # the distance terms of 'B' are computed per call, followed
+            # by X = pinvA*B.
+            # Other least squares solvers can be selected with 'solver'
+            # (see 'solvePositions').
+            # With refine=True, the linear solution is refined on the true
+            # range equations (see 'refinePositions'). Passing the previous
+            # position of the node as 'initial' skips the linear solve and
+            # refines from there instead.
+        # ----------------------------------------
+        # Input:
+            # signalStrengths
+            # [4, 2 , 3]
+            # solver = 'pinv' || 'lstsq' || 'weighted' || 'huber' || 'ransac'
+            # signalVariance = (optional) see 'getAPWeights'
+            # refine = True || False
+            # initial = (optional) previous position, [2, 3]
+        # ----------------------------------------
+        # Output: (dimensions, 1) numpy array
+            # x
+            # [2, 3]
+    def getNodePosition(self, signalStrengths, solver='pinv', signalVariance=None, refine=False, initial=None):
+        if self.instrumentation is not None:
+            start = clock()
+        d = self.getDistancesBatch(signalStrengths)
+        if refine or initial is not None:
+            if initial is not None:
+                initial = numpy.reshape(initial, (1, self.dimensions))
+            position = self.refineFrom(d, solver, signalVariance, initial).reshape(self.dimensions, 1)
+        elif solver != 'pinv':
+            position = self.solvePositions(d, solver, signalVariance).reshape(self.dimensions, 1)
+        else:
+            b = self.constantB-(d[:-1]**2)+(d[-1]**2)
+            position = numpy.dot(self.pinvA, b).reshape(self.dimensions, 1)
+        if self.instrumentation is not None:
+            self.instrumentation.addTime('localize.fix', clock()-start)
+            self.instrumentation.addCount('localize.fixes')
+        return position
+
+    # getNodePositionSparse
+        # Description:
+            # 'getNodePosition' for a large access point table (thousands
+            # of access points, several floors), using only the access
+            # points heard in the scan. The table's arrays are gathered
+            # with the 'indices' array, so no localizer is built per scan,
+            # and the solve costs O(k) in the number of access points
+            # heard instead of O(count). The default 'pinv' solve works
+            # straight on the gathered rows of 'apTable' (see
+            # 'solveSparse'); other solvers, 'refine' and 'initial' go
+            # through a lightweight subset localizer (see 'getSubset').
+            # Scans with less than dimensions+1 access points give NaN.
+        # ----------------------------------------
+        # Input:
+            # indices: (k,) indices into this localizer (see 'getHeardSignals')
+            # signalStrengths: (k,) signals of those access points
+            # solver, refine, initial: see 'getNodePosition'
+            # signalVariance = (optional) scalar, or (count,) for the
+            #                  whole table (gathered with 'indices')
+        # ----------------------------------------
+        # Output: (dimensions, 1) numpy array
+            # [2, 3]
+    def getNodePositionSparse(self, indices, signalStrengths, solver='pinv', signalVariance=None, refine=False, initial=None):
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+        if len(indices) <= self.dimensions:
+            return numpy.full((self.dimensions, 1), numpy.nan)
+        if solver == 'pinv' and not refine and initial is None:
+            if self.instrumentation is None:
+                return self.solveSparse(indices, signalStrengths)
+            start = clock()
+            position = self.solveSparse(indices, signalStrengths)
+            self.instrumentation.addTime('localize.fix', clock()-start)
+            self.instrumentation.addCount('localize.fixes')
+            return position
+        if numpy.ndim(signalVariance) == 1:
+            signalVariance = numpy.asarray(signalVariance, dtype=numpy.float64)[indices]
+        subset = self.getSubset(indices, geometry=solver in ('pinv', 'lstsq'))
+        return subset.getNodePosition(signalStrengths, solver, signalVariance, refine, initial)
+
+    # solveSparse
+        # Description:
+            # 'pinv' solve of 'getNodePositionSparse'. Builds the 'A' and
+            # 'B' matrices (see 'createMatrices') of the heard access
+            # points from their gathered 'apTable' rows and solves the
+            # small normal equations (A_transposed*A)*X = A_transposed*B,
+            # which gives the same position as the pseudo-inverse.
+        # ----------------------------------------
+        # Input:
+            # indices: (k,) index array, k > dimensions
+            # signalStrengths: (k,) signals
+        # ----------------------------------------
+        # Output: (dimensions, 1) numpy array
+    def solveSparse(self, indices, signalStrengths):
+        dimensions = self.dimensions
+        rows = self.apTable[indices]
+        beta = (rows[:, 3]-numpy.asarray(signalStrengths, dtype=numpy.float64))/(10*rows[:, 5])
+        d2 = numpy.round((10**beta)*rows[:, 4], 4)**2
+        a = 2*(rows[:-1, :dimensions]-rows[-1, :dimensions])
+        b = (rows[:-1, 6]-rows[-1, 6])-d2[:-1]+d2[-1]
+        transposedA = numpy.transpose(a)
+        try:
+            position = numpy.linalg.solve(numpy.dot(transposedA, a), numpy.dot(transposedA, b))
+        except numpy.linalg.LinAlgError:
+            position = numpy.linalg.lstsq(a, b, rcond=None)[0]
+        return position.reshape(dimensions, 1)
+
+    # getDistancesBatch
+        # Description:
+            # Vectorized version of 'getDistancesForAllAPs'. Applies the
+            # log model to a whole batch of scans at once, reading only the
+            # arrays built by 'buildAccessPointArrays'.
+            # Column 'i' of the input lines up with self.accessPoints[i].
+            # A single (count,) scan gives a (count,) result.
+        # ----------------------------------------
+        # Input:
+            # signalStrengths: (N, count) array-like
+            # [
+            #     [-42, -53, -77],
+            #     [-44, -51, -70]
+            # ]
+        # ----------------------------------------
+        # Output: (N, count) numpy array of distances
+            # [
+            #     [4, 7, 9],
+            #     [5, 6, 8]
+            # ]
+    def getDistancesBatch(self, signalStrengths):
+        signals = numpy.asarray(signalStrengths, dtype=numpy.float64)
+        beta = (self.refSignal-signals)/(10*self.attenuation)
+        return numpy.round((10**beta)*self.refDistance, 4)
+
+    # createMatricesBatch
+        # Description:
+            # Vectorized version of 'createMatrices'. 'A' only depends on
+            # the access point locations, so the cached 'A' is shared by
+            # every scan in the batch. 'B' gets one row per scan.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array (see 'getDistancesBatch')
+        # ----------------------------------------
+        # Output:
+            # A: (count-1, dimensions) numpy array
+            # B: (N, count-1) numpy array
+    def createMatricesBatch(self, distances):
+        n_count = self.count-1
+        b = self.constantB-(distances[:, :n_count]**2)+(distances[:, n_count:]**2)
+        return self.matrixA, b
+
+    # computePositionsBatch
+        # Description:
+            # Solves the least squares problem for every row of 'B' in a
+            # single call. All the scans share 'A', so they are solved
+            # together as one multi right-hand-side system.
+        # ----------------------------------------
+        # Input:
+            # A: (count-1, dimensions) numpy array
+            # B: (N, count-1) numpy array
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+            # [
+            #     [2, 3],
+            #     [4, 1]
+            # ]
+    @staticmethod
+    def computePositionsBatch(a, b):
+        x = numpy.linalg.lstsq(a, numpy.transpose(b), rcond=None)[0]
+        return numpy.transpose(x)
+
+    # getNodePositions
+        # Description:
+            # Batch counterpart of 'getNodePosition'. Combines
+            # 'getDistancesBatch' and 'createMatricesBatch' with the
+            # cached pseudo-inverse of 'A' to localize N scans in one call.
+            # Other least squares solvers can be selected with 'solver'
+            # (see 'solvePositions'), and 'refine'/'initial' work as in
+            # 'getNodePosition', with one initial position per scan.
+        # ----------------------------------------
+        # Input:
+            # signalStrengths: (N, count) array-like
+            # [
+            #     [-44, -32, -63],
+            #     [-41, -35, -60]
+            # ]
+            # solver = 'pinv' || 'lstsq' || 'weighted' || 'huber' || 'ransac'
+            # signalVariance = (optional) see 'getAPWeights'
+            # refine = True || False
+            # initial = (optional) (N, dimensions) previous positions
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+            # [
+            #     [2, 3],
+            #     [4, 1]
+            # ]
+    def getNodePositions(self, signalStrengths, solver='pinv', signalVariance=None, refine=False, initial=None):
+        if self.instrumentation is not None:
+            start = clock()
+        distances = self.getDistancesBatch(signalStrengths)
+        if refine or initial is not None:
+            positions = self.refineFrom(distances, solver, signalVariance, initial)
+        else:
+            positions = self.solvePositions(distances, solver, signalVariance)
+        if self.instrumentation is not None:
+            self.instrumentation.addTime('localize.batch', clock()-start)
+            self.instrumentation.addCount('localize.fixes', len(positions))
+        return positions
+
+    # refineFrom
+        # Description:
+            # Starting point selection for 'getNodePosition(s)': uses the
+            # 'initial' positions where they are given (and not NaN), and
+            # the linear solution of 'solver' everywhere else, then refines
+            # them all with 'refinePositions'. Scans the linear solver
+            # can't solve ('pinv' or 'lstsq' with an access point that was
+            # not heard) start from the 'weighted' solution instead.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # solver, signalVariance: see 'solvePositions'
+            # initial: (N, dimensions) array-like or None
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def refineFrom(self, distances, solver='pinv', signalVariance=None, initial=None):
+        distances = numpy.atleast_2d(distances)
+        if initial is None:
+            start = self.solvePositions(distances, solver, signalVariance)
+        else:
+            start = numpy.array(initial, dtype=numpy.float64).reshape(-1, self.dimensions)
+            missing = numpy.isnan(start).any(axis=1)
+            if missing.any():
+                start[missing] = self.solvePositions(distances[missing], solver, signalVariance)
+        unsolved = numpy.isnan(start).any(axis=1)
+        if unsolved.any() and solver in ('pinv', 'lstsq'):
+            start[unsolved] = self.solveWeighted(distances[unsolved], self.getAPWeights(distances[unsolved], signalVariance))
+        return self.refinePositions(distances, start, signalVariance)
+
+    # refinePositions
+        # Description:
+            # Nonlinear refinement of a batch of positions. Minimizes the
+            # true range residuals |position-AP| - d with a vectorized
+            # Levenberg-Marquardt (damped Gauss-Newton) iteration, instead
+            # of the linearized problem in 'createMatrices'. Each residual
+            # is weighted by the inverse variance of its distance under the
+            # log model ((10*n/(ln(10)*d))^2, times 1/signalVariance).
+            # The damping of each scan shrinks after a step that lowers its
+            # cost and grows after one that doesn't. Stops once every step
+            # is below 'tolerance', or after 'iterations' passes; starting
+            # from a nearby position (the previous fix) usually takes one
+            # or two. Access points with a non-finite distance (not heard)
+            # get a zero weight and a zero residual.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # positions: (N, dimensions) numpy array, starting points
+            # signalVariance: (optional) (count,) or (N, count) array-like
+            # iterations = 10, tolerance = 1e-6, damping = 1e-3
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def refinePositions(self, distances, positions, signalVariance=None, iterations=10, tolerance=1e-6, damping=1e-3):
+        distances = numpy.atleast_2d(distances)
+        positions = numpy.array(positions, dtype=numpy.float64).reshape(-1, self.dimensions)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            weights = ((10*self.attenuation)/(numpy.log(10)*distances))**2
+            if signalVariance is not None:
+                weights = weights/numpy.asarray(signalVariance, dtype=numpy.float64)
+        usable = numpy.isfinite(distances)
+        weights = numpy.where(usable & numpy.isfinite(weights), weights, 0.0)
+        def getCost(points):
+            ranges = self.getRanges(points)
+            return ranges, numpy.sum(weights*(numpy.where(usable, ranges-distances, 0.0)**2), axis=1)
+        ranges, cost = getCost(positions)
+        damping = numpy.full(positions.shape[0], damping)
+        for _ in range(iterations):
+            residuals = numpy.where(usable, ranges-distances, 0.0)
+            jacobian = []
+            for i, c in enumerate(self.apCoordinates):
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    column = (positions[:, i:i+1]-c)/ranges
+                jacobian.append(numpy.where(numpy.isfinite(column), column, 0.0))
+            step = self.solveNormalEquations(jacobian, weights, -residuals, damping)
+            step[~numpy.isfinite(step)] = 0.0
+            new_ranges, new_cost = getCost(positions+step)
+            accept = new_cost < cost
+            positions[accept] += step[accept]
+            ranges[accept] = new_ranges[accept]
+            cost[accept] = new_cost[accept]
+            damping = numpy.where(accept, damping/10, damping*10)
+            if numpy.all(numpy.abs(step) < tolerance):
+                break
+        return positions
+
+    # solvePositions
+        # Description:
+            # Solves a batch of distance vectors with the selected solver:
+            #   'pinv':     cached pseudo-inverse of 'A' (default, fastest)
+            #   'lstsq':    numpy.linalg.lstsq on 'A' (SVD based, avoids
+            #               forming (A_transposed*A)^-1)
+            #   'weighted': weighted least squares, see 'getAPWeights'
+            #   'huber':    iteratively reweighted least squares with
+            #               Huber weights, see 'solveHuber'
+            #   'ransac':   consensus over 3-AP subsets, drops outlier
+            #               access points, see 'solveRansac'
+            # 'pinv' and 'lstsq' use every access point, so a scan with a
+            # missing (NaN) distance gives NaN. The other solvers drop the
+            # access points that were not heard.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array (see 'getDistancesBatch')
+            # solver: one of the names above
+            # signalVariance: (optional) see 'getAPWeights'
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def solvePositions(self, distances, solver='pinv', signalVariance=None):
+        distances = numpy.atleast_2d(distances)
+        if solver == 'pinv':
+            a, b = self.createMatricesBatch(distances)
+            return numpy.dot(b, numpy.transpose(self.pinvA))
+        if solver == 'lstsq':
+            a, b = self.createMatricesBatch(distances)
+            return self.computePositionsBatch(a, b)
+        if solver == 'weighted':
+            return self.solveWeighted(distances, self.getAPWeights(distances, signalVariance))
+        if solver == 'huber':
+            return self.solveHuber(distances, signalVariance)
+        if solver == 'ransac':
+            return self.solveRansac(distances, signalVariance)
+        raise ValueError("Unknown solver: " + str(solver))
+
+    # getAPWeights
+        # Description:
+            # Inverse-variance weight of every access point's circle
+            # equation. With the log model, an error of 's' dB on the
+            # signal turns into a relative error of ln(10)*s/(10*n) on
+            # the distance, so d^2 has a variance of roughly
+            #   d^4 * (ln(10)/(5*n))^2 * signalVariance
+            # Far access points and weakly attenuated ones get small
+            # weights. 'signalVariance' defaults to 1 dB^2 for every AP.
+            # Weights are normalized to a maximum of 1 per scan. Access
+            # points with a NaN distance (not heard) get a weight of 0.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # signalVariance: (optional) (count,) or (N, count) array-like
+        # ----------------------------------------
+        # Output: (N, count) numpy array
+    def getAPWeights(self, distances, signalVariance=None):
+        variance = (distances**4)*((numpy.log(10)/(5*self.attenuation))**2)
+        if signalVariance is not None:
+            variance = variance*numpy.asarray(signalVariance, dtype=numpy.float64)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            weights = 1.0/variance
+            weights = numpy.where(numpy.isnan(weights), 0.0, weights)
+            weights = weights/numpy.max(weights, axis=1, keepdims=True)
+        return numpy.where(numpy.isfinite(weights), weights, 0.0)
+
+    # getRanges
+        # Description:
+            # Distance from every position of a batch to every access point.
+        # ----------------------------------------
+        # Input:
+            # positions: (N, dimensions) numpy array
+        # ----------------------------------------
+        # Output: (N, count) numpy array
+    def getRanges(self, positions):
+        if self.dimensions == 2:
+            return numpy.hypot(positions[:, 0:1]-self.apX, positions[:, 1:2]-self.apY)
+        return numpy.sqrt(sum((positions[:, i:i+1]-c)**2 for i, c in enumerate(self.apCoordinates)))
+
+    # getSignalResiduals
+        # Description:
+            # Range residual of every access point for a batch of positions,
+            # converted to dB with the log model, so that residuals of near
+            # and far access points can be compared.
+            #   r = 10*n*log10(|position-AP| / d)
+        # ----------------------------------------
+        # Input:
+            # positions: (N, dimensions) numpy array
+            # distances: (N, count) numpy array
+        # ----------------------------------------
+        # Output: (N, count) numpy array
+    def getSignalResiduals(self, positions, distances):
+        ranges = self.getRanges(positions)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            return 10*self.attenuation*numpy.log10(ranges/distances)
+
+    # solveWeighted
+        # Description:
+            # Weighted least squares over a batch, with one weight per
+            # access point and scan. Instead of subtracting the last access
+            # point's circle equation (see 'createMatrices'), the weighted
+            # mean of all the circle equations is subtracted, so no single
+            # access point is singled out and a weight of 0 drops an access
+            # point completely. Access points with a non-finite distance
+            # (not heard) are dropped the same way, whatever their weight.
+            # The normal equations of every scan are solved in closed
+            # form, all at once (see 'solveNormalEquations').
+            # Scans that can't be solved (less than dimensions+1 usable
+            # access points, collinear/coplanar access points) give NaN.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # weights: (N, count) numpy array
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def solveWeighted(self, distances, weights):
+        k = sum(c**2 for c in self.apCoordinates)
+        usable = numpy.isfinite(distances)
+        weights = numpy.where(usable, weights, 0.0)
+        d2 = numpy.where(usable, distances, 0.0)**2
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            total = numpy.sum(weights, axis=1, keepdims=True)
+            columns = [2*(c-numpy.sum(weights*c, axis=1, keepdims=True)/total) for c in self.apCoordinates]
+            rhs = (k-numpy.sum(weights*k, axis=1, keepdims=True)/total)-(d2-numpy.sum(weights*d2, axis=1, keepdims=True)/total)
+            positions = self.solveNormalEquations(columns, weights, rhs)
+        positions[~numpy.isfinite(positions)] = numpy.nan
+        return positions
+
+    # solveNormalEquations
+        # Description:
+            # Weighted least squares normal equations of a batch, solved
+            # in closed form (2x2 or 3x3 inverse), one system per row:
+            #   (J_transposed*W*J)*x = J_transposed*W*rhs
+            # where the columns of 'J' are given as separate arrays. The
+            # diagonal is scaled by (1+damping) if 'damping' is given
+            # (Levenberg-Marquardt). Singular systems give inf/NaN.
+        # ----------------------------------------
+        # Input:
+            # columns: list of 2 or 3 (N, count) (or (count,)) arrays
+            # weights, rhs: (N, count) numpy arrays
+            # damping: (optional) (N,) numpy array
+        # ----------------------------------------
+        # Output: (N, len(columns)) numpy array
+    @staticmethod
+    def solveNormalEquations(columns, weights, rhs, damping=None):
+        a = {}
+        for i in range(len(columns)):
+            for j in range(i, len(columns)):
+                a[i, j] = numpy.sum(weights*columns[i]*columns[j], axis=1)
+            if damping is not None:
+                a[i, i] = a[i, i]*(1+damping)
+        b = [numpy.sum(weights*column*rhs, axis=1) for column in columns]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            if len(columns) == 2:
+                det = (a[0, 0]*a[1, 1])-(a[0, 1]**2)
+                return numpy.column_stack((
+                    (a[1, 1]*b[0]-a[0, 1]*b[1])/det,
+                    (a[0, 0]*b[1]-a[0, 1]*b[0])/det
+                ))
+            # Cofactors of the symmetric 3x3 matrix.
+            c00 = a[1, 1]*a[2, 2]-a[1, 2]**2
+            c01 = a[0, 2]*a[1, 2]-a[0, 1]*a[2, 2]
+            c02 = a[0, 1]*a[1, 2]-a[0, 2]*a[1, 1]
+            c11 = a[0, 0]*a[2, 2]-a[0, 2]**2
+            c12 = a[0, 1]*a[0, 2]-a[0, 0]*a[1, 2]
+            c22 = a[0, 0]*a[1, 1]-a[0, 1]**2
+            det = a[0, 0]*c00+a[0, 1]*c01+a[0, 2]*c02
+            return numpy.column_stack((
+                (c00*b[0]+c01*b[1]+c02*b[2])/det,
+                (c01*b[0]+c11*b[1]+c12*b[2])/det,
+                (c02*b[0]+c12*b[1]+c22*b[2])/det
+            ))
+
+    # solveHuber
+        # Description:
+            # Iteratively reweighted least squares. Starts from the
+            # weighted solution, then down-weights access points whose
+            # residual (see 'getSignalResiduals') is more than 'k' robust
+            # standard deviations (1.4826*MAD) away, with the Huber weight
+            # min(1, k*sigma/|r|). Stops after 'iterations' passes.
+            # Access points that were not heard are left out of the MAD.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # signalVariance: (optional) see 'getAPWeights'
+            # k = 1.345, iterations = 10
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def solveHuber(self, distances, signalVariance=None, k=1.345, iterations=10):
+        weights = self.getAPWeights(distances, signalVariance)
+        positions = self.solveWeighted(distances, weights)
+        for _ in range(iterations):
+            residuals = numpy.abs(self.getSignalResiduals(positions, distances))
+            with warnings.catch_warnings():
+                # Scans that can't be solved have no residual at all.
+                warnings.simplefilter('ignore', RuntimeWarning)
+                sigma = 1.4826*numpy.nanmedian(residuals, axis=1, keepdims=True)
+            sigma = numpy.maximum(sigma, 1e-6)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                huber = numpy.minimum(1.0, (k*sigma)/residuals)
+            huber = numpy.where(numpy.isfinite(huber), huber, 1.0)
+            positions = self.solveWeighted(distances, weights*huber)
+        return positions
+
+    # solveRansac
+        # Description:
+            # Drops outlier access points. Every trial solves the scans
+            # with dimensions+1 access points only (3 in 2D, 4 in 3D),
+            # then marks the access points whose residual (see
+            # 'getSignalResiduals') is within 'threshold' dB as inliers.
+            # Trials are scored with a truncated squared residual (MSAC):
+            # inliers add r^2, outliers threshold^2. Between subsets with
+            # the same inliers the tighter fit wins, and a subset built on
+            # an outlier can't win by dragging every residual just under
+            # 'threshold'. The best consensus set of each scan is then
+            # solved with weighted least squares. All subsets are tried
+            # if there are at most 'trials' of them, otherwise 'trials'
+            # random subsets (seeded, so results are repeatable). Access
+            # points that were not heard are never inliers. Scans with no
+            # consensus of at least dimensions+1 keep every access point.
+        # ----------------------------------------
+        # Input:
+            # distances: (N, count) numpy array
+            # signalVariance: (optional) see 'getAPWeights'
+            # threshold = 6 (dB), trials = 64, seed = 0
+        # ----------------------------------------
+        # Output: (N, dimensions) numpy array
+    def solveRansac(self, distances, signalVariance=None, threshold=6.0, trials=64, seed=0):
+        size = self.dimensions+1
+        # Stops after trials+1 subsets, large tables have far too many to list.
+        subsets = list(islice(combinations(range(self.count), size), trials+1))
+        if len(subsets) > trials:
+            random = numpy.random.RandomState(seed)
+            subsets = [random.choice(self.count, size, replace=False) for _ in range(trials)]
+        best_mask = numpy.ones(distances.shape, dtype=bool)
+        best_cost = numpy.full(distances.shape[0], numpy.inf)
+        for subset in subsets:
+            subset_weights = numpy.zeros(distances.shape)
+            subset_weights[:, list(subset)] = 1.0
+            positions = self.solveWeighted(distances, subset_weights)
+            residuals = numpy.abs(self.getSignalResiduals(positions, distances))
+            with numpy.errstate(invalid='ignore'):
+                mask = residuals <= threshold
+            inliers = numpy.sum(mask, axis=1)
+            cost = numpy.sum(numpy.where(mask, residuals, threshold)**2, axis=1)
+            better = (cost < best_cost) & (inliers >= size)
+            best_mask[better] = mask[better]
+            best_cost[better] = cost[better]
+        weights = self.getAPWeights(distances, signalVariance)*best_mask
+        return self.solveWeighted(distances, weights)
@@ -0,0 +1,167 @@
+from collections import deque # Used to bound the number of chunks in flight
+from itertools import islice # Used to cut the input records into chunks
+from multiprocessing import Pool, cpu_count # Used to spread the work over every core
+
+import numpy # Used to batch the signal vectors of a chunk
+
+from .scan import RSSI_Scan
+from .localize import RSSI_Localizer
+
+# Per-process state, built once by '_initWorker' in every worker process.
+_worker = None
+
+def _initWorker(accessPoints, networks, macs):
+    global _worker
+    _worker = RSSI_PipelineWorker(accessPoints, networks, macs)
+
+def _processChunk(task):
+    start, raw_scans = task
+    return start, _worker.getPositions(raw_scans)
+
+# RSSI_PipelineWorker
+    # Description:
+        # Does the work of a single pipeline process: parses raw scans
+        # (see 'RSSI_Scan.iterCells'), filters them (see
+        # 'RSSI_Scan.filterAccessPoints') and localizes a whole chunk of
+        # them at once (see 'RSSI_Localizer.getNodePositions').
+        # Can also be used on its own, without any process pool.
+    # -------------------------------------------------------
+    # Input: accessPoints (see 'RSSI_Localizer'), networks and macs
+        # (see 'RSSI_Scan.getAPinfo')
+class RSSI_PipelineWorker(object):
+    def __init__(self, accessPoints, networks=False, macs=False):
+        self.localizer = RSSI_Localizer(accessPoints)
+        self.networks = RSSI_Scan.toLookupSet(networks)
+        self.macs = RSSI_Scan.toLookupSet(macs, upper=True)
+        # Scans are lined up by MAC when every access point has one,
+        # otherwise the filtered scan order is used (as in 'getAPinfo').
+        self.byMac = None not in self.localizer.macs
+
+    # getSignalVector
+        # Description:
+            # Parses one raw scan into a signal vector in the localizer's
+            # order. A scan that can't be lined up gives a NaN vector.
+        # -----------------------------------------------
+        # Input: raw 'iwlist' output (str or bytes)
+        # -----------------------------------------------
+        # Returns: (count,) numpy array
+    def getSignalVector(self, raw_scan):
+        cells = list(RSSI_Scan.iterCells(raw_scan.splitlines()))
+        if self.networks is not None or self.macs is not None:
+            cells = RSSI_Scan.filterAccessPoints(cells, self.networks, self.macs)
+        if self.byMac:
+            return self.localizer.getSignalVector(cells)
+        if len(cells) != self.localizer.count:
+            return numpy.full(self.localizer.count, numpy.nan)
+        return numpy.array([cell['signal'] for cell in cells], dtype=numpy.float64)
+
+    # getPositions
+        # Description:
+            # Localizes a chunk of raw scans in one batched solve.
+        # -----------------------------------------------
+        # Input: (Array of raw 'iwlist' outputs)
+        # -----------------------------------------------
+        # Returns: (N, dimensions) numpy array
+    def getPositions(self, raw_scans):
+        if not raw_scans:
+            return numpy.empty((0, self.localizer.dimensions))
+        signals = numpy.vstack([self.getSignalVector(raw_scan) for raw_scan in raw_scans])
+        return self.localizer.getNodePositions(signals)
+
+# RSSI_Pipeline
+    # Use:
+        # from rssi.pipeline import RSSI_Pipeline
+        # with RSSI_Pipeline(accessPoints, networks=ssids) as pipeline:
+        #     for start, positions in pipeline.iterPositions(raw_scans):
+        #         ...
+    # -------------------------------------------------------
+    # Description:
+        # Offline scan-to-position pipeline spread over a process pool.
+        # Raw scans are cut into chunks of 'chunksize' records; every
+        # worker process builds its localizer once (see
+        # 'RSSI_PipelineWorker') and solves a whole chunk per task, which
+        # keeps IPC overhead low. Only a few chunks per process are in
+        # flight at any time, so inputs of any length are streamed in
+        # bounded memory.
+    # -------------------------------------------------------
+    # Input:
+        # accessPoints: see 'RSSI_Localizer'
+        # networks, macs: see 'RSSI_Scan.getAPinfo'
+        # processes: worker processes (defaults to the number of cores)
+        # chunksize: records per task (256)
+class RSSI_Pipeline(object):
+    def __init__(self, accessPoints, networks=False, macs=False, processes=None, chunksize=256):
+        self.chunksize = chunksize
+        self.dimensions = RSSI_Localizer.getDimensions(accessPoints)
+        self.pool = Pool(processes, _initWorker, (accessPoints, networks, macs))
+        self.maxPending = 2*(processes or cpu_count())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # close
+        # Description:
+            # Shuts the worker processes down.
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    # iterPositions
+        # Description:
+            # Localizes every raw scan in 'raw_scans' (any iterable).
+            # With ordered=True, chunks come back in input order. With
+            # ordered=False, each chunk is returned as soon as it is done.
+            # Either way, 'start' is the index of the chunk's first record
+            # in the input.
+        # -----------------------------------------------
+        # Input:
+            # raw_scans = iterable of raw 'iwlist' outputs (str or bytes),
+            #     e.g. 'RSSI_ScanReplay.iterRawOutputs()'
+            # ordered = True || False
+        # -----------------------------------------------
+        # Yields: (start, (N, dimensions) numpy array) per chunk
+    def iterPositions(self, raw_scans, ordered=True):
+        records = iter(raw_scans)
+        pending = deque()
+        start = 0
+        while True:
+            chunk = list(islice(records, self.chunksize))
+            if chunk:
+                pending.append(self.pool.apply_async(_processChunk, ((start, chunk),)))
+                start += len(chunk)
+            while pending and (len(pending) >= self.maxPending or not chunk):
+                yield self.popResult(pending, ordered)
+            if not chunk:
+                return
+
+    # popResult
+        # Description:
+            # Waits for the next result: the oldest one when ordered,
+            # otherwise whichever finishes first.
+    @staticmethod
+    def popResult(pending, ordered):
+        if ordered:
+            return pending.popleft().get()
+        while True:
+            for result in pending:
+                if result.ready():
+                    pending.remove(result)
+                    return result.get()
+            pending[0].wait(0.001)
+
+    # getPositions
+        # Description:
+            # Convenience wrapper around 'iterPositions' that collects every
+            # position, in input order, into one array.
+        # -----------------------------------------------
+        # Input: iterable of raw 'iwlist' outputs
+        # -----------------------------------------------
+        # Returns: (N, dimensions) numpy array
+    def getPositions(self, raw_scans):
+        chunks = [positions for start, positions in self.iterPositions(raw_scans)]
+        if not chunks:
+            return numpy.empty((0, self.dimensions))
+        return numpy.vstack(chunks)
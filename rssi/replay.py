@@ -0,0 +1,172 @@
+import gzip # Used to read compressed captures
+import os # Used to walk capture directories
+
+import numpy # Used to batch replayed scans for the localizer
+
+from .scan import RSSI_Scan
+
+# RSSI_ScanReplay
+    # Use:
+        # from rssi.replay import RSSI_ScanReplay
+        # rssi_replay_instance = RSSI_ScanReplay(['captures/', 'monday.log.gz'])
+    # -------------------------------------------------------
+    # Description:
+        # Replays recorded 'iwlist' output instead of running a live scan.
+        # Each path can be a capture file or a directory (walked in sorted
+        # order). A capture holds one or more raw outputs of
+        # 'getRawNetworkScan' concatenated together; files ending in '.gz'
+        # are decompressed on the fly. A new scan starts at every
+        # unindented line ("wlp1s0    Scan completed :").
+        # Captures are streamed one scan at a time, so archives of any size
+        # can be replayed in constant memory.
+        # 'getAPinfo' and 'iterAPinfo' return the next recorded scan on
+        # every call ('getAPinfo' gives False once the captures are
+        # exhausted), so a replay can stand in for a live 'RSSI_Scan'.
+    # -------------------------------------------------------
+    # Input: capture file and/or directory paths
+        # ['captures/', 'monday.log.gz']
+class RSSI_ScanReplay(RSSI_Scan):
+    def __init__(self, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        RSSI_Scan.__init__(self, 'replay')
+        self.paths = list(paths)
+        self.rawScans = None
+
+    # iterPaths
+        # Description:
+            # Expands directories into the capture files they contain.
+        # -----------------------------------------------
+        # Yields: capture file paths
+    def iterPaths(self):
+        for path in self.paths:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        yield os.path.join(root, name)
+            else:
+                yield path
+
+    # openCapture
+        # Description:
+            # Opens a capture file in binary mode, decompressing '.gz' files.
+        # -----------------------------------------------
+        # Returns: file object
+    @staticmethod
+    def openCapture(path):
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rb')
+        return open(path, 'rb')
+
+    # iterRawScans
+        # Description:
+            # Splits every capture into the raw lines of each recorded scan.
+        # -----------------------------------------------
+        # Yields: (Array of raw lines, one array per scan)
+            # [b'wlp1s0    Scan completed :\n',
+            #  b'          Cell 01 - Address: A0:3D:6F:26:77:8E\n',
+            #  ...]
+    def iterRawScans(self):
+        for path in self.iterPaths():
+            with self.openCapture(path) as capture:
+                scan_lines = None
+                for line in capture:
+                    if line.strip() and not line[:1].isspace():
+                        # Unindented line, a new scan starts here.
+                        if scan_lines is not None:
+                            yield scan_lines
+                        scan_lines = []
+                    if scan_lines is not None:
+                        scan_lines.append(line)
+                if scan_lines is not None:
+                    yield scan_lines
+
+    # iterRawOutputs
+        # Description:
+            # Every recorded scan as one raw output, in the format of the
+            # live 'getRawNetworkScan' and of 'RSSI_Pipeline.iterPositions'.
+        # -----------------------------------------------
+        # with RSSI_Pipeline(accessPoints) as pipeline:
+        #     for start, positions in pipeline.iterPositions(replay.iterRawOutputs()):
+        #         ...
+        # -----------------------------------------------
+        # Yields: (bytes) raw output, one per scan
+    def iterRawOutputs(self):
+        for scan_lines in self.iterRawScans():
+            yield b''.join(scan_lines)
+
+    # iterScans
+        # Description:
+            # Parses every recorded scan (see 'RSSI_Scan.iterCells') and
+            # applies the same filters as 'getAPinfo'.
+        # -----------------------------------------------
+        # Input: (optional)
+            # networks, macs (see 'RSSI_Scan.getAPinfo')
+        # -----------------------------------------------
+        # Yields: (Array of dictionaries, one array per scan)
+            # [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+    def iterScans(self, networks=False, macs=False):
+        for scan_lines in self.iterRawScans():
+            cells = list(self.iterCells(scan_lines))
+            if networks or macs:
+                cells = self.filterAccessPoints(cells, networks, macs)
+            yield cells
+
+    # iterPositions
+        # Description:
+            # Streams every recorded scan through a localizer.
+            # Scans are lined up with the localizer's access points by
+            # MAC (see 'RSSI_Localizer.getSignalVector') and solved
+            # 'batch_size' at a time with 'getNodePositions'. Scans that
+            # miss one of the localizer's access points give NaN positions.
+        # -----------------------------------------------
+        # Input:
+            # localizer = RSSI_Localizer (with a 'mac' for every access point)
+            # batch_size = scans solved per batch (1024)
+        # -----------------------------------------------
+        # Yields: (N, dimensions) numpy array per batch, in capture order
+    def iterPositions(self, localizer, batch_size=1024):
+        batch = []
+        for cells in self.iterScans():
+            batch.append(localizer.getSignalVector(cells))
+            if len(batch) == batch_size:
+                yield localizer.getNodePositions(numpy.vstack(batch))
+                batch = []
+        if batch:
+            yield localizer.getNodePositions(numpy.vstack(batch))
+
+    # getRawNetworkScan
+        # Description:
+            # Returns the next recorded scan, in the same format as the live
+            # 'RSSI_Scan.getRawNetworkScan'. Once every capture has been
+            # replayed, the output is empty.
+        # ----------------------------------------------------------------
+        # Input: sudo (ignored)
+        # ----------------------------------------------------------------
+        # Returns: Raw terminal output
+            # {
+            #     'output':b'''wlp1s0    Scan completed : ...''',
+            #     'error':b''
+            # }
+    def getRawNetworkScan(self, sudo=False):
+        if self.rawScans is None:
+            self.rawScans = self.iterRawOutputs()
+        return {'output':next(self.rawScans, b''),'error':b''}
+
+    # iterAPinfo
+        # Description:
+            # Parses the next recorded scan (see 'getRawNetworkScan')
+            # instead of running 'iwlist'. Takes the same filters as
+            # 'RSSI_Scan.iterAPinfo'; yields nothing once every capture
+            # has been replayed.
+        # ----------------------------------------------------------------
+        # Input: (optional)
+            # networks, sudo (ignored), macs
+        # ----------------------------------------------------------------
+        # Yields: (dictionary per access point)
+            # {'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}
+    def iterAPinfo(self, networks=False, sudo=False, macs=False):
+        cells = self.iterCells(self.getRawNetworkScan(sudo)['output'].splitlines())
+        for cell in self.filterAccessPoints(cells, networks, macs):
+            yield cell
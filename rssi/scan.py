@@ -0,0 +1,1009 @@
+from subprocess import Popen, PIPE # Used to run native OS commads in python wrapped subproccess
+from sys import version_info # Used to check the Python-interpreter version at runtime
+from threading import Thread, Event, Lock # Used to run scans concurrently and in the background
+from time import time # Used to timestamp scan samples
+from .instrumentation import clock # Used for the opt-in hot path timers
+
+# RSSI_Registry
+    # Use:
+        # from rssi import RSSI_Registry
+        # registry = RSSI_Registry()
+        # registry.getId('A0:3D:6F:26:77:8E')  # 0
+        # registry.getValue(0)                 # 'A0:3D:6F:26:77:8E'
+    # -------------------------------------------------------
+    # Description:
+        # Interns strings (MACs, SSIDs) into small consecutive integer ids,
+        # so millions of records can share a few hundred strings and be
+        # grouped with integer operations. Ids are never reused.
+class RSSI_Registry(object):
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    # getId
+        # Description:
+            # Id of 'value', registering it on first sight.
+    def getId(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            with self.lock:
+                value_id = self.ids.get(value)
+                if value_id is None:
+                    value_id = len(self.values)
+                    self.values.append(value)
+                    self.ids[value] = value_id
+        return value_id
+
+    # getValue
+        # Description:
+            # String registered under 'value_id'.
+    def getValue(self, value_id):
+        return self.values[value_id]
+
+# RSSI_Record
+    # Description:
+        # Compact scan record emitted by 'RSSI_Scan.iterRecords'.
+        #   mac:     MAC id (see 'RSSI_Registry')
+        #   ssid:    SSID id (see 'RSSI_Registry')
+        #   signal:  signal level in dBm (int, None if missing)
+        #   quality: quality ratio ('43/70' -> 0.614...)
+class RSSI_Record(object):
+    __slots__ = ('mac', 'ssid', 'signal', 'quality')
+
+    def __init__(self, mac, ssid, signal, quality):
+        self.mac = mac
+        self.ssid = ssid
+        self.signal = signal
+        self.quality = quality
+
+    def __repr__(self):
+        return 'RSSI_Record(mac=%r, ssid=%r, signal=%r, quality=%r)' % (self.mac, self.ssid, self.signal, self.quality)
+
+# RSSI_Scan
+    # Use:
+        # from rssi import RSSI_Scan
+        # rssi_scan_instance = RSSI_Scan('network_interface_name) 
+    # -------------------------------------------------------
+    # Description:
+        # Allows a user to query all available accesspoints available.
+        # User has the option of define a specific set of access 
+        # points to query.
+    # -------------------------------------------------------
+    # Input: interface name
+        # [ie. network interface names: wlp1s0m, docker0, wlan0] 
+class RSSI_Scan(object):
+    # Opt-in timers and counters (see 'RSSI_Instrumentation'). Set it
+    # on the class or on one instance; None disables them.
+    instrumentation = None
+
+    # Allows us to declare a network interface externally.
+    # 'scanBuffer' holds the samples of the continuous-scan mode
+    # (see 'startContinuousScan').
+    # 'macRegistry' and 'ssidRegistry' intern MACs and SSIDs for
+    # 'iterRecords'; pass the same registries to several scanners to
+    # share their ids.
+    # 'backend' replaces the 'iwlist' scan of 'getAPinfo' (see
+    # 'rssi.backends'); 'iwlist' is used when it is None.
+    def __init__(self, interface, macRegistry=None, ssidRegistry=None, backend=None):
+        self.interface = interface
+        self.backend = backend
+        self.macRegistry = macRegistry if macRegistry is not None else RSSI_Registry()
+        self.ssidRegistry = ssidRegistry if ssidRegistry is not None else RSSI_Registry()
+        self.scanBuffer = None
+        self.scanThread = None
+        self.scanStop = None
+        self.scanError = None
+        # Scan cache (see 'enableCache'). 'cache' is (time, sudo, access points).
+        self.cacheTTL = None
+        self.cache = None
+        self.cacheLock = Lock()
+        self.cacheInflight = None
+
+    # getRawNetworkScan
+        # Description:
+            # Runs the Ubuntu command 'iwlist' to scan for available networks.
+            # Returns the raw console window output (unparsed).
+        # ----------------------------------------------------------------
+        # Input: (optional) 
+            #   sudo: bool; defaults to false. False will not refresh the 
+            #         network interface upon query. Sudo=true will require 
+            #         the user will need to enter a sudo password at runtime.
+        # ----------------------------------------------------------------
+        # Returns: Raw terminal output
+            # {
+            #     'output':'''wlp1s0    Scan completed :
+            #   Cell 01 - Address: A0:3D:6F:26:77:8E
+            #             Channel:144
+            #             Frequency:5.72 GHz
+            #             Quality=43/70  Signal level=-67 dBm  
+            #             Encryption key:on
+            #             ESSID:"ucrwpa"
+            #             Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            #             Mode:Master
+            #   Cell 02 - Address: A0:3D:6F:26:77:82
+            #             Channel:1
+            #             Frequency:2.412 GHz (Channel 1)
+            #             Quality=43/70  Signal level=-67 dBm  
+            #             Encryption key:on
+            #             ESSID:"eduroam"
+            #             Bit Rates:18 Mb/s; 24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            #             Mode:Master''',
+            #     'error':''
+            # }
+    def getRawNetworkScan(self, sudo=False):
+        if self.instrumentation is not None:
+            start = clock()
+        # Open a subprocess running the scan command.
+        scan_process = Popen(self.getScanCommand(sudo), stdout=PIPE, stderr=PIPE)
+        # Returns the 'success' and 'error' output.
+        (raw_output, raw_error) = scan_process.communicate() 
+        # Block all execution, until the scanning completes.
+        scan_process.wait()
+        if self.instrumentation is not None:
+            self.instrumentation.addTime('scan.subprocess', clock()-start)
+        # Returns all output in a dictionary for easy retrieval.
+        return {'output':raw_output,'error':raw_error}
+
+    # getScanCommand
+        # Description:
+            # Builds the 'iwlist interface scan' command for this interface.
+            # Commands need to be fed to 'Popen' as an array.
+        # ----------------------------------------------------------------
+        # Input: (optional)
+            #   sudo: bool; defaults to false. (see 'getRawNetworkScan')
+        # ----------------------------------------------------------------
+        # Returns:
+            # ['sudo', 'iwlist', 'wlp1s0', 'scan']
+    def getScanCommand(self, sudo=False):
+        if sudo:
+            return ['sudo','iwlist',self.interface,'scan']
+        return ['iwlist',self.interface,'scan']
+
+    # getSSID
+        # Description:
+            # Parses the 'SSID' for a given cell.
+        # -----------------------------------------------
+        # Input: (Raw string)
+            # 01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master
+        # -----------------------------------------------
+        # Returns:
+            # 'ucrwpa'
+    @staticmethod
+    def getSSID(raw_cell):
+        ssid = raw_cell.split('ESSID:"')[1]
+        ssid = ssid.split('"')[0]
+        return ssid
+
+    # getQuality
+        # Description:
+            # Parses 'Quality level' for a given cell.
+        # -----------------------------------------------
+        # Input: (Raw string)
+            # 01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master
+        # -----------------------------------------------
+        # Returns:
+            # '43/70'
+    @staticmethod
+    def getQuality(raw_cell):
+        quality = raw_cell.split('Quality=')[1]
+        quality = quality.split(' ')[0]
+        return quality
+
+    # getSignalLevel
+        # Description:
+            # Parses 'Signal level' for a given cell.
+            # Measurement is in 'dBm'.
+        # -----------------------------------------------
+        # Input: (Raw string)
+            # 01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master
+        # -----------------------------------------------
+        # Returns: (string)
+            # '-67'    
+    @staticmethod
+    def getSignalLevel(raw_cell):
+        signal = raw_cell.split('Signal level=')[1]
+        signal = int(signal.split(' ')[0])
+        return signal
+
+    # getMacAddress
+        # Description:
+            # Method returns the MAC address of the AP
+        # -----------------------------------------------
+        #   Input: (Raw string)
+            # 01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master
+        # -----------------------------------------------
+        # Returns: (string)
+            #   'A0:3D:6F:26:77:8E'
+    @staticmethod
+    def getMacAddress(raw_cell):
+        mac = raw_cell.split('Address: ')[1]
+        mac = mac.split(' ')[0]
+        mac = mac.strip()
+        return mac
+
+    # parseCell
+        # Description:
+            # Takes a raw cell string and parses it into a dictionary.
+        # -----------------------------------------------
+        # Input: (Raw string)
+            # '''01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master'''
+        # -----------------------------------------------
+        # Returns:
+            # {
+            #     'ssid':'ucrwpa',
+            #     'quality':'43/70',
+            #     'signal':'-67'
+            # }    
+    def parseCell(self, raw_cell):
+        cell = {
+            'ssid': self.getSSID(raw_cell),
+            'quality': self.getQuality(raw_cell),
+            'signal': self.getSignalLevel(raw_cell),
+            'mac': self.getMacAddress(raw_cell)
+        }
+        return cell
+
+    # formatCells
+        # Description:
+            # Every network listed is considered a 'cell.
+            # This function parses each cell into a dictionary.
+            # Returns list of dictionaries. Makes use of 'parseCell'.
+            # If not networks were detected, returns False.
+        # -----------------------------------------------
+        # Input: (Raw terminal string)
+            # '''01 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=43/70  Signal level=-67 dBm  
+            # Encryption key:on
+            # ESSID:"ucrwpa"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master
+            # 02 - Address: A0:3D:6F:26:77:8E
+            # Channel:144
+            # Frequency:5.72 GHz
+            # Quality=30/70  Signal level=-42 dBm  
+            # Encryption key:on
+            # ESSID:"dd-wrt"
+            # Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+            # Mode:Master'''
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries)
+            # [
+            #     {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':'-67'
+            #     },
+            #     {
+            #         'ssid':'dd-wrt',
+            #         'quality':'30/70',
+            #         'signal':'-42'
+            #     }
+            # ]    
+    def formatCells(self, raw_cell_string):
+        if self.instrumentation is not None:
+            start = clock()
+        # Parse the raw output line by line (see 'iterCells').
+        # Array will hold all parsed cells as dictionaries.
+        formatted_cells = list(self.iterCells(raw_cell_string.splitlines()))
+        if self.instrumentation is not None:
+            self.instrumentation.addTime('scan.parse', clock()-start)
+            self.instrumentation.addCount('scan.cells', len(formatted_cells))
+        if(len(formatted_cells) > 0): # Continue execution, if atleast one network is detected.
+            # Return array of dictionaries, containing cells.
+            return formatted_cells
+        else:
+            print("Networks not detected.")
+            return False
+        # TODO implement function in ndoe to process this boolean (False)
+
+    # iterCells
+        # Description:
+            # Single-pass, line oriented parser for 'iwlist' output.
+            # Consumes any iterable of lines (a list, an open file or a
+            # subprocess' stdout) and yields one dictionary per cell as soon
+            # as the cell is complete, so the full output never has to be
+            # held in memory. Every field is extracted from the line it
+            # lives on; no line is scanned more than once.
+            # A cell without an 'ESSID' line gets an empty ssid, and an
+            # ESSID containing the word 'Cell' is parsed correctly. A
+            # signal level that isn't in dBm is left as None.
+        # -----------------------------------------------
+        # Input: (Iterable of raw lines, str or bytes)
+            # ['wlp1s0    Scan completed :',
+            #  '          Cell 01 - Address: A0:3D:6F:26:77:8E',
+            #  '                    Quality=43/70  Signal level=-67 dBm  ',
+            #  '                    ESSID:"ucrwpa"',
+            #  ...]
+        # -----------------------------------------------
+        # Yields: (dictionary per cell)
+            # {
+            #     'ssid':'ucrwpa',
+            #     'quality':'43/70',
+            #     'signal':-67,
+            #     'mac':'A0:3D:6F:26:77:8E'
+            # }
+    @staticmethod
+    def iterCells(lines):
+        for ssid, quality, signal, mac in RSSI_Scan.iterCellFields(lines):
+            yield {'ssid': ssid, 'quality': quality, 'signal': signal, 'mac': mac}
+
+    # iterCellFields
+        # Description:
+            # The tokenizer behind 'iterCells' and 'iterRecords'. Yields the
+            # fields of every cell as a plain tuple, so each consumer can
+            # build its own record type without an intermediate dictionary.
+        # -----------------------------------------------
+        # Input: (Iterable of raw lines, str or bytes)
+        # -----------------------------------------------
+        # Yields: (ssid, quality, signal, mac)
+            # ('ucrwpa', '43/70', -67, 'A0:3D:6F:26:77:8E')
+    @staticmethod
+    def iterCellFields(lines):
+        mac = None
+        for line in lines:
+            if version_info.major == 3 and isinstance(line, bytes):
+                line = line.decode('utf-8', 'replace')
+            line = line.strip()
+            if line.startswith('Cell '):
+                # A new cell header ends the previous cell.
+                if mac is not None:
+                    yield ssid, quality, signal, mac
+                mac = line.split('Address:', 1)[1].strip() if 'Address:' in line else ''
+                ssid, quality, signal = '', '', None
+            elif mac is None:
+                # Skip the "Scan completed" header.
+                continue
+            elif line.startswith('ESSID:'):
+                ssid = line[6:]
+                if ssid.startswith('"'):
+                    ssid = ssid[1:ssid.rindex('"')] if ssid.count('"') > 1 else ssid[1:]
+            elif line.startswith('Quality'):
+                # 'Quality=43/70  Signal level=-67 dBm'
+                quality = line[8:].split(' ', 1)[0]
+                signal_start = line.find('Signal level')
+                if signal_start >= 0:
+                    level = line[signal_start+13:].split(' ', 1)[0]
+                    # Only dBm levels are kept, some drivers report a
+                    # relative level ('Signal level=60/100') instead.
+                    if '/' not in level:
+                        signal = int(level.replace('dBm', ''))
+        if mac is not None:
+            yield ssid, quality, signal, mac
+
+    # iterRecords
+        # Description:
+            # Same single-pass parser as 'iterCells', but emits compact
+            # 'RSSI_Record' objects: MAC and SSID are interned into integer
+            # ids (see 'self.macRegistry' and 'self.ssidRegistry') and the
+            # quality is a ratio instead of a string.
+        # -----------------------------------------------
+        # Input: (Iterable of raw lines, str or bytes)
+        # -----------------------------------------------
+        # Yields: RSSI_Record
+            # RSSI_Record(mac=0, ssid=0, signal=-67, quality=0.614...)
+    def iterRecords(self, lines):
+        mac_id = self.macRegistry.getId
+        ssid_id = self.ssidRegistry.getId
+        ratio = self.qualityToRatio
+        for ssid, quality, signal, mac in self.iterCellFields(lines):
+            yield RSSI_Record(mac_id(mac.upper()), ssid_id(ssid), signal, ratio(quality))
+
+    # getAPrecords
+        # Description:
+            # 'RSSI_Record' counterpart of 'getAPinfo'. Filtering on
+            # 'networks' compares interned SSID ids. Uses the same scan
+            # source as 'getAPinfo': the scan cache when enabled, then the
+            # scan backend, then 'iwlist'.
+        # -----------------------------------------------
+        # Input: (optional)
+            # networks, sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of RSSI_Record)
+    def getAPrecords(self, networks=False, sudo=False):
+        if self.cacheTTL is not None or self.backend is not None:
+            mac_id = self.macRegistry.getId
+            ssid_id = self.ssidRegistry.getId
+            records = [
+                RSSI_Record(mac_id(point['mac'].upper()), ssid_id(point['ssid']), point['signal'], self.qualityToRatio(point['quality']))
+                for point in self.getAccessPoints(sudo)
+            ]
+        else:
+            raw_scan_output = self.getRawNetworkScan(sudo)['output']
+            records = list(self.iterRecords(raw_scan_output.splitlines()))
+        if networks:
+            ssid_ids = frozenset(self.ssidRegistry.ids.get(name) for name in self.toLookupSet(networks))
+            return [record for record in records if record.ssid in ssid_ids]
+        return records
+
+    # qualityToRatio
+        # Description:
+            # Converts an 'iwlist' quality string into a ratio.
+            # Missing or unparsable values become NaN.
+        # -----------------------------------------------
+        # '43/70' -> 0.6142857
+    @staticmethod
+    def qualityToRatio(quality):
+        try:
+            numerator, denominator = quality.split('/')
+            return float(numerator)/float(denominator)
+        except (AttributeError, ValueError, ZeroDivisionError):
+            return float('nan')
+
+    # iterAPinfo
+        # Description:
+            # Streaming counterpart of 'getAPinfo'. Runs the scan command and
+            # feeds the subprocess' stdout straight into 'iterCells',
+            # yielding access points while 'iwlist' is still writing.
+            # Takes the same optional 'networks', 'sudo' and 'macs'
+            # parameters as 'getAPinfo'.
+        # -----------------------------------------------
+        # Input:
+            # networks = (array of network names)
+            # ['ucrwpa','dd-wrt']
+            # sudo = True || False
+        # -----------------------------------------------
+        # Yields: (dictionary per access point)
+            # {
+            #     'ssid':'ucrwpa',
+            #     'quality':'43/70',
+            #     'signal':-67,
+            #     'mac':'A0:3D:6F:26:77:8E'
+            # }
+    def iterAPinfo(self, networks=False, sudo=False, macs=False):
+        names = self.toLookupSet(networks)
+        mac_set = self.toLookupSet(macs, upper=True)
+        if self.cacheTTL is not None or self.backend is not None:
+            for cell in self.getAccessPoints(sudo):
+                if names is not None and cell['ssid'] not in names:
+                    continue
+                if mac_set is not None and cell['mac'].upper() not in mac_set:
+                    continue
+                yield cell
+            return
+        scan_process = Popen(self.getScanCommand(sudo), stdout=PIPE, stderr=PIPE)
+        try:
+            for cell in self.iterCells(scan_process.stdout):
+                if names is not None and cell['ssid'] not in names:
+                    continue
+                if mac_set is not None and cell['mac'].upper() not in mac_set:
+                    continue
+                yield cell
+        finally:
+            scan_process.stdout.close()
+            scan_process.stderr.close()
+            scan_process.wait()
+
+    # filterAccessPoints
+        # Description:
+            # If the 'networks' parameter is passed to the 'getAPinfo'
+            # function, then this method will filter out all irrelevant 
+            # access-points. Access points specified in 'networks' array 
+            # will be returned (if available).
+            # Access points can also be filtered by BSSID with 'macs'.
+            # When both are given, an access point must match both.
+            # Both filters are turned into sets once (see 'toLookupSet'),
+            # so every access point is checked in O(1). Passing sets
+            # directly avoids even that conversion.
+        # -----------------------------------------------
+        # Input: (Parsed array of cell dictionaries)
+            # all_access_points = 
+            # [
+            #     {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':'-67'
+            #     },
+            #     {
+            #         'ssid':'dd-wrt',
+            #         'quality':'30/70',
+            #         'signal':'-42'
+            #     },
+            #     {
+            #         'ssid':'linksys',
+            #         'quality':'58/70',
+            #         'signal':'-24'
+            #     }
+            # ] 
+            # network_names = (array of network names)
+            # ['ucrwpa','dd-wrt']
+            # macs = (optional array of BSSIDs)
+            # ['A0:3D:6F:26:77:8E']
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries)
+            # [
+            #     {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':'-67'
+            #     },
+            #     {
+            #         'ssid':'dd-wrt',
+            #         'quality':'30/70',
+            #         'signal':'-42'
+            #     }
+            # ] 
+    @staticmethod
+    def filterAccessPoints(all_access_points, network_names=False, macs=False):
+        names = RSSI_Scan.toLookupSet(network_names)
+        mac_set = RSSI_Scan.toLookupSet(macs, upper=True)
+        focus_points = [] # Array holding the access-points of concern.
+        # Iterate throguh all access-points found.
+        for point in all_access_points:
+            # Check if current AP is in our desired list.
+            if names is not None and point['ssid'] not in names:
+                continue
+            if mac_set is not None and point['mac'].upper() not in mac_set:
+                continue
+            focus_points.append(point)
+        return focus_points
+        # TODO implement something incase our desired ones were not found
+
+    # toLookupSet
+        # Description:
+            # Turns a filter list into a set for O(1) membership checks.
+            # Sets are returned untouched (unless 'upper' is requested),
+            # and a single name or BSSID is treated as a one-element list.
+            # Returns None when no filter was given.
+        # -----------------------------------------------
+        # Input:
+            # values = ['a0:3d:6f:26:77:8e'], upper = True
+        # -----------------------------------------------
+        # Returns:
+            # set(['A0:3D:6F:26:77:8E'])
+    @staticmethod
+    def toLookupSet(values, upper=False):
+        if not values:
+            return None
+        if isinstance(values, (str, bytes)) or (version_info.major == 2 and isinstance(values, unicode)):
+            values = [values]
+        if upper:
+            return frozenset(value.upper() for value in values)
+        if isinstance(values, (set, frozenset)):
+            return values
+        return frozenset(values)
+
+    # orderAccessPoints
+        # Description:
+            # Lines access points up with a fixed list of BSSIDs, such as
+            # the 'macs' of an 'RSSI_Localizer'. Position 'i' of the result
+            # holds the access point whose MAC is macs[i], or None if it
+            # was not heard. Runs in O(APs + macs).
+        # -----------------------------------------------
+        # Input:
+            # all_access_points = (Parsed array of cell dictionaries)
+            # macs = ['A0:3D:6F:26:77:82', 'A0:3D:6F:26:77:8E']
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries or None)
+            # [
+            #     None,
+            #     {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':-67,
+            #         'mac':'A0:3D:6F:26:77:8E'
+            #     }
+            # ]
+    @staticmethod
+    def orderAccessPoints(all_access_points, macs):
+        index = dict((mac.upper(), i) for i, mac in enumerate(macs))
+        ordered_points = [None]*len(index)
+        for point in all_access_points:
+            i = index.get(point['mac'].upper())
+            if i is not None:
+                ordered_points[i] = point
+        return ordered_points
+ 
+    # getAPinfo
+        # Description:
+            # Method returns all (or chosen) available access points (in range).
+            # Takes 2 optional parameters: 
+            #   'networks' (array): 
+            #       Lists all ssid's of concern. Will return only the available access 
+            #       points listed here. If not provided, will return ALL access-points in range.        
+            #   'macs' (array): 
+            #       Lists all BSSIDs of concern (see 'filterAccessPoints').
+            #   'sudo' (bool): 
+            #       Whether of not method should use sudo privileges. If user uses sudo
+            #       privileges, the network manager will be refreshed and will return 
+            #       a fresh list of access-points available. If sudo is not provided, 
+            #       a cached list will be returned. Cached list gets updated periodically.
+        # -----------------------------------------------
+        # Input: (Parsed array of cell dictionaries)
+            # networks = (array of network names)
+            # ['ucrwpa','dd-wrt']
+            # sudo = True || False
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries)
+            # [
+            #     {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':'-67'
+            #     },
+            #     {
+            #         'ssid':'dd-wrt',
+            #         'quality':'30/70',
+            #         'signal':'-42'
+            #     }
+            # ] 
+    def getAPinfo(self, networks=False, sudo=False, macs=False):
+        if self.cacheTTL is not None or self.backend is not None:
+            return self.selectAccessPoints(self.getAccessPoints(sudo), networks, macs)
+        # TODO implement error callback if error is raise in subprocess
+        # Unparsed access-point listing. AccessPoints are strings.
+        raw_scan_output = self.getRawNetworkScan(sudo)['output']
+        return self.parseNetworkScan(raw_scan_output, networks, macs)
+
+    # getAccessPoints
+        # Description:
+            # Every access point of one scan, served from the shared scan
+            # cache when it is enabled (see 'enableCache'), otherwise
+            # scanned right away (see 'scanAccessPoints').
+        # -----------------------------------------------
+        # Input: sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    def getAccessPoints(self, sudo=False):
+        if self.cacheTTL is not None:
+            return self.getCachedAccessPoints(sudo)
+        return self.scanAccessPoints(sudo)
+
+    # scanAccessPoints
+        # Description:
+            # Runs one scan and returns every access point found, using the
+            # scan backend if one was given (see 'rssi.backends'), or
+            # 'iwlist' otherwise.
+        # -----------------------------------------------
+        # Input: sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    def scanAccessPoints(self, sudo=False):
+        if self.backend is not None:
+            if self.instrumentation is None:
+                return self.backend.getAccessPoints(self.interface, sudo)
+            start = clock()
+            access_points = self.backend.getAccessPoints(self.interface, sudo)
+            self.instrumentation.addTime('scan.backend', clock()-start)
+            return access_points
+        raw_scan_output = self.getRawNetworkScan(sudo)['output']
+        return self.parseNetworkScan(raw_scan_output) or []
+
+    # enableCache / disableCache
+        # Description:
+            # Opt-in scan cache for 'getAPinfo'. A scan's parsed results are
+            # reused by every caller for 'ttl' seconds, whatever 'networks'
+            # or 'macs' they filter on. Callers that arrive while a scan is
+            # running wait for it instead of starting their own, so only
+            # one scan command runs at a time. A result scanned with
+            # sudo=True also serves sudo=False callers, but not the other
+            # way around. Cached dictionaries are shared between callers
+            # and must not be modified.
+        # -----------------------------------------------
+        # Input:
+            # ttl = seconds a scan stays fresh (2.0)
+    def enableCache(self, ttl=2.0):
+        self.cacheTTL = ttl
+
+    def disableCache(self):
+        self.cacheTTL = None
+        self.cache = None
+
+    # isCacheFresh
+        # Description:
+            # Whether the cached scan can serve a caller asking for 'sudo'.
+    def isCacheFresh(self, sudo=False):
+        if self.cache is None or self.cacheTTL is None:
+            return False
+        scanned_at, scanned_with_sudo, access_points = self.cache
+        return (time()-scanned_at) < self.cacheTTL and (scanned_with_sudo or not sudo)
+
+    # getCachedAccessPoints
+        # Description:
+            # Every access point of the latest scan, running a new scan
+            # only when the cache is stale and no other caller is already
+            # scanning. If the scan being waited on fails, the next waiter
+            # retries it.
+        # -----------------------------------------------
+        # Input: sudo (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries), possibly empty
+    def getCachedAccessPoints(self, sudo=False):
+        while True:
+            with self.cacheLock:
+                if self.isCacheFresh(sudo):
+                    return self.cache[2]
+                inflight = self.cacheInflight
+                owner = inflight is None
+                if owner:
+                    inflight = self.cacheInflight = Event()
+            if not owner:
+                if self.waitForCachedScan(inflight):
+                    continue
+                # Cannot wait for that scan, run one without the cache.
+                return self.scanAccessPoints(sudo)
+            try:
+                access_points = self.scanAccessPoints(sudo)
+                with self.cacheLock:
+                    self.cache = (time(), sudo, access_points)
+                return access_points
+            finally:
+                with self.cacheLock:
+                    self.cacheInflight = None
+                inflight.set()
+
+    # waitForCachedScan
+        # Description:
+            # Blocks until the scan another caller is running for the cache
+            # ends. Returns False when that scan cannot be waited on from
+            # here (see 'RSSI_AsyncScan').
+    def waitForCachedScan(self, inflight):
+        inflight.wait()
+        return True
+
+    # parseNetworkScan
+        # Description:
+            # Turns the raw output of a scan (see 'getRawNetworkScan') into
+            # the list returned by 'getAPinfo'. Shared by every scan source
+            # (blocking, asynchronous, ...), so they all parse and filter
+            # access-points the same way.
+        # -----------------------------------------------
+        # Input:
+            # raw_scan_output = raw 'iwlist' output (str or bytes)
+            # networks = (array of network names), or False for ALL.
+            # macs = (array of BSSIDs), or False for ALL.
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries) or False if nothing was found.
+            # (see 'getAPinfo')
+    def parseNetworkScan(self, raw_scan_output, networks=False, macs=False):
+        if version_info.major == 3 and isinstance(raw_scan_output, bytes):
+            raw_scan_output = raw_scan_output.decode('utf-8')
+        # Parsed access-point listing. Access-points are dictionaries.
+        all_access_points = self.formatCells(raw_scan_output)
+        return self.selectAccessPoints(all_access_points, networks, macs)
+
+    # selectAccessPoints
+        # Description:
+            # Applies the 'networks' and 'macs' filters of 'getAPinfo' to
+            # parsed access points. Always returns a new list, or False if
+            # nothing was found.
+        # -----------------------------------------------
+        # Input:
+            # all_access_points = (Parsed array of cell dictionaries)
+            # networks, macs (see 'getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Array of dictionaries) or False (see 'getAPinfo')
+    def selectAccessPoints(self, all_access_points, networks=False, macs=False):
+        # Checks if access-points were found.
+        if all_access_points:
+            # Checks if specific networks were declared.
+            if networks or macs:
+                # Return specific access-points found.
+                if self.instrumentation is None:
+                    return self.filterAccessPoints(all_access_points, networks, macs)
+                start = clock()
+                access_points = self.filterAccessPoints(all_access_points, networks, macs)
+                self.instrumentation.addTime('scan.filter', clock()-start)
+                return access_points
+            else:
+                # Return ALL access-points found.
+                return list(all_access_points)
+        else:
+            # No access-points were found. 
+            return False
+
+    # startContinuousScan
+        # Description:
+            # Starts a background thread that calls 'getAPinfo' every
+            # 'interval' seconds and appends every access-point found to a
+            # fixed-size 'RSSI_ScanBuffer'. Memory use stays flat no matter
+            # how long the scan runs; the oldest samples get overwritten.
+            # If a scan raises, the thread stops and the exception is kept
+            # in 'self.scanError'.
+            # Every scan can also be appended to a 'log' (anything with an
+            # 'append(cells, timestamp)' method, such as
+            # 'rssi.storage.RSSI_ScanLogWriter').
+        # -----------------------------------------------
+        # Input: (optional)
+            # interval = seconds between the start of two scans (1.0)
+            # capacity = number of samples kept (4096)
+            # networks, sudo (see 'getAPinfo')
+            # log = RSSI_ScanLogWriter('scans/')
+        # -----------------------------------------------
+        # Returns: the 'RSSI_ScanBuffer' being filled
+    def startContinuousScan(self, interval=1.0, capacity=4096, networks=False, sudo=False, log=None):
+        if self.scanThread is not None and self.scanThread.is_alive():
+            raise RuntimeError("Continuous scan already running on " + self.interface)
+        # Imported here, so scan-only processes don't load numpy.
+        from .buffer import RSSI_ScanBuffer
+        self.scanBuffer = RSSI_ScanBuffer(capacity)
+        self.scanStop = Event()
+        self.scanError = None
+        def run():
+            while not self.scanStop.is_set():
+                started = time()
+                try:
+                    cells = self.getAPinfo(networks=networks, sudo=sudo) or []
+                except Exception as error:
+                    self.scanError = error
+                    return
+                self.scanBuffer.append(cells, started)
+                if log is not None:
+                    log.append(cells, started)
+                self.scanStop.wait(max(0.0, interval-(time()-started)))
+        self.scanThread = Thread(target=run)
+        self.scanThread.daemon = True
+        self.scanThread.start()
+        return self.scanBuffer
+
+    # stopContinuousScan
+        # Description:
+            # Stops the thread started by 'startContinuousScan' and waits
+            # for the scan in progress to finish. The buffer is kept.
+        # -----------------------------------------------
+        # Input: None
+        # -----------------------------------------------
+        # Returns: None
+    def stopContinuousScan(self):
+        if self.scanThread is not None:
+            self.scanStop.set()
+            self.scanThread.join()
+            self.scanThread = None
+
+    # getRecentSamples
+        # Description:
+            # Zero-copy view of the samples collected by the continuous
+            # scan in the last 'seconds' seconds (see 'RSSI_ScanBuffer.getLast').
+        # -----------------------------------------------
+        # Input:
+            # seconds = 10
+        # -----------------------------------------------
+        # Returns: numpy structured array (see 'RSSI_ScanBuffer')
+    def getRecentSamples(self, seconds):
+        if self.scanBuffer is None:
+            raise RuntimeError("Continuous scan was never started on " + self.interface)
+        return self.scanBuffer.getLast(seconds)
+
+# RSSI_ScanPool
+    # Use:
+        # from rssi import RSSI_ScanPool
+        # rssi_scan_pool = RSSI_ScanPool(['wlan0', 'wlan1'])
+    # -------------------------------------------------------
+    # Description:
+        # Manages one 'RSSI_Scan' per wireless interface and fires their
+        # scans concurrently (one thread per interface), so a sweep on a
+        # multi-NIC node takes about as long as a single scan.
+        # Results are merged into one view keyed by MAC address, which
+        # records the interfaces that saw each access-point.
+    # -------------------------------------------------------
+    # Input: interface names, or already built 'RSSI_Scan' instances.
+        # ['wlan0', 'wlan1', RSSI_Scan('wlp1s0')]
+class RSSI_ScanPool(object):
+    def __init__(self, interfaces):
+        self.scanners = [
+            interface if isinstance(interface, RSSI_Scan) else RSSI_Scan(interface)
+            for interface in interfaces
+        ]
+
+    # scanAll
+        # Description:
+            # Runs 'getAPinfo' on every interface at the same time and
+            # waits for all of them. An exception raised while scanning
+            # any interface is re-raised here.
+        # -----------------------------------------------
+        # Input: (optional)
+            # networks, sudo, macs (see 'RSSI_Scan.getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Dictionary of interface -> array of dictionaries)
+            # {
+            #     'wlan0': [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}],
+            #     'wlan1': []
+            # }
+    def scanAll(self, networks=False, sudo=False, macs=False):
+        results = [None]*len(self.scanners)
+        errors = [None]*len(self.scanners)
+        def scan(index, scanner):
+            try:
+                results[index] = scanner.getAPinfo(networks=networks, sudo=sudo, macs=macs) or []
+            except Exception as error:
+                errors[index] = error
+        threads = [
+            Thread(target=scan, args=(index, scanner))
+            for index, scanner in enumerate(self.scanners)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for error in errors:
+            if error is not None:
+                raise error
+        return dict(
+            (scanner.interface, result)
+            for scanner, result in zip(self.scanners, results)
+        )
+
+    # mergeScans
+        # Description:
+            # Deduplicates the per-interface results of 'scanAll' by MAC.
+            # Each access-point keeps the fields of its strongest reading,
+            # plus an 'interfaces' dictionary with the signal every
+            # interface measured for it.
+        # -----------------------------------------------
+        # Input: (Dictionary of interface -> array of dictionaries)
+            # (see 'scanAll')
+        # -----------------------------------------------
+        # Returns: (Dictionary of mac -> dictionary)
+            # {
+            #     'A0:3D:6F:26:77:8E': {
+            #         'ssid':'ucrwpa',
+            #         'quality':'43/70',
+            #         'signal':-61,
+            #         'mac':'A0:3D:6F:26:77:8E',
+            #         'interfaces': {'wlan0': -67, 'wlan1': -61}
+            #     }
+            # }
+    @staticmethod
+    def mergeScans(scans):
+        merged = {}
+        for interface, cells in scans.items():
+            for cell in cells:
+                mac = cell['mac']
+                if mac not in merged:
+                    merged[mac] = dict(cell, interfaces={})
+                elif cell['signal'] is not None and (merged[mac]['signal'] is None or cell['signal'] > merged[mac]['signal']):
+                    merged[mac].update(cell)
+                merged[mac]['interfaces'][interface] = cell['signal']
+        return merged
+
+    # getAPinfo
+        # Description:
+            # Scans every interface concurrently ('scanAll') and returns
+            # the merged view ('mergeScans').
+        # -----------------------------------------------
+        # Input: (optional)
+            # networks, sudo, macs (see 'RSSI_Scan.getAPinfo')
+        # -----------------------------------------------
+        # Returns: (Dictionary of mac -> dictionary) (see 'mergeScans')
+    def getAPinfo(self, networks=False, sudo=False, macs=False):
+        return self.mergeScans(self.scanAll(networks=networks, sudo=sudo, macs=macs))
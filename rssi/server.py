@@ -0,0 +1,294 @@
+import argparse # Used for the command line
+import json # Used to read access point files
+import os
+import socket # Used for the Unix domain socket
+from threading import Thread, Lock # Used for the connection and batching threads
+
+try:
+    from queue import Queue, Empty, Full
+except ImportError:
+    from Queue import Queue, Empty, Full
+
+import numpy # Used to stack requests into one batch
+
+from .localize import RSSI_Localizer
+from .client import (
+    PROTOCOL_VERSION, HELLO, REQUEST, RESPONSE, STATUS_OK, STATUS_BAD_REQUEST, STATUS_ERROR,
+    receiveFrame, sendFrame
+)
+from .instrumentation import clock
+
+# RSSI_LocalizationServer
+    # Use:
+        # from rssi.server import RSSI_LocalizationServer
+        # with RSSI_LocalizationServer(RSSI_Localizer(accessPoints), '/run/rssi.sock') as server:
+        #     server.serveForever()
+        # Or from a shell:
+        # python -m rssi.server --table aps/ --socket /run/rssi.sock
+    # -------------------------------------------------------
+    # Description:
+        # Long-running localization service on a Unix domain socket.
+        # The access point model is loaded once, in one process, and
+        # clients (see 'rssi.client.RSSI_LocalizationClient') only send
+        # signal vectors, using the binary protocol described in
+        # 'rssi.client'.
+        # Every connection gets a reader thread that queues its requests.
+        # A single batching thread takes the first queued request, keeps
+        # collecting until 'maxBatch' requests are queued or 'maxWait'
+        # seconds have passed, and solves them all with one
+        # 'getNodePositions' call, so concurrent clients share the cost
+        # of the vectorized solve.
+        # Replies go through a per-connection queue emptied by that
+        # connection's writer thread, so a client that stops reading never
+        # stalls the batching thread. Once 'maxPending' of its replies are
+        # queued, the connection is dropped.
+    # -------------------------------------------------------
+    # Input:
+        # localizer: RSSI_Localizer
+        # path: socket path (an existing socket file is replaced)
+        # maxBatch: most requests per solve (256)
+        # maxWait: seconds a request waits for others to join its batch (0.002)
+        # solver: see 'RSSI_Localizer.solvePositions' ('pinv')
+        # maxPending: most replies queued for one connection (4096)
+class RSSI_LocalizationServer(object):
+    def __init__(self, localizer, path, maxBatch=256, maxWait=0.002, solver='pinv', maxPending=4096):
+        if solver not in RSSI_Localizer.SOLVERS:
+            raise ValueError("Unknown solver: " + str(solver))
+        self.localizer = localizer
+        self.path = path
+        self.maxBatch = maxBatch
+        self.maxWait = maxWait
+        self.solver = solver
+        self.maxPending = maxPending
+        self.requests = Queue()
+        self.connections = {}
+        self.connectionsLock = Lock()
+        self.listener = None
+        self.threads = []
+        self.running = False
+        self.hello = HELLO.pack(b'RSSI', PROTOCOL_VERSION, localizer.dimensions, localizer.count)
+        self.requestSize = REQUEST.size+4*localizer.count
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # start
+        # Description:
+            # Binds the socket and starts the accept and batching threads
+            # in the background.
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen(64)
+        self.running = True
+        for target in (self.acceptConnections, self.solveBatches):
+            thread = Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    # serveForever
+        # Description:
+            # Blocks until 'close' is called (or the process is interrupted).
+    def serveForever(self):
+        while self.running:
+            self.threads[0].join(1.0)
+
+    # close
+        # Description:
+            # Stops the server, closes every connection and removes the
+            # socket file.
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        # Wakes the accept thread up; closing alone doesn't interrupt accept().
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass
+        self.listener.close()
+        self.requests.put(None)
+        with self.connectionsLock:
+            connections = list(self.connections)
+        for connection in connections:
+            self.closeConnection(connection)
+        for thread in self.threads:
+            thread.join()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def closeConnection(self, connection):
+        with self.connectionsLock:
+            replies = self.connections.pop(connection, None)
+        if replies is not None:
+            # Wakes the writer up. A full queue means it is stuck sending,
+            # which the shutdown below interrupts.
+            try:
+                replies.put_nowait(None)
+            except Full:
+                pass
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass
+        connection.close()
+
+    def acceptConnections(self):
+        while self.running:
+            try:
+                connection = self.listener.accept()[0]
+            except (OSError, socket.error):
+                # The listener was shut down by 'close'.
+                return
+            replies = Queue(self.maxPending)
+            with self.connectionsLock:
+                self.connections[connection] = replies
+            for target, args in ((self.readRequests, (connection,)), (self.writeReplies, (connection, replies))):
+                thread = Thread(target=target, args=args)
+                thread.daemon = True
+                thread.start()
+
+    # readRequests
+        # Description:
+            # Reader thread of one connection: sends the hello frame, then
+            # queues (connection, request id, signals) for every request.
+            # Malformed requests are queued with None signals, so their
+            # STATUS_BAD_REQUEST reply keeps its place in the order of
+            # replies. A frame longer than a request closes the
+            # connection before its payload is read.
+    def readRequests(self, connection):
+        try:
+            self.send(connection, self.hello)
+            while self.running:
+                payload = receiveFrame(connection, self.requestSize)
+                if len(payload) < REQUEST.size:
+                    break
+                request_id = REQUEST.unpack_from(payload)[0]
+                if len(payload) != self.requestSize:
+                    self.requests.put((connection, request_id, None))
+                    continue
+                signals = numpy.frombuffer(payload, dtype='<f4', offset=REQUEST.size)
+                self.requests.put((connection, request_id, signals))
+        except (EOFError, ValueError, OSError, socket.error):
+            pass
+        self.closeConnection(connection)
+
+    # writeReplies
+        # Description:
+            # Writer thread of one connection: sends the frames queued by
+            # 'send', in order, until the connection is closed.
+    def writeReplies(self, connection, replies):
+        try:
+            while True:
+                payload = replies.get()
+                if payload is None:
+                    return
+                sendFrame(connection, payload)
+        except (OSError, socket.error):
+            self.closeConnection(connection)
+
+    # nextBatch
+        # Description:
+            # Blocks for the first request, then collects more until the
+            # batch is full or 'maxWait' seconds have passed.
+        # -----------------------------------------------
+        # Returns: list of queued requests, or None once the server stops
+    def nextBatch(self):
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = clock()+self.maxWait
+        while len(batch) < self.maxBatch:
+            try:
+                remaining = deadline-clock()
+                request = self.requests.get_nowait() if remaining <= 0 else self.requests.get(timeout=remaining)
+            except Empty:
+                break
+            if request is None:
+                self.requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    # solveBatches
+        # Description:
+            # Batching thread: one 'getNodePositions' call per batch, then
+            # one response per request, in queue order.
+    def solveBatches(self):
+        while True:
+            batch = self.nextBatch()
+            if batch is None:
+                return
+            valid = [signals for connection, request_id, signals in batch if signals is not None]
+            positions = None
+            if valid:
+                try:
+                    positions = self.localizer.getNodePositions(numpy.vstack(valid).astype(numpy.float64), self.solver)
+                    positions = iter(numpy.ascontiguousarray(positions, dtype='<f8'))
+                except Exception:
+                    positions = None
+            for connection, request_id, signals in batch:
+                if signals is None:
+                    self.send(connection, RESPONSE.pack(request_id, STATUS_BAD_REQUEST))
+                elif positions is None:
+                    self.send(connection, RESPONSE.pack(request_id, STATUS_ERROR))
+                else:
+                    self.send(connection, RESPONSE.pack(request_id, STATUS_OK)+next(positions).tobytes())
+
+    # send
+        # Description:
+            # Queues one frame for the connection's writer thread, without
+            # blocking. Frames for closed connections are dropped, and a
+            # connection with 'maxPending' frames already queued (a client
+            # that doesn't read its replies) is closed.
+    def send(self, connection, payload):
+        with self.connectionsLock:
+            replies = self.connections.get(connection)
+        if replies is None:
+            return
+        try:
+            replies.put_nowait(payload)
+        except Full:
+            self.closeConnection(connection)
+
+# loadLocalizer
+    # Description:
+        # Localizer of the command line: an AP table directory (see
+        # 'rssi.storage') or a JSON file holding a list of access point
+        # dictionaries (see 'RSSI_Localizer').
+def loadLocalizer(table=None, accessPoints=None):
+    if table is not None:
+        from .storage import RSSI_APTable
+        return RSSI_APTable(table).getLocalizer()
+    with open(accessPoints) as access_points_file:
+        return RSSI_Localizer(json.load(access_points_file))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='RSSI localization server on a Unix domain socket.')
+    model = parser.add_mutually_exclusive_group(required=True)
+    model.add_argument('--table', help='AP table directory (see rssi.storage)')
+    model.add_argument('--access-points', help='JSON file with a list of access points')
+    parser.add_argument('--socket', required=True, help='socket path')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait', type=float, default=0.002, help='seconds')
+    parser.add_argument('--solver', default='pinv', choices=RSSI_Localizer.SOLVERS)
+    parser.add_argument('--max-pending', type=int, default=4096, help='replies queued per connection')
+    args = parser.parse_args(argv)
+    localizer = loadLocalizer(args.table, args.access_points)
+    server = RSSI_LocalizationServer(localizer, args.socket, args.max_batch, args.max_wait, args.solver, args.max_pending)
+    with server:
+        try:
+            server.serveForever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
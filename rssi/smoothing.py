@@ -0,0 +1,227 @@
+from time import time # Used to timestamp updates that don't carry one
+
+import numpy # Used for the per-AP statistic arrays
+
+# RSSI_SignalStats
+    # Use:
+        # from rssi.smoothing import RSSI_SignalStats
+        # stats = RSSI_SignalStats(window=10.0)
+        # stats.update(rssi_scan_instance.getAPinfo())
+        # position = localizer.getNodePosition(stats.getSignalVector(localizer))
+    # -------------------------------------------------------
+    # Description:
+        # Incremental per-AP signal statistics. Every MAC gets a row in a
+        # set of shared arrays holding:
+        #   - the samples of the last 'window' seconds (a ring of up to
+        #     'maxSamples' per AP), with running sums for an O(1) rolling
+        #     mean and variance; expired samples are evicted from the head
+        #     of each ring, so every sample is added and removed once.
+        #   - an exponentially weighted moving average (smoothing 'alpha')
+        #   - a streaming median estimate, which moves 'medianStep' dB
+        #     toward every new sample.
+        # Signal levels are stored relative to the first sample of each
+        # AP, which keeps the running sums numerically stable.
+    # -------------------------------------------------------
+    # Input:
+        # window: seconds of samples kept for mean/variance, 10.0
+        # alpha: EWMA smoothing factor, 0.3
+        # medianStep: dB step of the median estimate, 0.5
+        # maxSamples: samples kept per AP, 64
+        # capacity: initial number of AP rows (grows as needed), 256
+class RSSI_SignalStats(object):
+    statistics = ('mean', 'variance', 'median', 'ewma', 'count')
+
+    def __init__(self, window=10.0, alpha=0.3, medianStep=0.5, maxSamples=64, capacity=256):
+        self.window = window
+        self.alpha = alpha
+        self.medianStep = medianStep
+        self.maxSamples = maxSamples
+        self.macIndex = {}
+        self.macs = []
+        self.allocate(capacity)
+
+    # allocate
+        # Description:
+            # (Re)allocates the statistic arrays for 'capacity' rows,
+            # keeping the rows already in use.
+    def allocate(self, capacity):
+        used = len(self.macs)
+        shapes = {
+            'values': (capacity, self.maxSamples),
+            'times': (capacity, self.maxSamples),
+            'head': (capacity,),
+            'size': (capacity,),
+            'offset': (capacity,),
+            'sums': (capacity,),
+            'squares': (capacity,),
+            'ewma': (capacity,),
+            'median': (capacity,)
+        }
+        for name, shape in shapes.items():
+            dtype = numpy.int64 if name in ('head', 'size') else numpy.float64
+            new = numpy.zeros(shape, dtype=dtype)
+            if used:
+                new[:used] = getattr(self, name)[:used]
+            setattr(self, name, new)
+
+    # getRows
+        # Description:
+            # Row of every MAC, registering new ones.
+    def getRows(self, macs):
+        rows = numpy.empty(len(macs), dtype=numpy.int64)
+        new = []
+        for i, mac in enumerate(macs):
+            mac = mac.upper()
+            row = self.macIndex.get(mac)
+            if row is None:
+                row = len(self.macs)
+                self.macIndex[mac] = row
+                self.macs.append(mac)
+                new.append(i)
+            rows[i] = row
+        if len(self.macs) > self.head.shape[0]:
+            self.allocate(max(len(self.macs), 2*self.head.shape[0]))
+        return rows, numpy.array(new, dtype=numpy.int64)
+
+    # update
+        # Description:
+            # Adds one scan worth of parsed cells (see 'RSSI_Scan.getAPinfo').
+        # -----------------------------------------------
+        # Input:
+            # cells = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+            # timestamp = 1586563200.0 (defaults to now)
+    def update(self, cells, timestamp=None):
+        cells = [cell for cell in cells if cell['mac'] and cell['signal'] is not None]
+        self.updateSamples([cell['mac'] for cell in cells], [cell['signal'] for cell in cells], timestamp)
+
+    # updateSamples
+        # Description:
+            # Adds one sample per MAC, all taken at 'timestamp'. Each MAC
+            # may only appear once per call.
+        # -----------------------------------------------
+        # Input:
+            # macs = ['A0:3D:6F:26:77:8E', 'A0:3D:6F:26:77:82']
+            # signals = [-67, -61]
+            # timestamp = 1586563200.0 (defaults to now)
+    def updateSamples(self, macs, signals, timestamp=None):
+        if timestamp is None:
+            timestamp = time()
+        if not len(macs):
+            return
+        rows, new = self.getRows(macs)
+        signals = numpy.asarray(signals, dtype=numpy.float64)
+        if len(new):
+            first = rows[new]
+            self.offset[first] = signals[new]
+            self.ewma[first] = signals[new]
+            self.median[first] = signals[new]
+            self.head[first] = 0
+            self.size[first] = 0
+            self.sums[first] = 0.0
+            self.squares[first] = 0.0
+        self.evictRows(rows, timestamp-self.window)
+        # A full ring drops its oldest sample to make room.
+        full = rows[self.size[rows] == self.maxSamples]
+        if len(full):
+            self.dropHead(full)
+        shifted = signals-self.offset[rows]
+        slot = (self.head[rows]+self.size[rows]) % self.maxSamples
+        self.values[rows, slot] = shifted
+        self.times[rows, slot] = timestamp
+        self.size[rows] += 1
+        self.sums[rows] += shifted
+        self.squares[rows] += shifted**2
+        self.ewma[rows] += self.alpha*(signals-self.ewma[rows])
+        self.median[rows] += self.medianStep*numpy.sign(signals-self.median[rows])
+
+    # dropHead
+        # Description:
+            # Removes the oldest sample of every given row.
+    def dropHead(self, rows):
+        oldest = self.values[rows, self.head[rows]]
+        self.sums[rows] -= oldest
+        self.squares[rows] -= oldest**2
+        self.head[rows] = (self.head[rows]+1) % self.maxSamples
+        self.size[rows] -= 1
+
+    # evictRows
+        # Description:
+            # Drops the samples older than 'cutoff' from the given rows,
+            # one head sample per row and pass.
+    def evictRows(self, rows, cutoff):
+        rows = rows[self.size[rows] > 0]
+        while len(rows):
+            expired = rows[self.times[rows, self.head[rows]] < cutoff]
+            if not len(expired):
+                return
+            self.dropHead(expired)
+            rows = expired[self.size[expired] > 0]
+
+    # evict
+        # Description:
+            # Applies time-based eviction to every AP, e.g. before reading
+            # statistics of APs that stopped being heard.
+        # -----------------------------------------------
+        # Input: now (defaults to now)
+    def evict(self, now=None):
+        if now is None:
+            now = time()
+        self.evictRows(numpy.arange(len(self.macs)), now-self.window)
+
+    # getStatistic
+        # Description:
+            # One statistic for the given MACs (NaN for unknown MACs or,
+            # for 'mean'/'variance', MACs with no sample in the window).
+            #   'mean', 'variance': over the last 'window' seconds
+            #   'median': streaming median estimate
+            #   'ewma': exponentially weighted moving average
+            #   'count': samples in the window
+            # If 'now' is given, expired samples of these MACs are evicted
+            # first (see 'evict').
+        # -----------------------------------------------
+        # Input:
+            # macs = ['A0:3D:6F:26:77:8E', None]
+            # statistic = 'ewma'
+            # now = (optional) current time
+        # -----------------------------------------------
+        # Returns: (len(macs),) numpy array
+    def getStatistic(self, macs, statistic='ewma', now=None):
+        if statistic not in self.statistics:
+            raise ValueError("Unknown statistic: " + str(statistic))
+        rows = numpy.array([
+            self.macIndex.get(mac.upper(), -1) if mac else -1
+            for mac in macs
+        ], dtype=numpy.int64)
+        known = rows >= 0
+        result = numpy.full(len(rows), numpy.nan)
+        rows = rows[known]
+        if now is not None:
+            self.evictRows(rows, now-self.window)
+        size = self.size[rows].astype(numpy.float64)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            mean = self.sums[rows]/size
+            if statistic == 'mean':
+                values = mean+self.offset[rows]
+            elif statistic == 'variance':
+                values = numpy.maximum(self.squares[rows]/size-(mean**2), 0.0)
+                values[size == 0] = numpy.nan
+            elif statistic == 'count':
+                values = size
+            else:
+                values = getattr(self, statistic)[rows]
+        result[known] = values
+        return result
+
+    # getSignalVector
+        # Description:
+            # Smoothed signal vector in a localizer's access point order
+            # (see 'RSSI_Localizer.macs'), ready for 'getNodePosition'.
+        # -----------------------------------------------
+        # Input:
+            # localizer = RSSI_Localizer
+            # statistic = 'ewma' || 'mean' || 'median'
+            # now = (optional) see 'getStatistic'
+        # -----------------------------------------------
+        # Returns: (count,) numpy array
+    def getSignalVector(self, localizer, statistic='ewma', now=None):
+        return self.getStatistic(localizer.macs, statistic, now)
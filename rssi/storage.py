@@ -0,0 +1,238 @@
+import os # Used to lay out the column files of a table
+
+import numpy # Used for the column files and their memory maps
+
+from .buffer import RSSI_ScanBuffer
+from .localize import RSSI_Localizer
+
+# Atomic on every platform; Python 2 only has 'rename' (atomic on POSIX).
+replace = getattr(os, 'replace', os.rename)
+
+# Column layout of the on-disk tables. Every column is a flat,
+# little-endian binary file named '<column>.bin' inside the table's
+# directory, so a column can be appended to with a plain write and read
+# back with 'numpy.memmap' without parsing or copying.
+SCAN_LOG_COLUMNS = (
+    ('timestamp', '<f8'),
+    ('mac', '<u8'),
+    ('signal', '<f4'),
+    ('quality', '<f4')
+)
+AP_TABLE_COLUMNS = (
+    ('mac', '<u8'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('refSignal', '<f8'),
+    ('refDistance', '<f8'),
+    ('attenuation', '<f8')
+)
+# Only written for 3D localizers.
+AP_TABLE_OPTIONAL_COLUMNS = (
+    ('z', '<f8'),
+)
+
+# mapColumns
+    # Description:
+        # Memory-maps every column of a table directory (read-only).
+        # Missing or empty columns give empty arrays. A table that is
+        # still being written to (see 'RSSI_ScanLogWriter') can have
+        # columns a few values ahead of the others, or a value only
+        # partly written, so every column is cut to the number of
+        # complete rows: the length of the shortest column.
+    # -----------------------------------------------
+    # Returns: dictionary of column name -> numpy array
+def mapColumns(path, columns):
+    sizes = {}
+    for name, dtype in columns:
+        column_path = os.path.join(path, name+'.bin')
+        size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+        sizes[name] = size // numpy.dtype(dtype).itemsize
+    rows = min(sizes.values())
+    mapped = {}
+    for name, dtype in columns:
+        if rows > 0:
+            mapped[name] = numpy.memmap(os.path.join(path, name+'.bin'), dtype=dtype, mode='r', shape=(rows,))
+        else:
+            mapped[name] = numpy.empty(0, dtype=dtype)
+    return mapped
+
+# RSSI_ScanLogWriter
+    # Use:
+        # from rssi.storage import RSSI_ScanLogWriter
+        # with RSSI_ScanLogWriter('scans/') as log:
+        #     rssi_scan_instance.startContinuousScan(log=log)
+    # -------------------------------------------------------
+    # Description:
+        # Appends scan samples (timestamp, mac, signal, quality; see
+        # 'RSSI_ScanBuffer') to a columnar scan log directory.
+        # Existing logs are appended to, never overwritten. Every append
+        # is flushed to all the column files before it returns, so the
+        # log can be read while it is being written (see 'mapColumns').
+    # -------------------------------------------------------
+    # Input: path of the scan log directory
+class RSSI_ScanLogWriter(object):
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.files = dict(
+            (name, open(os.path.join(path, name+'.bin'), 'ab'))
+            for name, dtype in SCAN_LOG_COLUMNS
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # append
+        # Description:
+            # Appends one scan worth of parsed cells (see
+            # 'RSSI_Scan.getAPinfo'), all stamped with 'timestamp'.
+        # -----------------------------------------------
+        # Input:
+            # cells = [{'ssid':'ucrwpa', 'quality':'43/70', 'signal':-67, 'mac':'A0:3D:6F:26:77:8E'}]
+            # timestamp = 1586563200.0 (defaults to now)
+    def append(self, cells, timestamp=None):
+        self.appendSamples(RSSI_ScanBuffer.toSamples(cells, timestamp))
+
+    # appendSamples
+        # Description:
+            # Appends samples that are already in 'RSSI_ScanBuffer.dtype'
+            # form, such as a view of a continuous scan buffer.
+    def appendSamples(self, samples):
+        for name, dtype in SCAN_LOG_COLUMNS:
+            self.files[name].write(numpy.ascontiguousarray(samples[name], dtype=dtype).tobytes())
+        self.flush()
+
+    # flush / close
+        # Description:
+            # Pushes buffered writes to disk / closes the column files.
+    def flush(self):
+        for column_file in self.files.values():
+            column_file.flush()
+
+    def close(self):
+        for column_file in self.files.values():
+            column_file.close()
+
+# RSSI_ScanLog
+    # Use:
+        # from rssi.storage import RSSI_ScanLog
+        # log = RSSI_ScanLog('scans/')
+        # signals = log.getSignalMatrix(localizer.macs)
+        # positions = localizer.getNodePositions(signals)
+    # -------------------------------------------------------
+    # Description:
+        # Read-only, memory-mapped view of a scan log written by
+        # 'RSSI_ScanLogWriter'. Opening a log only maps its files, so
+        # cold start time doesn't depend on its size. The columns are
+        # exposed as numpy arrays: 'timestamp', 'mac', 'signal', 'quality'.
+    # -------------------------------------------------------
+    # Input: path of the scan log directory
+class RSSI_ScanLog(object):
+    def __init__(self, path):
+        self.path = path
+        self.columns = mapColumns(path, SCAN_LOG_COLUMNS)
+        for name, column in self.columns.items():
+            setattr(self, name, column)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    # getSignalMatrix
+        # Description:
+            # Pivots the log into one signal vector per scan (samples that
+            # share a timestamp), in the order of 'macs', ready for
+            # 'RSSI_Localizer.getNodePositions'. Access points not heard in
+            # a scan are NaN.
+        # -----------------------------------------------
+        # Input:
+            # macs = BSSID strings or MAC integers, e.g. localizer.macs
+            #        (None for access points without a MAC)
+        # -----------------------------------------------
+        # Returns: (scans,) timestamps and (scans, len(macs)) signals
+    def getSignalMatrix(self, macs):
+        mac_ids = numpy.array([
+            RSSI_ScanBuffer.macToInt(mac) if isinstance(mac, str) else (mac or 0)
+            for mac in macs
+        ], dtype=numpy.uint64)
+        timestamps, rows = numpy.unique(self.timestamp, return_inverse=True)
+        order = numpy.argsort(mac_ids)
+        position = numpy.minimum(numpy.searchsorted(mac_ids[order], self.mac), len(order)-1)
+        known = mac_ids[order][position] == self.mac
+        signals = numpy.full((len(timestamps), len(mac_ids)), numpy.nan)
+        signals[rows[known], order[position[known]]] = self.signal[known]
+        return timestamps, signals
+
+# writeAPTable
+    # Description:
+        # Saves the access point table of a localizer as a columnar table
+        # directory. Access points without a 'mac' are stored as 0.
+        # Every column is written to a temporary file that then replaces
+        # the old one, so localizers still mapping an older table (see
+        # 'RSSI_APTable.getLocalizer') keep reading it unchanged. The 'z'
+        # column is only written for 3D localizers.
+    # -----------------------------------------------
+    # Input:
+        # path = 'aps/'
+        # localizer = RSSI_Localizer
+def writeAPTable(path, localizer):
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    columns = {
+        'mac': [RSSI_ScanBuffer.macToInt(mac) if mac else 0 for mac in localizer.macs],
+        'x': localizer.apX,
+        'y': localizer.apY,
+        'refSignal': localizer.refSignal,
+        'refDistance': localizer.refDistance,
+        'attenuation': localizer.attenuation
+    }
+    for name, dtype in AP_TABLE_COLUMNS:
+        column_path = os.path.join(path, name+'.bin')
+        with open(column_path+'.tmp', 'wb') as column_file:
+            column_file.write(numpy.asarray(columns[name], dtype=dtype).tobytes())
+        replace(column_path+'.tmp', column_path)
+    for name, dtype in AP_TABLE_OPTIONAL_COLUMNS:
+        column_path = os.path.join(path, name+'.bin')
+        if localizer.dimensions == 3:
+            with open(column_path+'.tmp', 'wb') as column_file:
+                column_file.write(numpy.asarray(localizer.apZ, dtype=dtype).tobytes())
+            replace(column_path+'.tmp', column_path)
+        elif os.path.exists(column_path):
+            # A 2D table replacing a 3D one.
+            os.remove(column_path)
+
+# RSSI_APTable
+    # Use:
+        # from rssi.storage import RSSI_APTable
+        # localizer = RSSI_APTable('aps/').getLocalizer()
+    # -------------------------------------------------------
+    # Description:
+        # Read-only, memory-mapped view of an access point table written
+        # by 'writeAPTable'. Columns: 'mac', 'x', 'y', 'refSignal',
+        # 'refDistance', 'attenuation', and 'z' (None for 2D tables).
+    # -------------------------------------------------------
+    # Input: path of the table directory
+class RSSI_APTable(object):
+    def __init__(self, path):
+        self.path = path
+        self.columns = mapColumns(path, AP_TABLE_COLUMNS)
+        for name, column in self.columns.items():
+            setattr(self, name, column)
+        self.z = None
+        if os.path.exists(os.path.join(path, 'z.bin')):
+            self.z = mapColumns(path, AP_TABLE_OPTIONAL_COLUMNS)['z']
+            if len(self.z) != len(self.mac):
+                raise ValueError("Columns of " + path + " have different lengths.")
+
+    def __len__(self):
+        return len(self.mac)
+
+    # getLocalizer
+        # Description:
+            # Builds an 'RSSI_Localizer' straight from the mapped columns
+            # (see 'RSSI_Localizer.fromArrays'), without copying them.
+    def getLocalizer(self):
+        return RSSI_Localizer.fromArrays(self.x, self.y, self.refSignal, self.refDistance, self.attenuation, self.mac, self.z)
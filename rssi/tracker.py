@@ -0,0 +1,256 @@
+from time import time # Used to timestamp updates that don't carry one
+
+import numpy # Used for the batched Kalman filter
+
+# RSSI_Tracker
+    # Use:
+        # from rssi import RSSI_Localizer
+        # from rssi.tracker import RSSI_Tracker
+        # tracker = RSSI_Tracker(RSSI_Localizer(accessPoints))
+        # positions = tracker.update(['tag-1', 'tag-2'], localized_positions)
+    # -------------------------------------------------------
+    # Description:
+        # Tracks many nodes ("tags") at once with a constant-velocity
+        # Kalman filter. The state of every tag lives in shared arrays
+        # (one row per tag):
+        #   state:      (x, y, vx, vy)
+        #   covariance: 4x4 state covariance
+        #   timestamps: time of the last update
+        # Each call to 'update' predicts and corrects every tag in the
+        # batch in a single vectorized step, which also smooths out the
+        # jitter of single-scan fixes.
+        # Measurements are either positions (see
+        # 'RSSI_Localizer.getNodePositions') or raw distances (see
+        # 'updateFromDistances').
+    # -------------------------------------------------------
+    # Input:
+        # localizer: 2D RSSI_Localizer, only needed for 'updateFromDistances'
+        # processNoise: acceleration noise density (m^2/s^3), 1.0
+        # measurementNoise: variance of a position fix (m^2), 4.0
+        # velocityNoise: initial velocity variance (m^2/s^2), 1.0
+        # capacity: initial number of tag rows (grows as needed), 1024
+class RSSI_Tracker(object):
+    def __init__(self, localizer=None, processNoise=1.0, measurementNoise=4.0, velocityNoise=1.0, capacity=1024):
+        if localizer is not None and localizer.dimensions != 2:
+            raise ValueError("RSSI_Tracker only tracks 2D positions, the localizer is " + str(localizer.dimensions) + "D.")
+        self.localizer = localizer
+        self.processNoise = processNoise
+        self.measurementNoise = measurementNoise
+        self.velocityNoise = velocityNoise
+        self.tagIndex = {}
+        self.tags = []
+        self.state = numpy.zeros((capacity, 4))
+        self.covariance = numpy.zeros((capacity, 4, 4))
+        self.timestamps = numpy.zeros(capacity)
+
+    # addTags
+        # Description:
+            # Gives every new tag a row, growing the arrays (by doubling)
+            # when they are full. New tags start at 'positions' with no
+            # velocity.
+        # ----------------------------------------
+        # Input:
+            # tag_ids: array of hashable ids
+            # positions: (N, 2) numpy array
+            # timestamps: (N,) numpy array
+        # ----------------------------------------
+        # Output: (N,) numpy array of row indexes
+    def addTags(self, tag_ids, positions, timestamps):
+        start = len(self.tags)
+        needed = start+len(tag_ids)
+        if needed > self.state.shape[0]:
+            capacity = max(needed, 2*self.state.shape[0])
+            for name in ('state', 'covariance', 'timestamps'):
+                old = getattr(self, name)
+                new = numpy.zeros((capacity,)+old.shape[1:])
+                new[:start] = old[:start]
+                setattr(self, name, new)
+        rows = numpy.arange(start, needed)
+        for tag in tag_ids:
+            self.tagIndex[tag] = len(self.tags)
+            self.tags.append(tag)
+        self.state[rows] = 0.0
+        self.state[rows, :2] = positions
+        self.covariance[rows] = numpy.diag([
+            self.measurementNoise, self.measurementNoise,
+            self.velocityNoise, self.velocityNoise
+        ])
+        self.timestamps[rows] = timestamps
+        return rows
+
+    # predict
+        # Description:
+            # Constant-velocity prediction of the given rows up to
+            # 'timestamps', with white-acceleration process noise.
+            # Does not modify the stored state.
+        # ----------------------------------------
+        # Input:
+            # rows: (N,) numpy array of row indexes
+            # timestamps: (N,) numpy array
+        # ----------------------------------------
+        # Output: (N, 4) states and (N, 4, 4) covariances
+    def predict(self, rows, timestamps):
+        dt = numpy.maximum(timestamps-self.timestamps[rows], 0.0)
+        count = len(rows)
+        transition = numpy.tile(numpy.eye(4), (count, 1, 1))
+        transition[:, 0, 2] = dt
+        transition[:, 1, 3] = dt
+        state = numpy.einsum('nij,nj->ni', transition, self.state[rows])
+        covariance = numpy.einsum('nij,njk,nlk->nil', transition, self.covariance[rows], transition)
+        q = self.processNoise
+        for axis in (0, 1):
+            covariance[:, axis, axis] += q*(dt**3)/3
+            covariance[:, axis, axis+2] += q*(dt**2)/2
+            covariance[:, axis+2, axis] += q*(dt**2)/2
+            covariance[:, axis+2, axis+2] += q*dt
+        return state, covariance
+
+    # getPredictedPositions
+        # Description:
+            # Where the given tags are expected to be at 'timestamps'.
+            # Unknown tags give NaN.
+        # ----------------------------------------
+        # Input:
+            # tag_ids: array of ids
+            # timestamps: (optional) scalar or (N,), defaults to now
+        # ----------------------------------------
+        # Output: (N, 2) numpy array
+    def getPredictedPositions(self, tag_ids, timestamps=None):
+        timestamps = self.toTimestamps(timestamps, len(tag_ids))
+        rows = numpy.array([self.tagIndex.get(tag, -1) for tag in tag_ids], dtype=numpy.int64)
+        known = rows >= 0
+        positions = numpy.full((len(tag_ids), 2), numpy.nan)
+        if known.any():
+            state, covariance = self.predict(rows[known], timestamps[known])
+            positions[known] = state[:, :2]
+        return positions
+
+    # getPositions
+        # Description:
+            # Filtered position of the given tags (or of every tag, in the
+            # order they were first seen) as of their last update.
+        # ----------------------------------------
+        # Output: (N, 2) numpy array
+    def getPositions(self, tag_ids=None):
+        if tag_ids is None:
+            return self.state[:len(self.tags), :2].copy()
+        positions = numpy.full((len(tag_ids), 2), numpy.nan)
+        for i, tag in enumerate(tag_ids):
+            row = self.tagIndex.get(tag)
+            if row is not None:
+                positions[i] = self.state[row, :2]
+        return positions
+
+    # toTimestamps
+        # Description:
+            # Broadcasts a scalar (or missing) timestamp to one per tag.
+    @staticmethod
+    def toTimestamps(timestamps, count):
+        if timestamps is None:
+            timestamps = time()
+        return numpy.broadcast_to(numpy.asarray(timestamps, dtype=numpy.float64), (count,)).copy()
+
+    # update
+        # Description:
+            # Predicts every tag in the batch up to its timestamp, then
+            # corrects it with its measured position. Tags seen for the
+            # first time are started at their measurement. A NaN
+            # measurement only moves the tag forward in time. A tag that
+            # appears several times in one batch is updated once per
+            # appearance, in order.
+        # ----------------------------------------
+        # Input:
+            # tag_ids: array of ids
+            # positions: (N, 2) array-like of measured positions
+            # timestamps: (optional) scalar or (N,), defaults to now
+            # measurementNoise: (optional) scalar or (N,) variance
+        # ----------------------------------------
+        # Output: (N, 2) numpy array of filtered positions
+    def update(self, tag_ids, positions, timestamps=None, measurementNoise=None):
+        tag_ids = list(tag_ids)
+        count = len(tag_ids)
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(count, 2)
+        timestamps = self.toTimestamps(timestamps, count)
+        if measurementNoise is None:
+            measurementNoise = self.measurementNoise
+        noise = numpy.broadcast_to(numpy.asarray(measurementNoise, dtype=numpy.float64), (count,))
+        results = numpy.full((count, 2), numpy.nan)
+        remaining = numpy.arange(count)
+        while len(remaining):
+            # Only the first appearance of each tag goes in this round.
+            seen = set()
+            batch, later = [], []
+            for i in remaining:
+                (later if tag_ids[i] in seen else batch).append(i)
+                seen.add(tag_ids[i])
+            batch = numpy.array(batch, dtype=numpy.int64)
+            results[batch] = self.updateRows([tag_ids[i] for i in batch], positions[batch], timestamps[batch], noise[batch])
+            remaining = numpy.array(later, dtype=numpy.int64)
+        return results
+
+    # updateRows
+        # Description:
+            # One vectorized predict/correct step for a batch of distinct
+            # tags (see 'update').
+    def updateRows(self, tag_ids, positions, timestamps, noise):
+        measured = ~numpy.isnan(positions).any(axis=1)
+        rows = numpy.array([self.tagIndex.get(tag, -1) for tag in tag_ids], dtype=numpy.int64)
+        new = (rows < 0) & measured
+        if new.any():
+            rows[new] = self.addTags([tag for tag, is_new in zip(tag_ids, new) if is_new], positions[new], timestamps[new])
+        results = numpy.full((len(tag_ids), 2), numpy.nan)
+        results[new] = positions[new]
+        known = (rows >= 0) & ~new
+        if not known.any():
+            return results
+        rows_k = rows[known]
+        state, covariance = self.predict(rows_k, timestamps[known])
+        z = positions[known]
+        correct = measured[known]
+        # Kalman correction with H = [I 0]: only the position is measured.
+        s11 = covariance[:, 0, 0]+noise[known]
+        s12 = covariance[:, 0, 1]
+        s22 = covariance[:, 1, 1]+noise[known]
+        det = (s11*s22)-(s12**2)
+        s_inv = numpy.empty((len(rows_k), 2, 2))
+        s_inv[:, 0, 0] = s22/det
+        s_inv[:, 0, 1] = -s12/det
+        s_inv[:, 1, 0] = -s12/det
+        s_inv[:, 1, 1] = s11/det
+        gain = numpy.einsum('nij,njk->nik', covariance[:, :, :2], s_inv)
+        innovation = numpy.where(correct[:, None], z-state[:, :2], 0.0)
+        gain = gain*correct[:, None, None]
+        state = state+numpy.einsum('nij,nj->ni', gain, innovation)
+        covariance = covariance-numpy.einsum('nij,njk->nik', gain, covariance[:, :2, :])
+        self.state[rows_k] = state
+        self.covariance[rows_k] = covariance
+        self.timestamps[rows_k] = timestamps[known]
+        results[known] = state[:, :2]
+        return results
+
+    # updateFromDistances
+        # Description:
+            # Uses raw distances (see 'RSSI_Localizer.getDistancesBatch')
+            # as the measurement: each tag's predicted position is refined
+            # against its distances (see 'RSSI_Localizer.refinePositions'),
+            # which usually converges in one or two iterations, and the
+            # result is fed to 'update'. New tags start from the linear
+            # solution. Access points that were not heard (NaN) are left
+            # out; a scan with fewer than 3 left can't fix a position and
+            # only moves its tag forward in time.
+        # ----------------------------------------
+        # Input:
+            # tag_ids: array of ids
+            # distances: (N, count) array-like
+            # timestamps: (optional) scalar or (N,), defaults to now
+            # measurementNoise: (optional) scalar or (N,) variance
+        # ----------------------------------------
+        # Output: (N, 2) numpy array of filtered positions
+    def updateFromDistances(self, tag_ids, distances, timestamps=None, measurementNoise=None):
+        tag_ids = list(tag_ids)
+        timestamps = self.toTimestamps(timestamps, len(tag_ids))
+        distances = numpy.atleast_2d(numpy.asarray(distances, dtype=numpy.float64))
+        initial = self.getPredictedPositions(tag_ids, timestamps)
+        measured = self.localizer.refineFrom(distances, initial=initial)
+        measured[numpy.sum(numpy.isfinite(distances), axis=1) < 3] = numpy.nan
+        return self.update(tag_ids, measured, timestamps, measurementNoise)
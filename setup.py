@@ -12,7 +12,11 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/jvillagomez/rssi_module",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
+    extras_require={
+        # KD-tree index of 'rssi.fingerprint'
+        "fingerprint": ["scipy"],
+    },
     classifiers=(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
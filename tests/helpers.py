@@ -0,0 +1,29 @@
+import numpy
+
+from rssi.backends import RSSI_ScanBackend
+
+# Shared with the benchmarks, so tests and benchmarks use the same layouts.
+from benchmarks.synthetic import makeAccessPoints
+
+# Spreads the access points of 'makeAccessPoints' over 'floors' floors,
+# 'height' apart, for 3D localization.
+def addFloors(accessPoints, floors=3, height=4.0):
+    for i, accessPoint in enumerate(accessPoints):
+        accessPoint['location']['z'] = height*(i % floors)
+    return accessPoints
+
+# Noise-free signals of 'positions' (N, dimensions) under the
+# log-distance model.
+def makeSignals(localizer, positions):
+    distances = numpy.sqrt(sum((positions[:, i:i+1]-c)**2 for i, c in enumerate(localizer.apCoordinates)))
+    return localizer.refSignal-10*localizer.attenuation*numpy.log10(distances/localizer.refDistance)
+
+# Backend returning fixed access points, counting its scans.
+class StaticBackend(RSSI_ScanBackend):
+    def __init__(self, access_points):
+        self.accessPoints = access_points
+        self.scans = 0
+
+    def getAccessPoints(self, interface, sudo=False):
+        self.scans += 1
+        return self.accessPoints
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from rssi.aio import RSSI_AsyncScan
+
+SCAN_OUTPUT = b'''wlp1s0    Scan completed :
+          Cell 01 - Address: A0:3D:6F:26:77:8E
+                    Quality=43/70  Signal level=-67 dBm
+                    ESSID:"ucrwpa"
+          Cell 02 - Address: A0:3D:6F:26:77:82
+                    Quality=60/70  Signal level=-50 dBm
+                    ESSID:"eduroam"
+'''
+
+# Scanner counting its scans, each one taking 'delay' seconds on either
+# the blocking or the asynchronous path.
+class CountingScan(RSSI_AsyncScan):
+    delay = 0.1
+
+    def __init__(self, *args, **kwargs):
+        RSSI_AsyncScan.__init__(self, *args, **kwargs)
+        self.scans = 0
+
+    def getRawNetworkScan(self, sudo=False):
+        self.scans += 1
+        time.sleep(self.delay)
+        return {'output': SCAN_OUTPUT, 'error': b''}
+
+    async def getRawNetworkScanAsync(self, sudo=False):
+        self.scans += 1
+        await asyncio.sleep(self.delay)
+        return {'output': SCAN_OUTPUT, 'error': b''}
+
+def runThreads(target, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.scanner = CountingScan('wlan-test')
+        self.scanner.enableCache(ttl=60.0)
+
+    def assertIdle(self):
+        self.assertIsNone(self.scanner.cacheInflight)
+        self.assertIsNone(self.scanner.cacheFuture)
+
+    def testBlocking(self):
+        results = runThreads(lambda: self.scanner.getAPinfo(networks=['eduroam']), 5)
+        self.assertEqual(self.scanner.scans, 1)
+        self.assertEqual([[cell['signal'] for cell in cells] for cells in results], [[-50]]*5)
+        self.assertIdle()
+
+    def testAsync(self):
+        async def main():
+            return await asyncio.gather(*[self.scanner.getAPinfoAsync() for _ in range(5)])
+        results = asyncio.run(main())
+        self.assertEqual(self.scanner.scans, 1)
+        self.assertEqual([len(cells) for cells in results], [2]*5)
+        self.assertIdle()
+
+    def testThreadWaitsForCoroutine(self):
+        async def main():
+            scan = asyncio.ensure_future(self.scanner.getAPinfoAsync())
+            await asyncio.sleep(0.01)
+            blocking = await asyncio.get_event_loop().run_in_executor(None, self.scanner.getAPinfo)
+            return (await scan), blocking
+        scanned, blocking = asyncio.run(main())
+        self.assertEqual(self.scanner.scans, 1)
+        self.assertEqual(blocking, scanned)
+        self.assertIdle()
+
+    def testCoroutineWaitsForThread(self):
+        thread = threading.Thread(target=self.scanner.getAPinfo)
+        thread.start()
+        time.sleep(0.01)
+        results = asyncio.run(self.scanner.getAPinfoAsync())
+        thread.join()
+        self.assertEqual(self.scanner.scans, 1)
+        self.assertEqual(len(results), 2)
+        self.assertIdle()
+
+    def testCancelledOwner(self):
+        async def main():
+            owner = asyncio.ensure_future(self.scanner.getAPinfoAsync())
+            await asyncio.sleep(0.01)
+            waiter = asyncio.ensure_future(self.scanner.getAPinfoAsync())
+            await asyncio.sleep(0.01)
+            owner.cancel()
+            # Still in flight, a new caller joins it instead of scanning.
+            self.assertIsNotNone(self.scanner.cacheInflight)
+            return await asyncio.gather(waiter, self.scanner.getAPinfoAsync())
+        results = asyncio.run(main())
+        self.assertEqual(self.scanner.scans, 1)
+        self.assertEqual([len(cells) for cells in results], [2, 2])
+        self.assertIdle()
+
+    def testBlockingCallOnScanningLoop(self):
+        async def main():
+            scan = asyncio.ensure_future(self.scanner.getAPinfoAsync())
+            await asyncio.sleep(0.01)
+            # Waiting here would block the scan it waits for.
+            blocking = self.scanner.getAPinfo()
+            return (await scan), blocking
+        scanned, blocking = asyncio.run(main())
+        self.assertEqual(self.scanner.scans, 2)
+        self.assertEqual(blocking, scanned)
+        self.assertIdle()
+
+if __name__ == '__main__':
+    unittest.main()
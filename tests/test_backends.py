@@ -0,0 +1,165 @@
+import errno
+import socket
+import struct
+import unittest
+from threading import Thread
+
+from rssi import RSSI_Scan
+from rssi.backends import (
+    RSSI_NetlinkBackend, packAttribute, parseAttributes,
+    GENL_ID_CTRL, CTRL_CMD_GETFAMILY, CTRL_ATTR_FAMILY_ID, CTRL_ATTR_FAMILY_NAME,
+    NL80211_CMD_GET_SCAN, NL80211_ATTR_IFINDEX, NL80211_ATTR_BSS, NL80211_BSS_BSSID,
+    NL80211_BSS_INFORMATION_ELEMENTS, NL80211_BSS_SIGNAL_MBM, NLM_F_DUMP, NLMSG_DONE, NLMSG_ERROR
+)
+
+from .helpers import StaticBackend
+
+NL80211_FAMILY = 0x1c
+
+def packMessage(message_type, sequence, payload, flags=0):
+    return struct.pack('=IHHII', 16+len(payload), message_type, flags, sequence, 0)+payload
+
+def packBSS(mac, ssid, signal_mbm):
+    ies = b'\0'+struct.pack('B', len(ssid))+ssid+b'\x01\x01\x82'
+    bss = (
+        packAttribute(NL80211_BSS_BSSID, mac)
+        + packAttribute(NL80211_BSS_INFORMATION_ELEMENTS, ies)
+        + packAttribute(NL80211_BSS_SIGNAL_MBM, struct.pack('=i', signal_mbm))
+    )
+    return struct.pack('=BBH', NL80211_CMD_GET_SCAN, 1, 0)+packAttribute(NL80211_ATTR_BSS, bss)
+
+# Mock netlink responder
+    # Description:
+        # 'connect' is a socket factory for 'RSSI_NetlinkBackend': every
+        # call returns one end of a new datagram socketpair (datagrams
+        # keep message boundaries, like netlink) and answers the requests
+        # sent on it: the GETFAMILY reply for 'nl80211', then a GET_SCAN
+        # dump split over two datagrams and closed by NLMSG_DONE, or an
+        # NLMSG_ERROR when 'scanError' is set. Every request is kept in
+        # 'requests'.
+class MockNetlinkResponder(object):
+    def __init__(self, bss, scanError=0):
+        self.bss = bss
+        self.scanError = scanError
+        self.requests = []
+        self.servers = []
+        self.threads = []
+
+    def connect(self):
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        thread = Thread(target=self.serve, args=(server,))
+        thread.daemon = True
+        thread.start()
+        self.servers.append(server)
+        self.threads.append(thread)
+        return client
+
+    def serve(self, server):
+        while True:
+            try:
+                data = server.recv(65536)
+            except (OSError, socket.error):
+                return
+            if not data:
+                return
+            length, message_type, flags, sequence, pid = struct.unpack_from('=IHHII', data)
+            command = struct.unpack_from('=B', data, 16)[0]
+            self.requests.append((message_type, flags, command, parseAttributes(data[20:length])))
+            if message_type == GENL_ID_CTRL and command == CTRL_CMD_GETFAMILY:
+                reply = struct.pack('=BBH', 1, 1, 0)+packAttribute(CTRL_ATTR_FAMILY_ID, struct.pack('=H', NL80211_FAMILY))
+                server.send(packMessage(GENL_ID_CTRL, sequence, reply))
+            elif self.scanError:
+                server.send(packMessage(NLMSG_ERROR, sequence, struct.pack('=i', -self.scanError)+data[:16]))
+            else:
+                messages = [packMessage(NL80211_FAMILY, sequence, bss, 0x2) for bss in self.bss]
+                server.send(b''.join(messages[:1]))
+                server.send(b''.join(messages[1:]))
+                server.send(packMessage(NLMSG_DONE, sequence, struct.pack('=i', 0), 0x2))
+
+    def close(self):
+        # Closing alone doesn't wake a blocked recv().
+        for server in self.servers:
+            try:
+                server.shutdown(socket.SHUT_RDWR)
+            except (OSError, socket.error):
+                pass
+            server.close()
+        for thread in self.threads:
+            thread.join()
+
+class NetlinkBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.responders = []
+
+    def tearDown(self):
+        for responder in self.responders:
+            responder.close()
+
+    def makeBackend(self, bss, scanError=0):
+        responder = MockNetlinkResponder(bss, scanError)
+        self.responders.append(responder)
+        return RSSI_NetlinkBackend(socketFactory=responder.connect), responder
+
+    def testScanDump(self):
+        backend, responder = self.makeBackend([
+            packBSS(b'\xa0\x3d\x6f\x26\x77\x8e', b'ucrwpa', -6700),
+            packBSS(b'\xa0\x3d\x6f\x26\x77\x82', b'eduroam', -4250),
+            packBSS(b'\x00\x11\x22\x33\x44\x55', b'', -9000)
+        ])
+        access_points = backend.getAccessPoints('lo')
+        self.assertEqual(backend.familyId, NL80211_FAMILY)
+        self.assertEqual([(ap['mac'], ap['ssid'], ap['signal']) for ap in access_points], [
+            ('A0:3D:6F:26:77:8E', 'ucrwpa', -67),
+            ('A0:3D:6F:26:77:82', 'eduroam', -42),
+            ('00:11:22:33:44:55', '', -90)
+        ])
+        family_request, scan_request = responder.requests
+        self.assertEqual(family_request[3][CTRL_ATTR_FAMILY_NAME], b'nl80211\0')
+        self.assertEqual(scan_request[:3], (NL80211_FAMILY, 0x1 | NLM_F_DUMP, NL80211_CMD_GET_SCAN))
+        self.assertEqual(struct.unpack('=I', scan_request[3][NL80211_ATTR_IFINDEX])[0], socket.if_nametoindex('lo'))
+
+    def testEmptyDump(self):
+        backend = self.makeBackend([])[0]
+        self.assertEqual(backend.getAccessPoints('lo'), [])
+
+    def testNetlinkError(self):
+        backend = self.makeBackend([], scanError=errno.ENODEV)[0]
+        with self.assertRaises(OSError) as raised:
+            backend.getAccessPoints('lo')
+        self.assertEqual(raised.exception.errno, errno.ENODEV)
+
+    def testScanThroughBackend(self):
+        backend = self.makeBackend([
+            packBSS(b'\xa0\x3d\x6f\x26\x77\x8e', b'ucrwpa', -6700),
+            packBSS(b'\xa0\x3d\x6f\x26\x77\x82', b'eduroam', -4250)
+        ])[0]
+        scanner = RSSI_Scan('lo', backend=backend)
+        self.assertEqual([ap['ssid'] for ap in scanner.getAPinfo(networks=['eduroam'])], ['eduroam'])
+
+class ScanBackendRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = StaticBackend([
+            {'ssid': 'ucrwpa', 'quality': '43/70', 'signal': -67, 'mac': 'A0:3D:6F:26:77:8E'},
+            {'ssid': 'eduroam', 'quality': '60/70', 'signal': -50, 'mac': 'A0:3D:6F:26:77:82'}
+        ])
+        self.scanner = RSSI_Scan('wlan-test', backend=self.backend)
+
+    def testRecords(self):
+        records = self.scanner.getAPrecords(networks=['eduroam'])
+        self.assertEqual(len(records), 1)
+        self.assertEqual(self.scanner.macRegistry.getValue(records[0].mac), 'A0:3D:6F:26:77:82')
+        self.assertEqual(records[0].signal, -50)
+        self.assertAlmostEqual(records[0].quality, 60/70.0)
+
+    def testIterAPinfo(self):
+        self.assertEqual([ap['mac'] for ap in self.scanner.iterAPinfo(macs=['a0:3d:6f:26:77:8e'])], ['A0:3D:6F:26:77:8E'])
+
+    def testCache(self):
+        self.scanner.enableCache(ttl=60.0)
+        self.scanner.getAPinfo()
+        self.scanner.getAPrecords()
+        list(self.scanner.iterAPinfo())
+        self.assertEqual(self.backend.scans, 1)
+
+if __name__ == '__main__':
+    unittest.main()
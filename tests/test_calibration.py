@@ -0,0 +1,61 @@
+import unittest
+
+import numpy
+
+from rssi.calibration import RSSI_Calibrator
+
+class CalibrationTest(unittest.TestCase):
+    def getSignals(self, accessPoints, positions):
+        locations = numpy.array([
+            [ap['location']['x'], ap['location']['y'], ap['location'].get('z', 0.0)] for ap in accessPoints
+        ])
+        distances = numpy.sqrt(((positions[:, None, :]-locations[None, :, :positions.shape[1]])**2).sum(axis=2))
+        return numpy.array([-40.0, -35.0])-10*numpy.array([2.5, 3.5])*numpy.log10(distances)
+
+    def setUp(self):
+        self.accessPoints = [{'location': {'x': 0.0, 'y': 0.0}}, {'location': {'x': 30.0, 'y': 10.0}}]
+        self.positions = numpy.random.RandomState(0).uniform(1, 40, (200, 2))
+        self.signals = self.getSignals(self.accessPoints, self.positions)
+
+    def testFit2D(self):
+        calibrator = RSSI_Calibrator(self.accessPoints)
+        calibrator.addSamples(self.positions, self.signals)
+        accessPoints, residuals = calibrator.fit()
+        numpy.testing.assert_allclose(residuals['referenceSignal'], [-40.0, -35.0], atol=1e-9)
+        numpy.testing.assert_allclose(residuals['attenuation'], [2.5, 3.5], atol=1e-9)
+        numpy.testing.assert_allclose(residuals['rmse'], [0.0, 0.0], atol=1e-4)
+        self.assertEqual(list(residuals['count']), [200, 200])
+        self.assertAlmostEqual(accessPoints[1]['reference']['signal'], -35.0)
+        self.assertEqual(accessPoints[1]['location'], self.accessPoints[1]['location'])
+
+    def testFit3D(self):
+        # Access points on different floors.
+        accessPoints = [{'location': {'x': 0.0, 'y': 0.0, 'z': 0.0}}, {'location': {'x': 30.0, 'y': 10.0, 'z': 8.0}}]
+        positions = numpy.random.RandomState(0).uniform(1, 40, (200, 3))
+        calibrator = RSSI_Calibrator(accessPoints)
+        calibrator.addSamples(positions, self.getSignals(accessPoints, positions))
+        residuals = calibrator.fit()[1]
+        numpy.testing.assert_allclose(residuals['referenceSignal'], [-40.0, -35.0], atol=1e-9)
+        numpy.testing.assert_allclose(residuals['attenuation'], [2.5, 3.5], atol=1e-9)
+        numpy.testing.assert_allclose(residuals['rmse'], [0.0, 0.0], atol=1e-4)
+
+    def testChunks(self):
+        whole = RSSI_Calibrator(self.accessPoints)
+        whole.addSamples(self.positions, self.signals)
+        chunked = RSSI_Calibrator(self.accessPoints)
+        signals = self.signals.copy()
+        signals[::3, 0] = numpy.nan
+        for start in range(0, 200, 64):
+            chunked.addSamples(self.positions[start:start+64], signals[start:start+64])
+        residuals = chunked.fit()[1]
+        numpy.testing.assert_allclose(residuals['attenuation'], whole.fit()[1]['attenuation'])
+        self.assertEqual(list(residuals['count']), [133, 200])
+
+    def testTooFewSamples(self):
+        calibrator = RSSI_Calibrator(self.accessPoints)
+        calibrator.addSamples(self.positions[:2], self.signals[:2])
+        self.assertTrue(numpy.isnan(calibrator.fit()[1]['attenuation']).all())
+        self.assertRaises(ValueError, calibrator.getLocalizer)
+
+if __name__ == '__main__':
+    unittest.main()
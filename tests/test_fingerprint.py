@@ -0,0 +1,73 @@
+import unittest
+import warnings
+
+import numpy
+
+from rssi import fingerprint
+from rssi.fingerprint import RSSI_Fingerprinter
+
+def makeFingerprinter(samples=500, count=6, seed=0):
+    random = numpy.random.RandomState(seed)
+    fingerprinter = RSSI_Fingerprinter([{} for _ in range(count)])
+    fingerprinter.addSamples(random.uniform(0, 50, (samples, 2)), random.uniform(-90, -30, (samples, count)))
+    return fingerprinter, random.uniform(-90, -30, (40, count))
+
+class FingerprintTest(unittest.TestCase):
+    def setUp(self):
+        self.cKDTree = fingerprint.cKDTree
+
+    def tearDown(self):
+        fingerprint.cKDTree = self.cKDTree
+
+    def testBruteForceWarnsAndMatchesIndex(self):
+        fingerprinter, queries = makeFingerprinter()
+        fingerprint.cKDTree = None
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            brute = fingerprinter.getNodePositions(queries)
+        self.assertTrue(any(issubclass(warning.category, RuntimeWarning) for warning in caught))
+        if self.cKDTree is None:
+            self.skipTest('scipy is not installed')
+        fingerprint.cKDTree = self.cKDTree
+        fingerprinter.index = None
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            indexed = fingerprinter.getNodePositions(queries)
+        self.assertEqual(caught, [])
+        numpy.testing.assert_allclose(indexed, brute, atol=1e-9)
+
+    def testIncrementalSamples(self):
+        random = numpy.random.RandomState(1)
+        locations = random.uniform(0, 50, (30, 2))
+        signals = random.uniform(-90, -30, (30, 4))
+        signals[::7, 1] = numpy.nan
+        whole = RSSI_Fingerprinter([{} for _ in range(4)])
+        whole.addSamples(locations, signals)
+        single = RSSI_Fingerprinter([{} for _ in range(4)])
+        for location, signal in zip(locations[:10], signals[:10]):
+            single.addSamples(location, signal)
+        queries = random.uniform(-90, -30, (5, 4))
+        single.getNodePositions(queries)
+        single.addSamples(locations[10:], signals[10:])
+        numpy.testing.assert_array_equal(single.getNodePositions(queries), whole.getNodePositions(queries))
+        numpy.testing.assert_array_equal(single.fingerprints, whole.fingerprints)
+        self.assertEqual(single.fingerprints[7, 1], -100.0)
+
+    def testExactSample(self):
+        fingerprinter = RSSI_Fingerprinter([{} for _ in range(3)], k=1)
+        fingerprinter.addSamples([[2, 3], [4, 1]], [[-44, -32, -63], [-41, -35, -60]])
+        numpy.testing.assert_allclose(fingerprinter.getNodePosition([-41, -35, -60]), [[4], [1]])
+
+    def testEmpty(self):
+        self.assertRaises(ValueError, RSSI_Fingerprinter([{}]).getNodePositions, [[-50]])
+
+    def testSignalVector(self):
+        fingerprinter = RSSI_Fingerprinter([{'mac': 'a0:3d:6f:26:77:8e'}, {}, {'mac': 'A0:3D:6F:26:77:82'}])
+        signals = fingerprinter.getSignalVector([
+            {'ssid': 'eduroam', 'quality': '60/70', 'signal': -50, 'mac': 'A0:3D:6F:26:77:82'},
+            {'ssid': 'other', 'quality': '20/70', 'signal': -80, 'mac': '00:11:22:33:44:55'}
+        ])
+        numpy.testing.assert_array_equal(signals, [numpy.nan, numpy.nan, -50])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy
+
+from rssi import RSSI_Instrumentation, RSSI_Localizer, RSSI_Scan
+
+from .helpers import StaticBackend, makeAccessPoints, makeSignals
+from .test_scan import CELLS, SCAN_OUTPUT
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = RSSI_Instrumentation()
+        self.events = []
+        self.instrumentation.addListener(lambda *event: self.events.append(event))
+
+    def testScan(self):
+        scanner = RSSI_Scan('wlan-test', backend=StaticBackend(CELLS))
+        scanner.instrumentation = self.instrumentation
+        scanner.formatCells(SCAN_OUTPUT)
+        scanner.getAPinfo(networks=['eduroam'])
+        snapshot = self.instrumentation.getSnapshot()
+        self.assertEqual(sorted(snapshot['timers']), ['scan.backend', 'scan.filter', 'scan.parse'])
+        self.assertEqual(snapshot['counters'], {'scan.cells': 4})
+        self.assertEqual([event[:2] for event in self.events], [('time', 'scan.parse'), ('count', 'scan.cells'), ('time', 'scan.backend'), ('time', 'scan.filter')])
+        # Other scanners are not instrumented.
+        RSSI_Scan('wlan-test').formatCells(SCAN_OUTPUT)
+        self.assertEqual(self.instrumentation.getSnapshot()['counters'], {'scan.cells': 4})
+
+    def testLocalize(self):
+        localizer = RSSI_Localizer(makeAccessPoints(6))
+        localizer.instrumentation = self.instrumentation
+        signals = makeSignals(localizer, numpy.array([[10.0, 20.0], [30.0, 40.0]]))
+        localizer.getNodePosition(signals[0])
+        localizer.getNodePositions(signals, solver='huber')
+        snapshot = self.instrumentation.getSnapshot()
+        self.assertEqual(snapshot['timers']['localize.fix']['calls'], 1)
+        self.assertEqual(snapshot['timers']['localize.batch']['calls'], 1)
+        self.assertEqual(snapshot['counters'], {'localize.fixes': 3})
+        self.assertEqual(sum(snapshot['timers']['localize.batch']['histogram']['counts']), 1)
+
+    def testReset(self):
+        with self.instrumentation.timeStage('app.publish'):
+            pass
+        self.instrumentation.reset()
+        self.assertEqual(self.instrumentation.getSnapshot(), {'timers': {}, 'counters': {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+
+import numpy
+
+from rssi import RSSI_Localizer
+
+from .helpers import addFloors, makeAccessPoints, makeSignals
+
+SOLVERS = ('pinv', 'lstsq', 'weighted', 'huber', 'ransac')
+
+class SolverTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(makeAccessPoints(8))
+        self.positions = numpy.random.RandomState(2).uniform(10, 90, (20, 2))
+        self.signals = makeSignals(self.localizer, self.positions)
+
+    def testNoiseFree(self):
+        for solver in SOLVERS:
+            numpy.testing.assert_allclose(self.localizer.getNodePositions(self.signals, solver), self.positions, atol=1e-3, err_msg=solver)
+
+    def testSingleScan(self):
+        position = self.localizer.getNodePosition(self.signals[0], solver='weighted')
+        numpy.testing.assert_allclose(numpy.ravel(position), self.positions[0], atol=1e-3)
+
+    def testUnknownSolver(self):
+        self.assertRaises(ValueError, self.localizer.getNodePositions, self.signals, 'simplex')
+
+class MissingAccessPointTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(makeAccessPoints(8))
+        self.positions = numpy.random.RandomState(3).uniform(10, 90, (20, 2))
+        self.signals = makeSignals(self.localizer, self.positions)
+        # One access point not heard in every scan.
+        self.signals[numpy.arange(20), numpy.arange(20) % 8] = numpy.nan
+
+    def testRobustSolvers(self):
+        for solver in ('weighted', 'huber', 'ransac'):
+            numpy.testing.assert_allclose(self.localizer.getNodePositions(self.signals, solver), self.positions, atol=1e-3, err_msg=solver)
+
+    def testWeights(self):
+        weights = self.localizer.getAPWeights(self.localizer.getDistancesBatch(self.signals))
+        self.assertTrue((weights[numpy.isnan(self.signals)] == 0).all())
+        numpy.testing.assert_allclose(weights.max(axis=1), 1.0)
+
+    def testFixedSolvers(self):
+        for solver in ('pinv', 'lstsq'):
+            self.assertTrue(numpy.isnan(self.localizer.getNodePositions(self.signals, solver)).all())
+
+class RansacTest(unittest.TestCase):
+    def testDropsOutlier(self):
+        # A layout where subsets containing the outlier can keep every
+        # access point within 'threshold'.
+        localizer = RSSI_Localizer(makeAccessPoints(8, seed=19))
+        positions = numpy.random.RandomState(1).uniform(10, 90, (50, 2))
+        signals = makeSignals(localizer, positions)
+        signals[:, 3] += 15
+        weighted = localizer.getNodePositions(signals, 'weighted')
+        ransac = localizer.getNodePositions(signals, 'ransac')
+        self.assertGreater(numpy.median(numpy.hypot(*(weighted-positions).T)), 1.0)
+        numpy.testing.assert_allclose(ransac, positions, atol=1e-3)
+
+    def testLargeTable(self):
+        # C(3000, 3) subsets; only 'trials' of them may be built.
+        localizer = RSSI_Localizer(makeAccessPoints(3000, area=550.0))
+        position = numpy.array([[300.0, 250.0]])
+        signals = makeSignals(localizer, position)
+        numpy.testing.assert_allclose(localizer.getNodePositions(signals, 'ransac'), position, atol=1e-6)
+
+class RefineTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(makeAccessPoints(6))
+        self.positions = numpy.random.RandomState(4).uniform(10, 90, (10, 2))
+        self.signals = makeSignals(self.localizer, self.positions)
+
+    def testRefine(self):
+        noisy = self.signals+numpy.random.RandomState(5).normal(0, 0.5, self.signals.shape)
+        linear = self.localizer.getNodePositions(noisy)
+        refined = self.localizer.getNodePositions(noisy, refine=True)
+        errors = lambda found: numpy.median(numpy.hypot(*(found-self.positions).T))
+        self.assertLess(errors(refined), errors(linear))
+
+    def testWarmStart(self):
+        initial = self.positions+1.0
+        initial[0] = numpy.nan
+        refined = self.localizer.getNodePositions(self.signals, initial=initial)
+        numpy.testing.assert_allclose(refined, self.positions, atol=1e-4)
+
+    def testMissingAccessPoint(self):
+        signals = self.signals[0].copy()
+        signals[2] = numpy.nan
+        position = self.localizer.getNodePosition(signals, refine=True, initial=self.positions[0]+[1.0, -1.0])
+        numpy.testing.assert_allclose(numpy.ravel(position), self.positions[0], atol=1e-4)
+        # No usable 'pinv' start, refined from the weighted solution.
+        position = self.localizer.getNodePosition(signals, refine=True)
+        numpy.testing.assert_allclose(numpy.ravel(position), self.positions[0], atol=1e-4)
+
+class ThreeDimensionsTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(addFloors(makeAccessPoints(10)))
+        random = numpy.random.RandomState(6)
+        self.positions = numpy.column_stack((random.uniform(10, 90, (20, 2)), random.uniform(0, 8, 20)))
+        self.signals = makeSignals(self.localizer, self.positions)
+
+    def testSolvers(self):
+        self.assertEqual(self.localizer.dimensions, 3)
+        for solver in SOLVERS:
+            numpy.testing.assert_allclose(self.localizer.getNodePositions(self.signals, solver), self.positions, atol=1e-3, err_msg=solver)
+
+    def testSingleScan(self):
+        position = self.localizer.getNodePosition(self.signals[0], refine=True)
+        self.assertEqual(position.shape, (3, 1))
+        numpy.testing.assert_allclose(numpy.ravel(position), self.positions[0], atol=1e-4)
+
+    def testTwoDimensions(self):
+        self.assertEqual(RSSI_Localizer(makeAccessPoints(4)).dimensions, 2)
+
+class SparseTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(makeAccessPoints(2000, area=450.0))
+        self.position = numpy.array([[200.0, 150.0]])
+        signals = makeSignals(self.localizer, self.position)[0]
+        self.indices = numpy.argsort(numpy.hypot(self.localizer.apX-200.0, self.localizer.apY-150.0))[:12]
+        self.signals = signals[self.indices]
+
+    def testPinv(self):
+        position = self.localizer.getNodePositionSparse(self.indices, self.signals)
+        numpy.testing.assert_allclose(numpy.ravel(position), self.position[0], atol=1e-3)
+        subset = self.localizer.getSubset(self.indices)
+        numpy.testing.assert_allclose(position, subset.getNodePosition(self.signals), atol=1e-6)
+
+    def testSolvers(self):
+        for solver in ('weighted', 'huber', 'ransac'):
+            position = self.localizer.getNodePositionSparse(self.indices, self.signals, solver)
+            numpy.testing.assert_allclose(numpy.ravel(position), self.position[0], atol=1e-3, err_msg=solver)
+
+    def testTooFewAccessPoints(self):
+        self.assertTrue(numpy.isnan(self.localizer.getNodePositionSparse(self.indices[:2], self.signals[:2])).all())
+
+    def testHeardSignals(self):
+        scan = [{'mac': self.localizer.macs[i].lower(), 'signal': signal} for i, signal in zip(self.indices, self.signals)]
+        scan.append({'mac': '00:00:00:00:00:00', 'signal': -40})
+        indices, signals = self.localizer.getHeardSignals(scan)
+        numpy.testing.assert_array_equal(indices, self.indices)
+        numpy.testing.assert_array_equal(signals, self.signals)
+
+if __name__ == '__main__':
+    unittest.main()
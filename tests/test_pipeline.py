@@ -0,0 +1,51 @@
+import unittest
+
+import numpy
+
+from rssi import RSSI_Localizer
+from rssi.pipeline import RSSI_Pipeline, RSSI_PipelineWorker
+
+MACS = ['A0:3D:6F:26:77:8E', 'A0:3D:6F:26:77:82', '00:11:22:33:44:55']
+
+ACCESS_POINTS = [{
+    'signalAttenuation': 3.0,
+    'location': {'x': x, 'y': y},
+    'reference': {'distance': 1.0, 'signal': -40.0},
+    'mac': mac
+} for (x, y), mac in zip(((0.0, 0.0), (20.0, 0.0), (0.0, 20.0)), MACS)]
+
+def makeRawScan(signals):
+    lines = ['wlp1s0    Scan completed :']
+    # Reversed, so scans are lined up by MAC rather than by order.
+    for i in reversed(range(len(signals))):
+        lines.append('          Cell %02d - Address: %s' % (i+1, MACS[i]))
+        lines.append('                    Quality=40/70  Signal level=%d dBm' % signals[i])
+        lines.append('                    ESSID:"net-%d"' % i)
+    return '\n'.join(lines)+'\n'
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        random = numpy.random.RandomState(0)
+        self.signals = random.randint(-80, -45, (11, 3))
+        self.rawScans = [makeRawScan(signals) for signals in self.signals]
+        self.expected = RSSI_Localizer(ACCESS_POINTS).getNodePositions(self.signals)
+
+    def testWorker(self):
+        worker = RSSI_PipelineWorker(ACCESS_POINTS)
+        numpy.testing.assert_allclose(worker.getPositions(self.rawScans), self.expected)
+        numpy.testing.assert_allclose(worker.getPositions([raw.encode() for raw in self.rawScans]), self.expected)
+        self.assertEqual(worker.getPositions([]).shape, (0, 2))
+
+    def testMissingAccessPoint(self):
+        worker = RSSI_PipelineWorker(ACCESS_POINTS, networks=['net-0', 'net-1'])
+        self.assertTrue(numpy.isnan(worker.getPositions(self.rawScans[:1])).all())
+
+    def testPool(self):
+        with RSSI_Pipeline(ACCESS_POINTS, processes=2, chunksize=2) as pipeline:
+            numpy.testing.assert_allclose(pipeline.getPositions(iter(self.rawScans)), self.expected)
+            chunks = sorted(pipeline.iterPositions(self.rawScans, ordered=False), key=lambda chunk: chunk[0])
+        self.assertEqual([start for start, positions in chunks], list(range(0, 11, 2)))
+        numpy.testing.assert_allclose(numpy.vstack([positions for start, positions in chunks]), self.expected)
+
+if __name__ == '__main__':
+    unittest.main()
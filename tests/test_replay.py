@@ -0,0 +1,68 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from rssi import RSSI_Localizer
+from rssi.replay import RSSI_ScanReplay
+
+SCAN = '''wlp1s0    Scan completed :
+          Cell 01 - Address: A0:3D:6F:26:77:8E
+                    Quality=43/70  Signal level=-%d dBm
+                    ESSID:"ucrwpa"
+          Cell 02 - Address: A0:3D:6F:26:77:82
+                    Quality=60/70  Signal level=-50 dBm
+                    ESSID:"eduroam"
+          Cell 03 - Address: 00:11:22:33:44:55
+                    Quality=30/70  Signal level=-70 dBm
+                    ESSID:"eduroam"
+'''
+
+class ScanReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Two scans in a plain capture, one more in a compressed one.
+        with open(os.path.join(self.directory, 'a.log'), 'wb') as capture:
+            capture.write((SCAN % 60 + SCAN % 61).encode())
+        with gzip.open(os.path.join(self.directory, 'b.log.gz'), 'wb') as capture:
+            capture.write((SCAN % 62).encode())
+        self.replay = RSSI_ScanReplay(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testScans(self):
+        scans = list(self.replay.iterScans(networks=['ucrwpa']))
+        self.assertEqual([[cell['signal'] for cell in cells] for cells in scans], [[-60], [-61], [-62]])
+
+    def testGetAPinfo(self):
+        signals = [[cell['signal'] for cell in self.replay.getAPinfo()] for _ in range(3)]
+        self.assertEqual(signals, [[-60, -50, -70], [-61, -50, -70], [-62, -50, -70]])
+        self.assertFalse(self.replay.getAPinfo())
+
+    def testIterAPinfo(self):
+        # Replays the capture instead of running 'iwlist'.
+        macs = [[cell['mac'] for cell in self.replay.iterAPinfo(networks='eduroam', macs=['00:11:22:33:44:55'])] for _ in range(3)]
+        self.assertEqual(macs, [['00:11:22:33:44:55']]*3)
+        self.assertEqual(list(self.replay.iterAPinfo()), [])
+
+    def testRawOutputs(self):
+        outputs = list(self.replay.iterRawOutputs())
+        self.assertEqual(outputs, [(SCAN % signal).encode() for signal in (60, 61, 62)])
+
+    def testPositions(self):
+        localizer = RSSI_Localizer([{
+            'signalAttenuation': 3.0,
+            'location': {'x': x, 'y': y},
+            'reference': {'distance': 1.0, 'signal': -40.0},
+            'mac': mac
+        } for x, y, mac in ((0.0, 0.0, 'A0:3D:6F:26:77:8E'), (20.0, 0.0, 'a0:3d:6f:26:77:82'), (0.0, 20.0, '00:11:22:33:44:55'))])
+        positions = numpy.vstack(list(self.replay.iterPositions(localizer, batch_size=2)))
+        expected = localizer.getNodePositions([[-60, -50, -70], [-61, -50, -70], [-62, -50, -70]])
+        numpy.testing.assert_allclose(positions, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import rssi
+from rssi import RSSI_Registry, RSSI_Scan, RSSI_ScanBuffer
+from rssi.storage import RSSI_ScanLog, RSSI_ScanLogWriter
+
+from .helpers import StaticBackend
+
+SCAN_OUTPUT = '''wlp1s0    Scan completed :
+          Cell 01 - Address: A0:3D:6F:26:77:8E
+                    Channel:144
+                    Frequency:5.72 GHz
+                    Quality=43/70  Signal level=-67 dBm
+                    Encryption key:on
+                    ESSID:"ucrwpa"
+                    Bit Rates:24 Mb/s; 36 Mb/s; 48 Mb/s; 54 Mb/s
+                    Mode:Master
+          Cell 02 - Address: A0:3D:6F:26:77:82
+                    Channel:1
+                    Quality=60/70  Signal level=-50 dBm
+                    ESSID:"Cell 7 guest"
+          Cell 03 - Address: 00:11:22:33:44:55
+                    Quality=30/70  Signal level=-80 dBm
+                    Mode:Master
+          Cell 04 - Address: 00:11:22:33:44:66
+                    Quality=60/100  Signal level=60/100
+                    ESSID:"relative"
+'''
+
+class IterCellsTest(unittest.TestCase):
+    def setUp(self):
+        self.cells = list(RSSI_Scan.iterCells(SCAN_OUTPUT.splitlines()))
+
+    def testCells(self):
+        self.assertEqual(len(self.cells), 4)
+        self.assertEqual(self.cells[0], {'ssid': 'ucrwpa', 'quality': '43/70', 'signal': -67, 'mac': 'A0:3D:6F:26:77:8E'})
+
+    def testEssidContainingCell(self):
+        self.assertEqual(self.cells[1]['ssid'], 'Cell 7 guest')
+        self.assertEqual(self.cells[1]['mac'], 'A0:3D:6F:26:77:82')
+
+    def testMissingEssid(self):
+        self.assertEqual(self.cells[2], {'ssid': '', 'quality': '30/70', 'signal': -80, 'mac': '00:11:22:33:44:55'})
+
+    def testRelativeSignalLevel(self):
+        self.assertEqual(self.cells[3]['quality'], '60/100')
+        self.assertIsNone(self.cells[3]['signal'])
+
+    def testBytesLines(self):
+        cells = list(RSSI_Scan.iterCells(line.encode() for line in SCAN_OUTPUT.splitlines()))
+        self.assertEqual(cells, self.cells)
+
+    def testFormatCells(self):
+        self.assertEqual(RSSI_Scan('wlan-test').formatCells(SCAN_OUTPUT), self.cells)
+
+class RecordsTest(unittest.TestCase):
+    def testRegistry(self):
+        registry = RSSI_Registry()
+        self.assertEqual([registry.getId(value) for value in ('a', 'b', 'a')], [0, 1, 0])
+        self.assertEqual(registry.getValue(1), 'b')
+        self.assertEqual(len(registry), 2)
+
+    def testRecords(self):
+        scanner = RSSI_Scan('wlan-test')
+        records = list(scanner.iterRecords(SCAN_OUTPUT.splitlines()))
+        cells = list(RSSI_Scan.iterCells(SCAN_OUTPUT.splitlines()))
+        self.assertEqual([scanner.macRegistry.getValue(record.mac) for record in records], [cell['mac'] for cell in cells])
+        self.assertEqual([scanner.ssidRegistry.getValue(record.ssid) for record in records], [cell['ssid'] for cell in cells])
+        self.assertEqual([record.signal for record in records], [-67, -50, -80, None])
+        self.assertAlmostEqual(records[0].quality, 43/70.0)
+        # Interned ids are shared between scans.
+        self.assertEqual([record.mac for record in scanner.iterRecords(SCAN_OUTPUT.splitlines())], [record.mac for record in records])
+
+CELLS = [
+    {'ssid': 'ucrwpa', 'quality': '43/70', 'signal': -67, 'mac': 'A0:3D:6F:26:77:8E'},
+    {'ssid': 'eduroam', 'quality': '60/70', 'signal': -50, 'mac': 'A0:3D:6F:26:77:82'}
+]
+
+class FilterTest(unittest.TestCase):
+    def testNetworks(self):
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, ['eduroam', 'other']), CELLS[1:])
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, set(['ucrwpa'])), CELLS[:1])
+
+    def testSingleName(self):
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, 'eduroam'), CELLS[1:])
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, 'edu'), [])
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, macs='a0:3d:6f:26:77:8e'), CELLS[:1])
+
+    def testMacs(self):
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, macs=['a0:3d:6f:26:77:82']), CELLS[1:])
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS, ['ucrwpa'], macs=['A0:3D:6F:26:77:82']), [])
+        self.assertEqual(RSSI_Scan.filterAccessPoints(CELLS), CELLS)
+
+    def testOrder(self):
+        ordered = RSSI_Scan.orderAccessPoints(CELLS, ['A0:3D:6F:26:77:82', '00:11:22:33:44:55', 'a0:3d:6f:26:77:8e'])
+        self.assertEqual(ordered, [CELLS[1], None, CELLS[0]])
+
+class ScanBufferTest(unittest.TestCase):
+    def testRingBuffer(self):
+        scan_buffer = RSSI_ScanBuffer(3)
+        scan_buffer.append(CELLS, 1.0)
+        scan_buffer.append(CELLS, 2.0)
+        samples = scan_buffer.view()
+        self.assertEqual(list(samples['timestamp']), [1.0, 2.0, 2.0])
+        self.assertEqual(RSSI_ScanBuffer.intToMac(samples['mac'][-1]), 'A0:3D:6F:26:77:82')
+        self.assertEqual(list(scan_buffer.getLast(0.5, now=2.0)['signal']), [-67, -50])
+
+class ContinuousScanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testContinuousScan(self):
+        scanner = RSSI_Scan('wlan-test', backend=StaticBackend(CELLS))
+        with RSSI_ScanLogWriter(self.directory) as log:
+            scan_buffer = scanner.startContinuousScan(interval=0.01, capacity=64, log=log)
+            deadline = time.time()+5.0
+            while scan_buffer.written < 6 and time.time() < deadline:
+                time.sleep(0.01)
+            scanner.stopContinuousScan()
+            # Readable before the writer is closed.
+            self.assertEqual(len(RSSI_ScanLog(self.directory)), scan_buffer.written)
+        self.assertIsNone(scanner.scanError)
+        samples = scanner.getRecentSamples(60)
+        self.assertGreaterEqual(len(samples), 6)
+        self.assertEqual(set(samples['signal']), set([-67, -50]))
+
+class LazyImportTest(unittest.TestCase):
+    def testScanWithoutNumpy(self):
+        code = (
+            "import sys\n"
+            "from rssi import RSSI_Scan\n"
+            "assert 'numpy' not in sys.modules\n"
+            "from rssi import RSSI_Localizer\n"
+            "assert 'numpy' in sys.modules\n"
+        )
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(rssi.__file__))))
+        subprocess.check_call([sys.executable, '-c', code], env=environment)
+
+    def testExports(self):
+        for name in rssi.__all__:
+            self.assertTrue(hasattr(rssi, name), name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from threading import Thread
+
+import numpy
+
+from rssi import RSSI_Localizer
+from rssi.client import RSSI_LocalizationClient, FRAME, REQUEST, receiveFrame, sendFrame
+from rssi.server import RSSI_LocalizationServer
+
+from .helpers import makeAccessPoints
+
+class LocalizationServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rssi.sock')
+        self.localizer = RSSI_Localizer(makeAccessPoints(6))
+        self.server = RSSI_LocalizationServer(self.localizer, self.path, maxWait=0.005)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.directory)
+
+    def makeSignals(self, n, seed=0):
+        # Float32 on the wire, so compare against float32 inputs.
+        signals = numpy.random.RandomState(seed).uniform(-90, -40, (n, self.localizer.count))
+        return signals.astype(numpy.float32).astype(numpy.float64)
+
+    def testConcurrentClients(self):
+        inputs = [self.makeSignals(200, seed) for seed in range(8)]
+        results = [None]*len(inputs)
+        errors = []
+        def run(index):
+            try:
+                with RSSI_LocalizationClient(self.path, timeout=10.0) as client:
+                    results[index] = client.getNodePositions(inputs[index].tolist(), window=32)
+            except Exception as error:
+                errors.append(error)
+        threads = [Thread(target=run, args=(index,)) for index in range(len(inputs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for signals, positions in zip(inputs, results):
+            numpy.testing.assert_allclose(numpy.array(positions), self.localizer.getNodePositions(signals), atol=1e-9)
+
+    def testBadRequestKeepsOrder(self):
+        signals = self.makeSignals(2)
+        with RSSI_LocalizationClient(self.path, timeout=10.0) as client:
+            first = client.sendRequest(signals[0].tolist())
+            # Wrong number of signals, sent behind the client's back.
+            client.requestId += 1
+            sendFrame(client.connection, REQUEST.pack(client.requestId)+b'\0'*4)
+            client.pending.append(client.requestId)
+            third = client.sendRequest(signals[1].tolist())
+            self.assertEqual(client.receiveResponse()[0], first)
+            self.assertRaises(ValueError, client.receiveResponse)
+            self.assertEqual(client.receiveResponse()[0], third)
+            positions = client.getNodePositions(signals.tolist())
+        numpy.testing.assert_allclose(numpy.array(positions), self.localizer.getNodePositions(signals), atol=1e-9)
+
+    def testOversizedFrameClosesConnection(self):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(10.0)
+        connection.connect(self.path)
+        try:
+            receiveFrame(connection)
+            connection.sendall(FRAME.pack(0x7fffffff))
+            self.assertEqual(connection.recv(1), b'')
+        finally:
+            connection.close()
+
+    def testStalledClient(self):
+        self.server.maxPending = 8
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.connect(self.path)
+        receiveFrame(stalled)
+        request = REQUEST.pack(0)+self.makeSignals(1).astype('<f4').tobytes()
+        def flood():
+            # Far more replies than the socket buffers hold, never read.
+            try:
+                for _ in range(20000):
+                    sendFrame(stalled, request)
+            except (OSError, socket.error):
+                pass
+        thread = Thread(target=flood)
+        thread.start()
+        try:
+            signals = self.makeSignals(50)
+            with RSSI_LocalizationClient(self.path, timeout=10.0) as client:
+                positions = client.getNodePositions(signals.tolist(), window=8)
+            numpy.testing.assert_allclose(numpy.array(positions), self.localizer.getNodePositions(signals), atol=1e-9)
+            thread.join(10.0)
+            deadline = time.time()+10.0
+            while stalled in self.server.connections and time.time() < deadline:
+                time.sleep(0.01)
+            # Dropped once its replies piled up.
+            self.assertNotIn(stalled, self.server.connections)
+        finally:
+            stalled.close()
+            thread.join()
+
+    def testUnknownSolver(self):
+        self.assertRaises(ValueError, RSSI_LocalizationServer, self.localizer, self.path+'.2', solver='simplex')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy
+
+from rssi.smoothing import RSSI_SignalStats
+
+MACS = ['A0:3D:6F:26:77:8E', 'A0:3D:6F:26:77:82', '00:11:22:33:44:55']
+
+class SignalStatsTest(unittest.TestCase):
+    def setUp(self):
+        random = numpy.random.RandomState(0)
+        # 200 scans, 0.25s apart; every access point is missed now and
+        # then, so rings of different lengths are evicted separately.
+        self.times = numpy.arange(200)*0.25
+        self.signals = random.normal([-60.0, -75.0, -48.0], 3.0, (200, 3)).round()
+        self.heard = random.uniform(size=(200, 3)) > 0.2
+
+    def feed(self, stats, scans):
+        for t, signals, heard in zip(self.times[:scans], self.signals[:scans], self.heard[:scans]):
+            stats.update([
+                {'ssid': '', 'quality': '40/70', 'signal': signal, 'mac': mac}
+                for mac, signal, is_heard in zip(MACS, signals, heard) if is_heard
+            ], t)
+
+    # Samples of access point 'i' still in the window at 'now'.
+    def getWindow(self, i, scans, window, maxSamples):
+        heard = self.heard[:scans, i]
+        times, signals = self.times[:scans][heard], self.signals[:scans, i][heard]
+        return signals[times >= self.times[scans-1]-window][-maxSamples:]
+
+    def testMeanAndVariance(self):
+        for maxSamples in (64, 8):
+            for scans in (1, 7, 60, 200):
+                stats = RSSI_SignalStats(window=5.0, maxSamples=maxSamples, capacity=1)
+                self.feed(stats, scans)
+                now = self.times[scans-1]
+                for i, mac in enumerate(MACS):
+                    window = self.getWindow(i, scans, 5.0, maxSamples)
+                    mean, variance, count = [stats.getStatistic([mac], statistic, now)[0] for statistic in ('mean', 'variance', 'count')]
+                    self.assertEqual(count, len(window))
+                    if len(window):
+                        self.assertAlmostEqual(mean, numpy.mean(window), places=9)
+                        self.assertAlmostEqual(variance, numpy.var(window), places=9)
+                    else:
+                        self.assertTrue(numpy.isnan(mean) and numpy.isnan(variance))
+
+    def testEviction(self):
+        stats = RSSI_SignalStats(window=2.0)
+        stats.updateSamples(MACS[:1], [-60], 0.0)
+        stats.updateSamples(MACS[:1], [-70], 1.5)
+        self.assertEqual(stats.getStatistic(MACS[:1], 'mean', 1.9)[0], -65)
+        self.assertEqual(stats.getStatistic(MACS[:1], 'mean', 3.0)[0], -70)
+        self.assertEqual(stats.getStatistic(MACS[:1], 'count', 4.0)[0], 0)
+        self.assertTrue(numpy.isnan(stats.getStatistic(MACS[:1], 'mean')[0]))
+        # The EWMA and median are kept after the window empties.
+        self.assertEqual(stats.getStatistic(MACS[:1], 'ewma')[0], -63)
+
+    def testEWMA(self):
+        stats = RSSI_SignalStats(alpha=0.3)
+        self.feed(stats, 200)
+        for i, mac in enumerate(MACS):
+            signals = self.signals[self.heard[:, i], i]
+            expected = signals[0]
+            for signal in signals[1:]:
+                expected += 0.3*(signal-expected)
+            self.assertAlmostEqual(stats.getStatistic([mac], 'ewma')[0], expected, places=9)
+
+    def testMedian(self):
+        stats = RSSI_SignalStats(window=1e9, medianStep=0.5, maxSamples=256)
+        self.feed(stats, 200)
+        for i, mac in enumerate(MACS):
+            signals = self.signals[self.heard[:, i], i]
+            expected = signals[0]
+            for signal in signals[1:]:
+                expected += 0.5*numpy.sign(signal-expected)
+            median = stats.getStatistic([mac], 'median')[0]
+            self.assertEqual(median, expected)
+            # A stationary stream keeps the estimate near the median.
+            self.assertLess(abs(median-numpy.median(signals)), 3.0)
+
+    def testSignalVector(self):
+        stats = RSSI_SignalStats()
+        stats.updateSamples(MACS[:2], [-60, -70], 0.0)
+
+        class Localizer(object):
+            macs = ['a0:3d:6f:26:77:82', None, 'A0:3D:6F:26:77:8E']
+        numpy.testing.assert_array_equal(stats.getSignalVector(Localizer()), [-70, numpy.nan, -60])
+        self.assertRaises(ValueError, stats.getStatistic, MACS, 'mode')
+
+if __name__ == '__main__':
+    unittest.main()
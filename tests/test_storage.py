@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from rssi import RSSI_Localizer, RSSI_ScanBuffer
+from rssi.storage import RSSI_APTable, RSSI_ScanLog, RSSI_ScanLogWriter, writeAPTable
+
+from .helpers import addFloors, makeAccessPoints, makeSignals
+
+CELLS = [
+    {'ssid': 'ucrwpa', 'quality': '43/70', 'signal': -67, 'mac': 'A0:3D:6F:26:77:8E'},
+    {'ssid': 'eduroam', 'quality': '60/70', 'signal': -50, 'mac': 'A0:3D:6F:26:77:82'},
+    {'ssid': 'hidden', 'quality': '10/70', 'signal': None, 'mac': '00:11:22:33:44:55'}
+]
+
+class ScanLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRoundTrip(self):
+        with RSSI_ScanLogWriter(self.directory) as log:
+            log.append(CELLS, 1.0)
+            log.append(CELLS[1:], 2.0)
+        scan_log = RSSI_ScanLog(self.directory)
+        self.assertEqual(len(scan_log), 3)
+        numpy.testing.assert_array_equal(scan_log.timestamp, [1.0, 1.0, 2.0])
+        self.assertEqual(RSSI_ScanBuffer.intToMac(scan_log.mac[2]), 'A0:3D:6F:26:77:82')
+        numpy.testing.assert_allclose(scan_log.quality, [43/70.0, 60/70.0, 60/70.0], rtol=1e-6)
+        timestamps, signals = scan_log.getSignalMatrix(['a0:3d:6f:26:77:82', None, 'A0:3D:6F:26:77:8E'])
+        numpy.testing.assert_array_equal(timestamps, [1.0, 2.0])
+        numpy.testing.assert_array_equal(signals, [[-50, numpy.nan, -67], [-50, numpy.nan, numpy.nan]])
+
+    def testReadWhileWriting(self):
+        log = RSSI_ScanLogWriter(self.directory)
+        try:
+            log.append(CELLS, 1.0)
+            self.assertEqual(len(RSSI_ScanLog(self.directory)), 2)
+            log.append(CELLS, 2.0)
+            # A writer caught between two columns, halfway through a value.
+            with open(os.path.join(self.directory, 'timestamp.bin'), 'ab') as column_file:
+                column_file.write(numpy.array([3.0], dtype='<f8').tobytes())
+            with open(os.path.join(self.directory, 'mac.bin'), 'ab') as column_file:
+                column_file.write(b'\0'*3)
+            scan_log = RSSI_ScanLog(self.directory)
+            self.assertEqual(len(scan_log), 4)
+            self.assertEqual(set(len(column) for column in scan_log.columns.values()), set([4]))
+            numpy.testing.assert_array_equal(scan_log.timestamp, [1.0, 1.0, 2.0, 2.0])
+        finally:
+            log.close()
+
+    def testEmpty(self):
+        self.assertEqual(len(RSSI_ScanLog(self.directory)), 0)
+
+class APTableTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.accessPoints = makeAccessPoints(6)
+        for i, accessPoint in enumerate(self.accessPoints[:4]):
+            accessPoint['mac'] = '00:11:22:33:44:%02X' % i
+        self.localizer = RSSI_Localizer(self.accessPoints)
+        writeAPTable(self.directory, self.localizer)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testLocalizer(self):
+        table = RSSI_APTable(self.directory)
+        localizer = table.getLocalizer()
+        self.assertEqual(len(table), 6)
+        self.assertTrue(numpy.shares_memory(localizer.apX, table.x))
+        self.assertEqual(localizer.macs, self.localizer.macs)
+        signals = makeSignals(self.localizer, numpy.random.RandomState(0).uniform(10, 90, (5, 2)))
+        numpy.testing.assert_allclose(localizer.getNodePositions(signals), self.localizer.getNodePositions(signals))
+        self.assertEqual(localizer.accessPoints, self.accessPoints)
+
+    def testRewrite(self):
+        localizer = RSSI_APTable(self.directory).getLocalizer()
+        moved = RSSI_Localizer(makeAccessPoints(6, seed=1))
+        writeAPTable(self.directory, moved)
+        # The old localizer keeps its own copy of the table.
+        numpy.testing.assert_array_equal(localizer.apX, self.localizer.apX)
+        numpy.testing.assert_array_equal(RSSI_APTable(self.directory).x, moved.apX)
+
+    def testThreeDimensions(self):
+        localizer = RSSI_Localizer(addFloors(makeAccessPoints(6)))
+        writeAPTable(self.directory, localizer)
+        table = RSSI_APTable(self.directory)
+        numpy.testing.assert_array_equal(table.z, localizer.apZ)
+        mapped = table.getLocalizer()
+        self.assertEqual(mapped.dimensions, 3)
+        self.assertEqual(mapped.accessPoints, localizer.accessPoints)
+        # Written back as 2D, the old 'z' column goes away.
+        writeAPTable(self.directory, self.localizer)
+        self.assertIsNone(RSSI_APTable(self.directory).z)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy
+
+from rssi import RSSI_Localizer
+from rssi.tracker import RSSI_Tracker
+
+from .helpers import addFloors, makeAccessPoints, makeSignals
+
+class TrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = RSSI_Tracker(capacity=2)
+
+    def testNewTags(self):
+        positions = numpy.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        numpy.testing.assert_array_equal(self.tracker.update(['a', 'b', 'c'], positions, 0.0), positions)
+        numpy.testing.assert_array_equal(self.tracker.getPositions(), positions)
+        numpy.testing.assert_array_equal(self.tracker.getPositions(['c', 'x']), [[5.0, 6.0], [numpy.nan, numpy.nan]])
+
+    def testPredict(self):
+        self.tracker.update(['a'], [[1.0, 2.0]], 0.0)
+        self.tracker.state[0, 2:] = [0.5, -1.0]
+        state, covariance = self.tracker.predict(numpy.array([0]), numpy.array([2.0]))
+        numpy.testing.assert_allclose(state[0], [2.0, 0.0, 0.5, -1.0])
+        # Initial covariance diag(4, 4, 1, 1), carried 2s with unit
+        # process noise.
+        numpy.testing.assert_allclose(covariance[0, 0, 0], 4.0+4.0*1.0+8.0/3)
+        numpy.testing.assert_allclose(covariance[0, 0, 2], 2.0*1.0+2.0)
+        numpy.testing.assert_allclose(covariance[0, 2, 2], 1.0+2.0)
+        numpy.testing.assert_allclose(self.tracker.getPredictedPositions(['a', 'x'], 2.0), [[2.0, 0.0], [numpy.nan, numpy.nan]])
+
+    def testConverges(self):
+        self.tracker.update(['a'], [[10.0, 20.0]], 0.0)
+        for step in range(1, 40):
+            position = self.tracker.update(['a'], [[30.0, 30.0]], 0.1*step)
+        numpy.testing.assert_allclose(position[0], [30.0, 30.0], atol=0.5)
+        self.assertLess(self.tracker.covariance[0, 0, 0], 4.0)
+
+    def testDuplicateTag(self):
+        other = RSSI_Tracker()
+        other.update(['a'], [[0.0, 0.0]], 0.0)
+        expected = other.update(['a'], [[2.0, 0.0]], 1.0)
+        positions = self.tracker.update(['a', 'b', 'a'], [[0.0, 0.0], [5.0, 5.0], [2.0, 0.0]], [0.0, 0.0, 1.0])
+        numpy.testing.assert_allclose(positions[2], expected[0])
+        numpy.testing.assert_allclose(positions[1], [5.0, 5.0])
+        self.assertEqual(self.tracker.tags, ['a', 'b'])
+
+    def testNaNMeasurement(self):
+        self.tracker.update(['a'], [[1.0, 2.0]], 0.0)
+        covariance = self.tracker.covariance[0].copy()
+        positions = self.tracker.update(['a', 'b'], [[numpy.nan, numpy.nan]]*2, 1.0)
+        numpy.testing.assert_allclose(positions[0], [1.0, 2.0])
+        self.assertTrue(numpy.isnan(positions[1]).all())
+        self.assertGreater(self.tracker.covariance[0, 0, 0], covariance[0, 0])
+        self.assertEqual(self.tracker.timestamps[0], 1.0)
+        self.assertEqual(self.tracker.tags, ['a'])
+
+class TrackerDistancesTest(unittest.TestCase):
+    def setUp(self):
+        self.localizer = RSSI_Localizer(makeAccessPoints(6))
+        self.tracker = RSSI_Tracker(self.localizer)
+
+    def getDistances(self, position, missing=()):
+        distances = self.localizer.getDistancesBatch(makeSignals(self.localizer, numpy.array([position])))
+        distances[0, list(missing)] = numpy.nan
+        return distances
+
+    def testMissingAccessPoint(self):
+        self.tracker.updateFromDistances(['a'], self.getDistances([10.0, 20.0]), 0.0)
+        numpy.testing.assert_allclose(self.tracker.getPositions(['a'])[0], [10.0, 20.0], atol=1e-4)
+        for step in range(1, 40):
+            position = self.tracker.updateFromDistances(['a'], self.getDistances([30.0, 30.0], [step % 6]), 0.1*step)
+        numpy.testing.assert_allclose(position[0], [30.0, 30.0], atol=0.5)
+
+    def testTooFewAccessPoints(self):
+        self.tracker.updateFromDistances(['a'], self.getDistances([10.0, 20.0]), 0.0)
+        covariance = self.tracker.covariance[0, 0, 0]
+        # Two access points can't fix a position: only a time step.
+        position = self.tracker.updateFromDistances(['a'], self.getDistances([30.0, 30.0], range(2, 6)), 1.0)
+        numpy.testing.assert_allclose(position[0], [10.0, 20.0], atol=1e-4)
+        self.assertGreater(self.tracker.covariance[0, 0, 0], covariance)
+
+    def testThreeDimensions(self):
+        self.assertRaises(ValueError, RSSI_Tracker, RSSI_Localizer(addFloors(makeAccessPoints(6))))
+
+if __name__ == '__main__':
+    unittest.main()